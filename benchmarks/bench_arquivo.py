@@ -0,0 +1,97 @@
+# Telas do dia a dia antes e depois de mover para o arquivo as consultas e
+# vacinas mais antigas (clinica/arquivamento.py), num banco do gerador com oito
+# anos de histórico. As mesmas amostras de animais são lidas nos dois momentos;
+# o histórico completo (quente + arquivo) é medido depois. "tabelas quentes" é o
+# tamanho de Consulta e Vacinas com seus índices (dbstat), o que as telas
+# disputam no cache.
+#
+#   python -m benchmarks.bench_arquivo [animais] [consultas] [vacinas] [dias]
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from clinica import arquivamento, banco, repositorio
+from clinica.vacinas_pendentes import vacinas_pendentes
+from benchmarks.gerador import HOJE, gerar
+
+
+AMOSTRA = 300
+
+
+def medir(funcao, argumentos):
+    tempos = []
+    for argumento in argumentos:
+        with banco.unidade_de_trabalho() as session:
+            inicio = time.perf_counter()
+            funcao(session, argumento)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95)]
+
+
+def tamanho_quente(engine):
+    with engine.connect() as conexao:
+        return conexao.exec_driver_sql(
+            "SELECT sum(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name IN ('Consulta', 'Vacinas') AND type IN ('table', 'index'))"
+        ).scalar()
+
+
+TELAS = [
+    ("consultas (1ª página)", lambda session, animal_id: repositorio.pagina_consultas_do_animal(session, animal_id)),
+    ("consultas (lista)", lambda session, animal_id: repositorio.listar_consultas_do_animal(session, animal_id)),
+    ("vacinas (1ª página)", lambda session, animal_id: repositorio.pagina_vacinas_do_animal(session, animal_id)),
+    ("ficha do animal", lambda session, animal_id: repositorio.ficha_animal(session, animal_id)),
+]
+
+
+def main():
+    animais = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    vacinas = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+    dias = int(sys.argv[4]) if len(sys.argv) > 4 else arquivamento.IDADE_PADRAO_DIAS
+    sorteio = random.Random(20)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "bench.db")
+        engine = banco.configurar_banco(f"sqlite:///{caminho}")
+        banco.inicializar_banco(engine)
+        gerar(engine, donos=animais // 3, animais=animais, consultas=consultas, vacinas=vacinas, hoje=HOJE)
+        amostra = sorteio.sample(range(1, animais + 1), AMOSTRA)
+        print(f"{animais} animais, {consultas} consultas, {vacinas} vacinas; arquivando o que tem mais de {dias} dias\n")
+
+        antes = {nome: medir(funcao, amostra) for nome, funcao in TELAS}
+        antes["vacinas a vencer"] = medir(lambda session, _: vacinas_pendentes(session, hoje=HOJE), range(20))
+        tamanho_antes = os.path.getsize(caminho), tamanho_quente(engine)
+
+        inicio = time.perf_counter()
+        resultado = arquivamento.arquivar(engine, dias, hoje=HOJE)
+        segundos = time.perf_counter() - inicio
+        with engine.connect() as conexao:
+            conexao.exec_driver_sql("VACUUM")
+        movidas = resultado["movidas"]
+        print(f"arquivamento: {movidas['Consulta']} consultas e {movidas['Vacinas']} vacinas em {segundos:.1f} s")
+        print(f"banco principal: {tamanho_antes[0] / 2**20:.0f} MiB -> {os.path.getsize(caminho) / 2**20:.0f} MiB; "
+              f"tabelas quentes: {tamanho_antes[1] / 2**20:.0f} MiB -> {tamanho_quente(engine) / 2**20:.0f} MiB; "
+              f"arquivo: {os.path.getsize(os.path.join(pasta, 'bench_arquivo.db')) / 2**20:.0f} MiB\n")
+
+        depois = {nome: medir(funcao, amostra) for nome, funcao in TELAS}
+        depois["vacinas a vencer"] = medir(lambda session, _: vacinas_pendentes(session, hoje=HOJE), range(20))
+        for nome, (mediana, p95) in antes.items():
+            mediana_depois, p95_depois = depois[nome]
+            print(f"  {nome:22} p50 {mediana:7.3f} -> {mediana_depois:7.3f} ms   p95 {p95:7.3f} -> {p95_depois:7.3f} ms")
+
+        print()
+        for nome, funcao in [("histórico de consultas", repositorio.pagina_historico_consultas_do_animal),
+                             ("histórico de vacinas", repositorio.pagina_historico_vacinas_do_animal),
+                             ("linha do tempo", repositorio.pagina_linha_do_tempo)]:
+            mediana, p95 = medir(funcao, amostra)
+            print(f"  {nome:22} p50 {mediana:7.3f} ms   p95 {p95:7.3f} ms (quente + arquivo)")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
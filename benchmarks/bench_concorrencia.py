@@ -0,0 +1,124 @@
+# Várias estações no mesmo arquivo: N processos fazem, ao mesmo tempo, o
+# trabalho de balcão (ler a ficha de um animal, registrar uma consulta, mudar o
+# tratamento) pela mesma em_transacao() que a interface usa. Para cada perfil
+# de armazenamento mostra a vazão total, p50/p99 de leituras e escritas e
+# quantas operações falharam com o banco travado. No perfil "legado" as
+# operações não são repetidas, como antes.
+#
+#   python -m benchmarks.bench_concorrencia [processos] [segundos]
+
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+from clinica import banco, repositorio
+from clinica.modelos import Dono, PessoaFisica, Animal, Especie, Veterinario
+
+
+DONOS = 2000
+ANIMAIS_POR_DONO = 2
+FRACAO_ESCRITAS = 0.3
+
+
+def popular(engine):
+    animais = DONOS * ANIMAIS_POR_DONO
+    with engine.begin() as conexao:
+        conexao.execute(Especie.__table__.insert(), [{"id": 1, "nome": "Cão", "descricao": "", "subespecie": ""}])
+        conexao.execute(Veterinario.__table__.insert(), [{"id": 1, "nome": "Vet", "especializacao": "Clínica", "numero_reg_prof": 1}])
+        conexao.execute(Dono.__table__.insert(), [{"id": i, "nome": f"Dono {i}", "endereco_cep": "00000000", "tipo": "pessoa_fisica", "documento": f"{i:011d}"} for i in range(1, DONOS + 1)])
+        conexao.execute(PessoaFisica.__table__.insert(), [{"id": i, "cpf": f"{i:011d}"} for i in range(1, DONOS + 1)])
+        conexao.execute(Animal.__table__.insert(), [
+            {"id": i, "nome": f"Animal {i}", "tratamentos_realizados": "", "especie_id": 1, "dono_id": (i - 1) % DONOS + 1}
+            for i in range(1, animais + 1)
+        ])
+    return animais
+
+
+def registrar_consulta(session, animal_id, descricao):
+    animal = repositorio.buscar_animal(session, animal_id)
+    veterinario = repositorio.buscar_veterinario_por_id(session, 1)
+    repositorio.criar_consulta(session, data_consulta=date.today(), animal=animal, veterinario=veterinario, descricao=descricao)
+    animal.tratamentos_realizados = descricao
+
+
+def estacao(url, perfil, animais, segundos, semente, largada, fila):
+    banco.configurar_banco(url, perfil=perfil)
+    if perfil == "legado":
+        banco.TENTATIVAS = 1
+    sorteio = random.Random(semente)
+    leituras, escritas, falhas = [], [], 0
+    largada.wait()
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        animal_id = sorteio.randint(1, animais)
+        escrita = sorteio.random() < FRACAO_ESCRITAS
+        inicio = time.perf_counter()
+        try:
+            if escrita:
+                banco.em_transacao(registrar_consulta, animal_id, f"Retorno {semente}")
+            else:
+                banco.em_transacao(repositorio.ficha_animal, animal_id)
+        except Exception as erro:
+            if not banco.banco_travado(erro):
+                raise
+            falhas += 1
+            continue
+        (escritas if escrita else leituras).append((time.perf_counter() - inicio) * 1000)
+    banco.engine.dispose()
+    fila.put((leituras, escritas, falhas))
+
+
+def percentil(valores, fracao):
+    if not valores:
+        return float("nan")
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))]
+
+
+def medir(modelo, pasta, perfil, processos, segundos, animais):
+    caminho = os.path.join(pasta, f"{perfil}.db")
+    shutil.copy(modelo, caminho)
+    url = f"sqlite:///{caminho}"
+    contexto = multiprocessing.get_context("spawn")
+    largada, fila = contexto.Event(), contexto.Queue()
+    estacoes = [contexto.Process(target=estacao, args=(url, perfil, animais, segundos, i, largada, fila)) for i in range(processos)]
+    for processo in estacoes:
+        processo.start()
+    time.sleep(1)  # deixa os processos importarem e abrirem o banco
+    largada.set()
+    leituras, escritas, falhas = [], [], 0
+    for _ in estacoes:
+        suas_leituras, suas_escritas, suas_falhas = fila.get()
+        leituras += suas_leituras
+        escritas += suas_escritas
+        falhas += suas_falhas
+    for processo in estacoes:
+        processo.join()
+
+    print(f"{perfil:7} {(len(leituras) + len(escritas)) / segundos:8.0f} op/s"
+          f"   leitura p50 {percentil(leituras, 0.5):6.1f} p99 {percentil(leituras, 0.99):7.1f} ms"
+          f"   escrita p50 {percentil(escritas, 0.5):6.1f} p99 {percentil(escritas, 0.99):7.1f} ms"
+          f"   falhas {falhas}")
+
+
+def main():
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with tempfile.TemporaryDirectory() as pasta:
+        modelo = os.path.join(pasta, "modelo.db")
+        engine = banco.configurar_banco(f"sqlite:///{modelo}", perfil="legado")
+        banco.inicializar_banco(engine)
+        animais = popular(engine)
+        engine.dispose()
+        print(f"{processos} processos, {segundos:.0f} s por perfil, {FRACAO_ESCRITAS:.0%} escritas\n")
+        for perfil in banco.PERFIS:
+            medir(modelo, pasta, perfil, processos, segundos, animais)
+
+
+if __name__ == '__main__':
+    main()
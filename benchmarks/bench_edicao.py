@@ -0,0 +1,86 @@
+# Editar as vacinas de um animal: mudar status e próxima aplicação de todas.
+# "antes" reproduz o fluxo antigo de "Atualizar Vacina", um atributo por vez:
+# para cada vacina e cada campo, a lista de vacinas e a vacina escolhida são
+# lidas de novo e a alteração vai numa transação própria. "agora" é a grade de
+# edição: uma leitura da lista e uma transação com um UPDATE em lote
+# (repositorio.gravar_varios). Mostra tempo, transações e comandos SQL (um
+# executemany conta como um comando).
+#
+#   python -m benchmarks.bench_edicao [vacinas] [repeticoes]
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from clinica import banco, repositorio
+
+
+CAMPOS = (("status", lambda i, rodada: f"Aplicada {rodada}"), ("prox_aplicacao", lambda i, rodada: date(2026, 1, 1) + timedelta(days=i + rodada)))
+
+
+def popular(vacinas):
+    with banco.unidade_de_trabalho() as session:
+        especie = repositorio.criar_especie(session, nome="Cão", descricao="", subespecie="SRD")
+        dono = repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="12345678901", endereco_cep="00000000")
+        animal = repositorio.criar_animal(session, nome="Rex", data_nasc=None, tratamentos_realizados="", especie=especie, dono=dono)
+        for i in range(vacinas):
+            repositorio.criar_vacina(session, nome=f"V{i}", status="Pendente", data_aplicacao=date(2025, 1, 1), prox_aplicacao=None, animal=animal)
+        return animal.id
+
+
+def antes(animal_id, rodada):
+    transacoes = 0
+    quantas = len(banco.em_transacao(repositorio.listar_vacinas_do_animal, animal_id))
+    for i in range(quantas):
+        for campo, valor in CAMPOS:
+            vacina_id = banco.em_transacao(repositorio.listar_vacinas_do_animal, animal_id)[i].id
+            vacina = banco.em_transacao(repositorio.buscar_vacina, vacina_id)
+            setattr(vacina, campo, valor(i, rodada))
+            banco.em_transacao(repositorio.gravar, vacina)
+            transacoes += 3
+    return transacoes + 1
+
+
+def agora(animal_id, rodada):
+    vacinas = banco.em_transacao(repositorio.listar_vacinas_do_animal, animal_id)
+    for i, vacina in enumerate(vacinas):
+        for campo, valor in CAMPOS:
+            setattr(vacina, campo, valor(i, rodada))
+    banco.em_transacao(repositorio.gravar_varios, vacinas)
+    return 2
+
+
+def medir(funcao, animal_id, repeticoes, comandos, primeira_rodada):
+    tempos, contagens = [], []
+    for rodada in range(primeira_rodada, primeira_rodada + repeticoes):
+        comandos.clear()
+        inicio = time.perf_counter()
+        transacoes = funcao(animal_id, rodada)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        contagens.append((transacoes, len(comandos), sum(1 for comando in comandos if comando.startswith("UPDATE"))))
+    return statistics.median(tempos), contagens[-1]
+
+
+def main():
+    vacinas = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'edicao.db')}")
+        banco.inicializar_banco(engine)
+        animal_id = popular(vacinas)
+        comandos = []
+        event.listen(engine, "before_cursor_execute", lambda conexao, cursor, sql, parametros, contexto, varios: comandos.append(sql.lstrip()))
+        print(f"{vacinas} vacinas, {len(CAMPOS)} campos cada; mediana de {repeticoes} edições\n")
+        for rodada, (nome, funcao) in enumerate((("antes", antes), ("agora", agora))):
+            tempo, (transacoes, total, updates) = medir(funcao, animal_id, repeticoes, comandos, rodada * repeticoes)
+            print(f"  {nome:6} {tempo:8.1f} ms   {transacoes:4} transações   {total:4} comandos SQL ({updates} UPDATE)")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
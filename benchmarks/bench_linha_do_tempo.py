@@ -0,0 +1,112 @@
+# Tela do animal com a linha do tempo (consultas e vacinas numa lista só,
+# paginada por (data, tipo, id)), num banco do gerador já arquivado e com um
+# paciente crônico de milhares de eventos. "antes" reproduz a ficha antiga, que
+# carregava todas as consultas e vacinas do animal (só as do banco principal)
+# para mostrá-las numa linha de texto; "agora" é a ficha mais a primeira página.
+# A rolagem lê a linha do tempo inteira do paciente crônico, página a página.
+#
+#   python -m benchmarks.bench_linha_do_tempo [animais] [eventos_do_cronico]
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from clinica import arquivamento, banco, repositorio
+from clinica.modelos import Animal, Consulta, Vacina
+from benchmarks.gerador import HOJE, LOTE, gerar
+
+
+AMOSTRA = 300
+REPETICOES = 50
+PAGINA = 100
+
+
+def ficha_antes(session, animal_id):
+    animal = (session.query(Animal)
+              .options(joinedload(Animal.especie), joinedload(Animal.dono), selectinload(Animal.consultas), selectinload(Animal.vacinas))
+              .filter(Animal.id == animal_id)
+              .first())
+    ', '.join(c.data_consulta.strftime("%d/%m/%Y") for c in animal.consultas), ', '.join(v.nome for v in animal.vacinas)
+
+
+def ficha_agora(session, animal_id):
+    repositorio.ficha_animal(session, animal_id)
+    repositorio.pagina_linha_do_tempo(session, animal_id, limite=PAGINA)
+
+
+def medir(funcao, argumentos):
+    tempos = []
+    for argumento in argumentos:
+        with banco.unidade_de_trabalho() as session:
+            inicio = time.perf_counter()
+            funcao(session, argumento)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95)]
+
+
+def adicionar_cronico(engine, eventos):
+    # Um animal já existente ganha uma consulta e uma vacina a cada poucos dias, por anos.
+    sorteio = random.Random(21)
+    with engine.begin() as conexao:
+        animal_id, veterinario_id = conexao.exec_driver_sql('SELECT max(id), (SELECT min(id) FROM "Veterinario") FROM "Animal"').one()
+        consultas = [{"animal_id": animal_id, "veterinario_id": veterinario_id, "descricao": "Acompanhamento",
+                      "data_consulta": HOJE - timedelta(days=sorteio.randrange(eventos * 2))} for _ in range(eventos // 2)]
+        vacinas = [{"animal_id": animal_id, "nome": "Imunoterapia", "status": "Aplicada",
+                    "data_aplicacao": HOJE - timedelta(days=sorteio.randrange(eventos * 2))} for _ in range(eventos - eventos // 2)]
+        for tabela, linhas in ((Consulta.__table__, consultas), (Vacina.__table__, vacinas)):
+            for comeco in range(0, len(linhas), LOTE):
+                conexao.execute(tabela.insert(), linhas[comeco:comeco + LOTE])
+    return animal_id
+
+
+def rolar(animal_id):
+    # Cada página numa transação, como a tabela da tela faz ao rolar.
+    tempos, apos, eventos = [], None, 0
+    while True:
+        with banco.unidade_de_trabalho() as session:
+            inicio = time.perf_counter()
+            pagina = repositorio.pagina_linha_do_tempo(session, animal_id, apos, PAGINA)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        eventos += len(pagina)
+        if len(pagina) < PAGINA:
+            return eventos, tempos
+        ultimo = pagina[-1]
+        apos = (ultimo.data, ultimo.tipo, ultimo.id)
+
+
+def main():
+    animais = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    eventos = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    sorteio = random.Random(21)
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+        banco.inicializar_banco(engine)
+        gerar(engine, donos=animais // 3, animais=animais, consultas=animais * 10, vacinas=animais * 10, hoje=HOJE)
+        cronico = adicionar_cronico(engine, eventos)
+        arquivamento.arquivar(engine, hoje=HOJE)
+        with engine.connect() as conexao:
+            conexao.exec_driver_sql("ANALYZE")
+        print(f"{animais} animais com {animais * 10} consultas e {animais * 10} vacinas (parte arquivada); "
+              f"paciente crônico com {eventos} eventos\n")
+
+        amostra = sorteio.sample(range(1, animais), AMOSTRA)
+        for nome, argumentos in (("animais sorteados", amostra), ("paciente crônico", [cronico] * REPETICOES)):
+            antes, agora = medir(ficha_antes, argumentos), medir(ficha_agora, argumentos)
+            print(f"  abrir a tela, {nome:17} antes p50 {antes[0]:8.2f} ms  p95 {antes[1]:8.2f} ms   "
+                  f"agora p50 {agora[0]:6.2f} ms  p95 {agora[1]:6.2f} ms")
+
+        lidos, tempos = rolar(cronico)
+        print(f"\n  rolagem do paciente crônico: {lidos} eventos em {len(tempos)} páginas de {PAGINA}; "
+              f"página p50 {statistics.median(tempos):.2f} ms, pior {max(tempos):.2f} ms, total {sum(tempos):.0f} ms")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
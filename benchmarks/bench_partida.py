@@ -0,0 +1,85 @@
+# Partida a frio da interface: cada medição é um processo novo de
+# "python main.py" (Qt offscreen), numa pasta com o clinica_vet.db. Mede o tempo
+# até o menu aparecer e até o programa ficar pronto (SQLAlchemy e telas
+# importados, esquema conferido), com um banco novo (primeira partida, cria o
+# esquema) e com um banco já existente (toda partida depois). Sai com erro se a
+# mediana passar do orçamento. --importtime mostra os módulos mais caros
+# importados antes do menu (python -X importtime).
+#
+#   python -m benchmarks.bench_partida [execucoes] [--importtime]
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mediana, em ms, no banco já existente
+ORCAMENTO_MENU_MS = 400
+ORCAMENTO_PRONTO_MS = 1500
+
+# O processo medido: a partida de main.py (iniciar), marcando o menu na tela e o fim do carregamento.
+CODIGO = """
+import sys, time
+import main
+carregar = main.carregar_modulos
+def medir(*args):
+    print("menu", time.time(), flush=True)
+    print("-- menu --", file=sys.stderr, flush=True)
+    carregar(*args)
+    print("pronto", time.time(), flush=True)
+main.carregar_modulos = medir
+main.iniciar()
+"""
+
+
+def partir(pasta, importtime=False):
+    ambiente = {**os.environ, "QT_QPA_PLATFORM": "offscreen", "PYTHONPATH": RAIZ}
+    opcoes = ["-X", "importtime"] if importtime else []
+    inicio = time.time()
+    saida = subprocess.run([sys.executable, *opcoes, "-c", CODIGO], cwd=pasta, env=ambiente, capture_output=True, text=True, check=True)
+    marcas = dict(linha.split() for linha in saida.stdout.splitlines() if linha.startswith(("menu", "pronto")))
+    return (float(marcas["menu"]) - inicio) * 1000, (float(marcas["pronto"]) - inicio) * 1000, saida.stderr
+
+
+def mais_caros(stderr, quantos=12):
+    # Linhas "import time: próprio | acumulado | módulo" antes do menu aparecer.
+    antes = stderr.split("-- menu --")[0]
+    linhas = [linha.split("|") for linha in antes.splitlines() if linha.startswith("import time:") and "cumulative" not in linha]
+    return sorted(((int(acumulado), modulo.rstrip()) for _, acumulado, modulo in linhas), reverse=True)[:quantos]
+
+
+def main():
+    argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith("--")]
+    execucoes = int(argumentos[0]) if argumentos else 10
+    with tempfile.TemporaryDirectory() as pasta:
+        novos = []
+        for i in range(execucoes):
+            pasta_nova = os.path.join(pasta, f"novo{i}")
+            os.mkdir(pasta_nova)
+            novos.append(partir(pasta_nova)[:2])
+        existentes = [partir(os.path.join(pasta, "novo0"))[:2] for _ in range(execucoes)]
+        print(f"{execucoes} partidas de main.py (Qt offscreen), mediana e pior em ms\n")
+        for nome, tempos in (("banco novo", novos), ("banco existente", existentes)):
+            menu, pronto = [t[0] for t in tempos], [t[1] for t in tempos]
+            print(f"  {nome:16} menu na tela {statistics.median(menu):6.0f} (pior {max(menu):6.0f})"
+                  f"   pronto {statistics.median(pronto):6.0f} (pior {max(pronto):6.0f})")
+        if "--importtime" in sys.argv:
+            print("\n  importações antes do menu (acumulado, ms):")
+            for acumulado, modulo in mais_caros(partir(os.path.join(pasta, "novo0"), importtime=True)[2]):
+                print(f"    {acumulado / 1000:7.1f}  {modulo}")
+
+    menu = statistics.median(t[0] for t in existentes)
+    pronto = statistics.median(t[1] for t in existentes)
+    estouros = [f"{nome} {valor:.0f} ms > {limite} ms" for nome, valor, limite in
+                (("menu", menu, ORCAMENTO_MENU_MS), ("pronto", pronto, ORCAMENTO_PRONTO_MS)) if valor > limite]
+    print("\n" + ("ACIMA DO ORÇAMENTO: " + "; ".join(estouros) if estouros else
+                  f"dentro do orçamento (menu {ORCAMENTO_MENU_MS} ms, pronto {ORCAMENTO_PRONTO_MS} ms)"))
+    sys.exit(1 if estouros else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# Relatórios gerenciais lidos das tabelas de resumo contra os mesmos relatórios
+# calculados do histórico, com um milhão de consultas. Também mede quanto os
+# triggers de resumo custam na inserção de consultas e confere que resumos e
+# histórico dão o mesmo resultado.
+#
+#   python -m benchmarks.bench_relatorios [consultas]
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from clinica import banco, relatorios
+from clinica.modelos import Dono, PessoaFisica, Animal, Especie, Veterinario, Consulta
+
+
+DONOS = 20000
+ANIMAIS_POR_DONO = 2
+VETERINARIOS = 40
+ESPECIES = 12
+MESES = 60
+LOTE = 10000
+REPETICOES = 10
+INICIO = date(2021, 1, 1)
+
+
+def popular_cadastros(engine, sorteio):
+    animais = DONOS * ANIMAIS_POR_DONO
+    with engine.begin() as conexao:
+        conexao.execute(Especie.__table__.insert(), [{"id": i, "nome": f"Espécie {i}", "descricao": "", "subespecie": ""} for i in range(1, ESPECIES + 1)])
+        conexao.execute(Veterinario.__table__.insert(), [{"id": i, "nome": f"Vet {i}", "especializacao": "", "numero_reg_prof": i} for i in range(1, VETERINARIOS + 1)])
+        conexao.execute(Dono.__table__.insert(), [{"id": i, "nome": f"Dono {i}", "endereco_cep": "00000000", "tipo": "pessoa_fisica", "documento": f"{i:011d}"} for i in range(1, DONOS + 1)])
+        conexao.execute(PessoaFisica.__table__.insert(), [{"id": i, "cpf": f"{i:011d}"} for i in range(1, DONOS + 1)])
+        conexao.execute(Animal.__table__.insert(), [
+            {"id": i, "nome": f"Animal {i}", "tratamentos_realizados": "", "especie_id": sorteio.randint(1, ESPECIES),
+             "dono_id": (i - 1) % DONOS + 1, "data_cadastro": INICIO + timedelta(days=sorteio.randrange(MESES * 30))}
+            for i in range(1, animais + 1)
+        ])
+    return animais
+
+
+def inserir_consultas(engine, sorteio, quantidade, animais):
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        for comeco in range(0, quantidade, LOTE):
+            conexao.execute(Consulta.__table__.insert(), [
+                {"data_consulta": INICIO + timedelta(days=sorteio.randrange(MESES * 30)), "descricao": "",
+                 "animal_id": sorteio.randint(1, animais), "veterinario_id": sorteio.randint(1, VETERINARIOS)}
+                for _ in range(min(LOTE, quantidade - comeco))
+            ])
+    return time.perf_counter() - inicio
+
+
+def medir(funcao, **argumentos):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        with banco.unidade_de_trabalho() as session:
+            linhas = funcao(session, **argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return linhas, statistics.median(tempos)
+
+
+def main():
+    consultas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sorteio = random.Random(14)
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+        banco.inicializar_banco(engine)
+        animais = popular_cadastros(engine, sorteio)
+
+        amostra = min(50000, consultas)
+        com_triggers = inserir_consultas(engine, sorteio, amostra, animais)
+        with engine.begin() as conexao:
+            triggers = conexao.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'resumo_consulta_%'")).all()
+            for nome, _ in triggers:
+                conexao.execute(text(f"DROP TRIGGER {nome}"))
+        sem_triggers = inserir_consultas(engine, random.Random(14), amostra, animais)
+        with engine.begin() as conexao:
+            conexao.execute(text(f'DELETE FROM "Consulta" WHERE id > {amostra}'))
+            for _, sql in triggers:
+                conexao.execute(text(sql))
+        print(f"inserir {amostra} consultas: {amostra / com_triggers:.0f}/s com os triggers de resumo, {amostra / sem_triggers:.0f}/s sem")
+
+        inserir_consultas(engine, sorteio, consultas - amostra, animais)
+        with engine.connect() as conexao:
+            conexao.exec_driver_sql("ANALYZE")
+        print(f"{consultas} consultas, {animais} animais, {DONOS} donos\n")
+
+        for nome, funcao in relatorios.RELATORIOS.items():
+            for argumentos in ({}, {"desde": "2024-01", "ate": "2024-12"}):
+                resumo, tempo_resumo = medir(funcao, **argumentos)
+                historico, tempo_historico = medir(funcao, do_historico=True, **argumentos)
+                assert resumo == historico, nome
+                periodo = "2024" if argumentos else "tudo"
+                print(f"  {nome:13} {periodo:5} {len(resumo):6d} linhas   resumos {tempo_resumo:8.1f} ms   histórico {tempo_historico:8.1f} ms")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Remoção de grafos grandes: uma ONG com milhares de animais (cada um com
+# consultas, vacinas e veterinários) e um veterinário com milhares de consultas.
+# "antes" reproduz a remoção pelo ORM com as coleções carregadas, que era o que
+# o cascade="all, delete-orphan" fazia: tudo é lido para a sessão e removido (ou
+# desvinculado) linha a linha. "agora" usa as mesmas operações do repositório,
+# que deixam o trabalho para o ON DELETE do banco. Cada medição roda numa cópia
+# nova do banco.
+#
+#   python -m benchmarks.bench_remocao [animais_da_ong]
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from clinica import banco, repositorio
+from clinica.modelos import (Dono, ONG, Telefone, Animal, Especie, Veterinario, Consulta, Vacina, veterinario_Animais,
+                             colunas_de_telefone)
+
+
+CONSULTAS_POR_ANIMAL = 10
+VACINAS_POR_ANIMAL = 5
+VETERINARIOS = 20
+OUTROS_DONOS = 2000
+ANIMAIS_POR_OUTRO_DONO = 2
+LOTE = 20000
+ONG_ID = 1
+INICIO = date(2022, 1, 1)
+
+
+def _inserir(conexao, tabela, linhas):
+    for comeco in range(0, len(linhas), LOTE):
+        conexao.execute(tabela.insert(), linhas[comeco:comeco + LOTE])
+
+
+def popular(engine, animais_da_ong):
+    sorteio = random.Random(19)
+    donos = [(ONG_ID, animais_da_ong)] + [(ONG_ID + i, ANIMAIS_POR_OUTRO_DONO) for i in range(1, OUTROS_DONOS + 1)]
+    animais, consultas, vacinas, vinculos = [], [], [], []
+    for dono_id, quantidade in donos:
+        for _ in range(quantidade):
+            animal_id = len(animais) + 1
+            animais.append({"id": animal_id, "nome": f"Animal {animal_id}", "dono_id": dono_id, "especie_id": 1, "data_cadastro": INICIO})
+            vinculos.append({"animal_id": animal_id, "veterinario_id": sorteio.randint(1, VETERINARIOS)})
+            for _ in range(CONSULTAS_POR_ANIMAL):
+                consultas.append({"animal_id": animal_id, "veterinario_id": sorteio.randint(1, VETERINARIOS), "descricao": "retorno",
+                                  "data_consulta": INICIO + timedelta(days=sorteio.randrange(900))})
+            for _ in range(VACINAS_POR_ANIMAL):
+                vacinas.append({"animal_id": animal_id, "nome": "V10", "status": "aplicada", "data_aplicacao": INICIO + timedelta(days=sorteio.randrange(900))})
+    with engine.begin() as conexao:
+        conexao.execute(Especie.__table__.insert(), [{"id": 1, "nome": "Cão", "descricao": "", "subespecie": "SRD"}])
+        conexao.execute(Veterinario.__table__.insert(), [{"id": i, "nome": f"Vet {i}", "especializacao": "", "numero_reg_prof": i} for i in range(1, VETERINARIOS + 1)])
+        conexao.execute(Dono.__table__.insert(), [{"id": dono_id, "nome": f"Dono {dono_id}", "endereco_cep": "00000000",
+                                                   "tipo": "ong" if dono_id == ONG_ID else "dono", "documento": f"{dono_id:014d}"} for dono_id, _ in donos])
+        conexao.execute(ONG.__table__.insert(), [{"id": ONG_ID, "cnpj": f"{ONG_ID:014d}"}])
+        conexao.execute(Telefone.__table__.insert(), [{**colunas_de_telefone(f"1190000{i:04d}"), "dono_id": ONG_ID} for i in range(5)])
+        for tabela, linhas in ((Animal.__table__, animais), (veterinario_Animais, vinculos), (Consulta.__table__, consultas), (Vacina.__table__, vacinas)):
+            _inserir(conexao, tabela, linhas)
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+
+
+def ong_antes(session):
+    ong = session.get(ONG, ONG_ID, options=[selectinload(ONG.telefones), selectinload(ONG.animais)])
+    session.delete(ong)
+
+
+def ong_agora(session):
+    repositorio.remover(session, repositorio.buscar_ong(session, f"{ONG_ID:014d}"))
+
+
+def ong_e_animais_antes(session):
+    ong = session.get(ONG, ONG_ID, options=[
+        selectinload(ONG.telefones),
+        selectinload(ONG.animais).selectinload(Animal.consultas),
+        selectinload(ONG.animais).selectinload(Animal.vacinas),
+        selectinload(ONG.animais).selectinload(Animal.veterinarios),
+    ])
+    for animal in ong.animais:
+        session.delete(animal)
+    session.delete(ong)
+
+
+def ong_e_animais_agora(session):
+    repositorio.remover_donos(session, [ONG_ID], com_animais=True)
+
+
+def veterinario_antes(session):
+    veterinario = session.get(Veterinario, 1, options=[selectinload(Veterinario.consultas), selectinload(Veterinario.animais)])
+    session.delete(veterinario)
+
+
+def veterinario_agora(session):
+    repositorio.remover(session, repositorio.buscar_veterinario(session, 1))
+
+
+CENARIOS = [
+    ("ONG, animais ficam sem dono", ong_antes, ong_agora),
+    ("ONG e todos os seus animais", ong_e_animais_antes, ong_e_animais_agora),
+    ("veterinário e suas consultas", veterinario_antes, veterinario_agora),
+]
+
+
+def medir(modelo, pasta, funcao):
+    caminho = os.path.join(pasta, "medicao.db")
+    shutil.copyfile(modelo, caminho)
+    banco.configurar_banco(f"sqlite:///{caminho}")
+    with banco.contar_comandos() as comandos:
+        inicio = time.perf_counter()
+        with banco.unidade_de_trabalho() as session:
+            funcao(session)
+            session.flush()
+        segundos = time.perf_counter() - inicio
+    banco.engine.dispose()
+    os.remove(caminho)
+    return segundos, len(comandos)
+
+
+def main():
+    animais_da_ong = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as pasta:
+        modelo = os.path.join(pasta, "modelo.db")
+        engine = banco.configurar_banco(f"sqlite:///{modelo}")
+        banco.inicializar_banco(engine)
+        popular(engine, animais_da_ong)
+        engine.dispose()
+        print(f"ONG com {animais_da_ong} animais, {animais_da_ong * CONSULTAS_POR_ANIMAL} consultas e "
+              f"{animais_da_ong * VACINAS_POR_ANIMAL} vacinas; {OUTROS_DONOS} outros donos\n")
+        for nome, antes, agora in CENARIOS:
+            segundos_antes, comandos_antes = medir(modelo, pasta, antes)
+            segundos_agora, comandos_agora = medir(modelo, pasta, agora)
+            print(f"  {nome:30} antes {segundos_antes * 1000:9.1f} ms ({comandos_antes:6d} comandos)   "
+                  f"agora {segundos_agora * 1000:8.1f} ms ({comandos_agora:3d} comandos)   {segundos_antes / segundos_agora:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
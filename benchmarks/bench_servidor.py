@@ -0,0 +1,172 @@
+# Muitas estações ao mesmo tempo, de dois jeitos: "direto", cada estação abre o
+# arquivo do banco (um processo por estação, como main.py sem --servidor), e
+# "servidor", todas falam com um único clinica.servidor por HTTP (clientes
+# simulados em threads de alguns processos). O trabalho é o do balcão: abrir a
+# tela do animal (ficha e primeira página da linha do tempo) ou registrar uma
+# consulta e mudar o tratamento. Mostra vazão, p50/p99 de leituras e escritas e
+# quantas operações falharam (banco travado, servidor ocupado ou registro
+# alterado por outro cliente entre a leitura e a gravação).
+#
+#   python -m benchmarks.bench_servidor [clientes] [segundos] [leitores]
+
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import make_url
+from sqlalchemy.orm.exc import StaleDataError
+
+from clinica import arquivo, banco, repositorio, servidor
+from clinica.cliente import ClienteRemoto, ErroDoServidor
+from benchmarks.bench_concorrencia import FRACAO_ESCRITAS, percentil, popular
+
+
+PORTA = 8791
+CLIENTES_POR_PROCESSO = 4
+PERFIL = "wal"  # as estações e o servidor no mesmo disco local
+
+
+def tela_do_animal(repo, session, animal_id):
+    repo.ficha_animal(session, animal_id)
+    repo.pagina_linha_do_tempo(session, animal_id)
+
+
+def registrar_consulta(repo, session, animal_id, descricao):
+    animal = repo.buscar_animal(session, animal_id)
+    veterinario = repo.buscar_veterinario_por_id(session, 1)
+    repo.criar_consulta(session, data_consulta=date.today(), animal=animal, veterinario=veterinario, descricao=descricao)
+
+
+def alterar_tratamento(repo, session, animal_id, descricao):
+    animal = repo.buscar_animal(session, animal_id)
+    animal.tratamentos_realizados = descricao
+    repo.gravar(session, animal)
+
+
+def _trabalhar(executar, animais, segundos, semente, largada, resultados):
+    # executar(funcao, *args): uma operação como a tela faria (transação local ou pedido HTTP).
+    sorteio = random.Random(semente)
+    leituras, escritas, falhas = [], [], 0
+    largada.wait()
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        animal_id = sorteio.randint(1, animais)
+        escrita = sorteio.random() < FRACAO_ESCRITAS
+        inicio = time.perf_counter()
+        try:
+            if escrita:
+                executar(registrar_consulta, animal_id, f"Retorno {semente}")
+                executar(alterar_tratamento, animal_id, f"Tratamento {semente}")
+            else:
+                executar(tela_do_animal, animal_id)
+        except (ErroDoServidor, StaleDataError):
+            falhas += 1
+            continue
+        except Exception as erro:
+            if not banco.banco_travado(erro):
+                raise
+            falhas += 1
+            continue
+        (escritas if escrita else leituras).append((time.perf_counter() - inicio) * 1000)
+    resultados.append((leituras, escritas, falhas))
+
+
+def estacao_direta(url, animais, segundos, semente, largada, fila):
+    banco.configurar_banco(url, PERFIL)
+    resultados = []
+    _trabalhar(lambda funcao, *args: banco.em_transacao(lambda session: funcao(repositorio, session, *args)),
+               animais, segundos, semente, largada, resultados)
+    banco.engine.dispose()
+    fila.put(resultados[0])
+
+
+def estacoes_remotas(url_servidor, clientes, animais, segundos, semente, largada, fila):
+    # Um ClienteRemoto por processo, com uma conexão por thread (como as tarefas da interface).
+    cliente = ClienteRemoto(url_servidor)
+    resultados = []
+    threads = [threading.Thread(target=_trabalhar, args=(lambda funcao, *args: funcao(cliente, None, *args), animais, segundos,
+                                                         semente * 100 + i, largada, resultados)) for i in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    leituras, escritas, falhas = [], [], 0
+    for suas_leituras, suas_escritas, suas_falhas in resultados:
+        leituras += suas_leituras
+        escritas += suas_escritas
+        falhas += suas_falhas
+    fila.put((leituras, escritas, falhas))
+
+
+def rodar_servidor(url, leitores, pronto):
+    instancia = servidor.configurar(url, leitores, PERFIL)
+    asyncio.run(instancia.servir("127.0.0.1", PORTA, lambda _: pronto.set()))
+
+
+def copiar(modelo, pasta, nome):
+    # O banco vai junto com o seu arquivo (clinica_arquivo.db), anexado a toda conexão.
+    url = f"sqlite:///{os.path.join(pasta, nome)}"
+    shutil.copy(modelo, os.path.join(pasta, nome))
+    shutil.copy(arquivo.caminho_do_arquivo(make_url(f"sqlite:///{modelo}")), arquivo.caminho_do_arquivo(make_url(url)))
+    return url
+
+
+def medir(nome, contexto, processos, segundos):
+    # processos: lista de (alvo, argumentos sem largada/fila)
+    largada, fila = contexto.Event(), contexto.Queue()
+    iniciados = [contexto.Process(target=alvo, args=(*argumentos, largada, fila)) for alvo, argumentos in processos]
+    for processo in iniciados:
+        processo.start()
+    time.sleep(2)  # deixa os processos importarem e abrirem o banco
+    largada.set()
+    leituras, escritas, falhas = [], [], 0
+    for _ in iniciados:
+        suas_leituras, suas_escritas, suas_falhas = fila.get(timeout=segundos + 60)  # um processo que caiu não trava a medição
+        leituras += suas_leituras
+        escritas += suas_escritas
+        falhas += suas_falhas
+    for processo in iniciados:
+        processo.join()
+    print(f"{nome:9} {(len(leituras) + len(escritas)) / segundos:8.0f} op/s"
+          f"   leitura p50 {percentil(leituras, 0.5):6.1f} p99 {percentil(leituras, 0.99):7.1f} ms"
+          f"   escrita p50 {percentil(escritas, 0.5):6.1f} p99 {percentil(escritas, 0.99):7.1f} ms"
+          f"   falhas {falhas}")
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    leitores = int(sys.argv[3]) if len(sys.argv) > 3 else servidor.LEITORES
+    contexto = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as pasta:
+        modelo = os.path.join(pasta, "modelo.db")
+        engine = banco.configurar_banco(f"sqlite:///{modelo}")
+        banco.inicializar_banco(engine)
+        animais = popular(engine)
+        engine.dispose()
+        print(f"{clientes} clientes, {segundos:.0f} s cada modo, {FRACAO_ESCRITAS:.0%} escritas; servidor com {leitores} leitores\n")
+
+        url = copiar(modelo, pasta, "direto.db")
+        medir("direto", contexto, [(estacao_direta, (url, animais, segundos, i)) for i in range(clientes)], segundos)
+
+        url = copiar(modelo, pasta, "servidor.db")
+        pronto = contexto.Event()
+        processo_servidor = contexto.Process(target=rodar_servidor, args=(url, leitores, pronto), daemon=True)
+        processo_servidor.start()
+        pronto.wait()
+        grupos = [min(CLIENTES_POR_PROCESSO, clientes - inicio) for inicio in range(0, clientes, CLIENTES_POR_PROCESSO)]
+        medir("servidor", contexto, [(estacoes_remotas, (f"http://127.0.0.1:{PORTA}", grupo, animais, segundos, i + 1))
+                                     for i, grupo in enumerate(grupos)], segundos)
+        processo_servidor.terminate()
+        processo_servidor.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Compara a sessão global antiga com uma unidade de trabalho por operação
+# numa jornada sintética longa de balcão (busca dono, lê animal, registra consulta).
+#
+#   python -m benchmarks.bench_sessoes [operacoes]
+
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from clinica import banco, repositorio
+
+
+DONOS = 2000
+ANIMAIS_POR_DONO = 2
+
+
+def popular(session):
+    especie = repositorio.criar_especie(session, nome="Cão", descricao="", subespecie="Canis lupus familiaris")
+    veterinario = repositorio.criar_veterinario(session, nome="Vet", especializacao="Clínica", numero_reg_prof=1)
+    for i in range(DONOS):
+        dono = repositorio.criar_pessoa_fisica(session, nome=f"Dono {i}", cpf=f"{i:011d}", endereco_cep="00000000", telefones=[f"1190000{i:04d}"])
+        for j in range(ANIMAIS_POR_DONO):
+            animal = repositorio.criar_animal(session, nome=f"Animal {i}-{j}", data_nasc=None, tratamentos_realizados="", especie=especie, dono=dono)
+            repositorio.criar_consulta(session, data_consulta=date(2024, 1, 1), animal=animal, veterinario=veterinario, descricao="Rotina")
+            repositorio.criar_vacina(session, nome="V10", status="Aplicada", data_aplicacao=date(2024, 1, 1), prox_aplicacao=None, animal=animal)
+    session.commit()
+
+
+def operacao(session, sorteio):
+    dono = repositorio.buscar_pessoa_fisica(session, f"{sorteio.randrange(DONOS):011d}")
+    animal = repositorio.listar_animais_do_dono(session, dono.id)[0]
+    len(animal.consultas), len(animal.vacinas), [t.numero for t in dono.telefones]
+    veterinario = repositorio.buscar_veterinario(session, 1)
+    repositorio.criar_consulta(session, data_consulta=date.today(), animal=animal, veterinario=veterinario, descricao="Retorno")
+    session.commit()
+
+
+def medir(modo, operacoes):
+    sorteio = random.Random(42)
+    latencias = []
+    gc.collect()
+    tracemalloc.start()
+    if modo == "global":
+        session = banco.Session()
+        for _ in range(operacoes):
+            inicio = time.perf_counter()
+            operacao(session, sorteio)
+            latencias.append(time.perf_counter() - inicio)
+    else:
+        for _ in range(operacoes):
+            inicio = time.perf_counter()
+            with banco.unidade_de_trabalho() as session:
+                operacao(session, sorteio)
+            latencias.append(time.perf_counter() - inicio)
+    gc.collect()
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencias.sort()
+    return {
+        "modo": modo,
+        "memoria_retida_kib": atual / 1024,
+        "pico_kib": pico / 1024,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p99_ms": latencias[int(len(latencias) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as pasta:
+        banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+        banco.inicializar_banco()
+        with banco.unidade_de_trabalho() as session:
+            popular(session)
+        for modo in ("global", "unidade_de_trabalho"):
+            r = medir(modo, operacoes)
+            print(f"{r['modo']:>20}: memória retida {r['memoria_retida_kib']:9.0f} KiB | pico {r['pico_kib']:9.0f} KiB | p50 {r['p50_ms']:.2f} ms | p99 {r['p99_ms']:.2f} ms")
+        banco.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Busca de dono pelo telefone com um milhão de telefones: número completo,
+# número sem DDD e só os últimos dígitos, pelo índice dos dígitos invertidos,
+# contra o LIKE '%...' sobre o texto digitado que seria a alternativa sem ele.
+#
+#   python -m benchmarks.bench_telefones [telefones]
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from clinica import banco, repositorio
+from clinica.modelos import Dono, PessoaFisica, Telefone, colunas_de_telefone
+
+
+LOTE = 50000
+REPETICOES = 200
+TELEFONES_POR_DONO = 2
+
+
+def _numero(sorteio):
+    ddd = sorteio.choice(["11", "19", "13", "21", "31"])
+    numero = f"9{sorteio.randint(0, 99999999):08d}"
+    if sorteio.random() < 0.5:
+        return f"({ddd}) {numero[:5]}-{numero[5:]}"
+    return f"+55 {ddd} {numero}"
+
+
+def popular(engine, sorteio, telefones):
+    donos = telefones // TELEFONES_POR_DONO
+    numeros = []
+    with engine.begin() as conexao:
+        for comeco in range(1, donos + 1, LOTE):
+            ids = range(comeco, min(comeco + LOTE, donos + 1))
+            conexao.execute(Dono.__table__.insert(), [{"id": i, "nome": f"Dono {i}", "endereco_cep": "00000000", "tipo": "pessoa_fisica", "documento": f"{i:011d}"} for i in ids])
+            conexao.execute(PessoaFisica.__table__.insert(), [{"id": i, "cpf": f"{i:011d}"} for i in ids])
+            linhas = [{**colunas_de_telefone(_numero(sorteio)), "dono_id": i} for i in ids for _ in range(TELEFONES_POR_DONO)]
+            conexao.execute(Telefone.__table__.insert(), linhas)
+            numeros.extend(linha["numero"] for linha in linhas[::97])
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+    return numeros
+
+
+def medir(funcao, consultas):
+    tempos = []
+    with banco.unidade_de_trabalho() as session:
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            resultado = funcao(session, consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            session.expunge_all()
+    return resultado, statistics.median(tempos), max(tempos)
+
+
+def sem_indice(session, digitos):
+    # O que daria para fazer só com a coluna como digitada (e sem formatação).
+    return session.execute(text("SELECT DISTINCT dono_id FROM Telefone WHERE replace(replace(replace(replace(replace(numero, ' ', ''), '-', ''), '(', ''), ')', ''), '+', '') LIKE :padrao LIMIT 20"),
+                           {"padrao": f"%{digitos}"}).all()
+
+
+def main():
+    telefones = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sorteio = random.Random(17)
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+        banco.inicializar_banco(engine)
+        numeros = popular(engine, sorteio, telefones)
+        amostra = sorteio.sample(numeros, REPETICOES)
+        digitos = [repositorio.normalizar_telefone(numero) for numero in amostra]
+        print(f"{telefones} telefones, {telefones // TELEFONES_POR_DONO} donos\n")
+
+        with engine.connect() as conexao:
+            plano = conexao.execute(text("EXPLAIN QUERY PLAN SELECT DISTINCT dono_id FROM Telefone WHERE digitos_invertidos >= '1234' AND digitos_invertidos < '1235' LIMIT 20")).all()
+        print("plano:", "; ".join(linha[-1] for linha in plano))
+
+        casos = [
+            ("como digitado", amostra),
+            ("só dígitos", digitos),
+            ("sem DDD", [numero[2:] for numero in digitos]),
+            ("últimos 4", [numero[-4:] for numero in digitos]),
+        ]
+        for nome, consultas in casos:
+            donos, mediana, maximo = medir(repositorio.buscar_donos_por_telefone, consultas)
+            print(f"  {nome:14} índice   mediana {mediana:7.3f} ms   máx {maximo:7.3f} ms   ({len(donos)} dono(s) na última)")
+        _, mediana, maximo = medir(sem_indice, [numero[2:] for numero in digitos[:5]])
+        print(f"  {'sem DDD':14} LIKE     mediana {mediana:7.1f} ms   máx {maximo:7.1f} ms")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Mede vacinas_pendentes() numa tabela Vacinas com milhões de linhas: cada
+# animal recebe doses anuais de algumas vacinas e só a última dose de cada uma
+# fica pendente. Roda cada janela com o índice (prox_aplicacao, status) e
+# depois sem ele, para comparação.
+#
+#   python -m benchmarks.bench_vacinas_pendentes [vacinas]
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from clinica import banco
+from clinica.modelos import Dono, PessoaFisica, Telefone, Animal, Especie, Vacina
+from clinica.vacinas_pendentes import vacinas_pendentes
+
+
+VACINAS_POR_NOME = 5
+NOMES_POR_ANIMAL = 4
+ANIMAIS_POR_DONO = 2
+NOMES = ["V8", "V10", "Raiva", "Gripe", "Giárdia", "Leishmaniose", "V4 Felina", "V5 Felina"]
+LOTE = 10000
+REPETICOES = 10
+HOJE = date(2026, 1, 15)
+
+JANELAS = {
+    "vencidas (30 dias)": dict(desde=HOJE - timedelta(days=30), ate=HOJE),
+    "a vencer (7 dias)": dict(desde=HOJE, ate=HOJE + timedelta(days=7)),
+    "padrão (-30/+30 dias)": dict(),
+    "padrão, status Pendente": dict(status="Pendente"),
+}
+
+
+def popular(engine, vacinas):
+    sorteio = random.Random(11)
+    animais = max(1, vacinas // (VACINAS_POR_NOME * NOMES_POR_ANIMAL))
+    donos = max(1, animais // ANIMAIS_POR_DONO)
+    with engine.begin() as conexao:
+        conexao.execute(Especie.__table__.insert(), [{"id": 1, "nome": "Cão", "descricao": "", "subespecie": ""}])
+        for inicio in range(0, donos, LOTE):
+            ids = range(inicio + 1, min(donos, inicio + LOTE) + 1)
+            conexao.execute(Dono.__table__.insert(), [{"id": i, "nome": f"Dono {i}", "endereco_cep": "00000000", "tipo": "pessoa_fisica", "documento": f"{i:011d}"} for i in ids])
+            conexao.execute(PessoaFisica.__table__.insert(), [{"id": i, "cpf": f"{i:011d}"} for i in ids])
+            conexao.execute(Telefone.__table__.insert(), [{"numero": f"1190{i:07d}", "dono_id": i} for i in ids])
+        for inicio in range(0, animais, LOTE):
+            ids = range(inicio + 1, min(animais, inicio + LOTE) + 1)
+            conexao.execute(Animal.__table__.insert(), [
+                {"id": i, "nome": f"Animal {i}", "tratamentos_realizados": "", "especie_id": 1, "dono_id": (i - 1) % donos + 1} for i in ids
+            ])
+            linhas = []
+            for animal_id in ids:
+                for nome in sorteio.sample(NOMES, NOMES_POR_ANIMAL):
+                    ultima = HOJE - timedelta(days=sorteio.randrange(400))
+                    status = "Pendente" if sorteio.random() < 0.05 else "Aplicada"
+                    for dose in range(VACINAS_POR_NOME):
+                        aplicacao = ultima - timedelta(days=365 * dose)
+                        linhas.append({"nome": nome, "status": status, "data_aplicacao": aplicacao,
+                                       "prox_aplicacao": aplicacao + timedelta(days=365), "animal_id": animal_id})
+            conexao.execute(Vacina.__table__.insert(), linhas)
+    return donos, animais
+
+
+def medir(filtros):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        with banco.unidade_de_trabalho() as session:
+            grupos = vacinas_pendentes(session, hoje=HOJE, **filtros)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    vacinas = sum(len(grupo["vacinas"]) for grupo in grupos)
+    return len(grupos), vacinas, statistics.median(tempos), tempos[-1]
+
+
+def rodar(titulo):
+    print(titulo)
+    for nome, filtros in JANELAS.items():
+        donos, vacinas, mediana, pior = medir(filtros)
+        print(f"  {nome:26} {vacinas:7d} vacinas de {donos:6d} donos   mediana {mediana:8.1f} ms   pior {pior:8.1f} ms")
+
+
+def main():
+    vacinas = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+        banco.inicializar_banco(engine)
+        inicio = time.perf_counter()
+        donos, animais = popular(engine, vacinas)
+        with engine.connect() as conexao:
+            total = conexao.execute(text('SELECT count(*) FROM "Vacinas"')).scalar()
+            conexao.exec_driver_sql("ANALYZE")
+        print(f"{total} vacinas, {animais} animais, {donos} donos (populado em {time.perf_counter() - inicio:.0f} s)\n")
+
+        rodar("com índice (prox_aplicacao, status):")
+        with engine.begin() as conexao:
+            conexao.exec_driver_sql("DROP INDEX ix_Vacinas_prox_aplicacao_status")
+        rodar("sem índice:")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
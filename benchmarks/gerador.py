@@ -0,0 +1,257 @@
+# Gerador determinístico de dados sintéticos: a mesma semente e a mesma escala
+# produzem o mesmo banco, linha por linha. CPFs e CNPJs têm dígitos
+# verificadores válidos e as distribuições imitam uma clínica real: ONGs com
+# dezenas de animais, poucos animais com muitas consultas, veterinários com
+# cargas desiguais, cães e gatos dominando as espécies. As linhas são gravadas
+# com inserts do Core em lotes, então os triggers (registro de alterações,
+# resumos, índice textual) são exercitados como numa importação.
+#
+#   python -m benchmarks.gerador destino.db [--donos N] [--animais N] [--consultas N] [--vacinas N] [--semente N]
+
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from clinica import banco
+from clinica.modelos import Dono, PessoaFisica, ONG, Telefone, Animal, Especie, Veterinario, Consulta, Vacina, veterinario_Animais, colunas_de_telefone, normalizar_documento
+
+
+LOTE = 10000
+HOJE = date(2026, 1, 1)
+ANOS_DE_HISTORICO = 8
+FRACAO_ONGS = 0.03
+VETERINARIOS_POR_MIL_ANIMAIS = 0.5
+
+PRENOMES = ["Ana", "Maria", "João", "José", "Pedro", "Paulo", "Lucas", "Gabriel", "Juliana", "Fernanda", "Mariana", "Carlos",
+            "Rafael", "Beatriz", "Camila", "Bruno", "Letícia", "Felipe", "Larissa", "Rodrigo", "Patrícia", "Marcos", "Aline",
+            "Gustavo", "Vanessa", "Thiago", "Renata", "André", "Luana", "Eduardo", "Sandra", "Ricardo", "Cláudia", "Diego"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes", "Costa",
+              "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa", "Rocha",
+              "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas", "Cardoso"]
+ONGS = ["Patinhas", "Amigos dos Animais", "Focinho Feliz", "Lar Temporário", "Quatro Patas", "Adote um Amigo", "Bicho Solto",
+        "Protetores", "Vida Animal", "Resgate", "Miados e Latidos", "Cão Sem Dono"]
+CIDADES = [("São Paulo", 30), ("Campinas", 8), ("Guarulhos", 6), ("Santo André", 5), ("Osasco", 5), ("Sorocaba", 4),
+           ("Santos", 4), ("Jundiaí", 3), ("Piracicaba", 2), ("Bauru", 2)]
+RUAS = ["Rua das Flores", "Avenida Brasil", "Rua São João", "Rua XV de Novembro", "Avenida Paulista", "Rua Sete de Setembro",
+        "Rua da Consolação", "Rua Augusta", "Avenida Ipiranga", "Rua Tiradentes", "Rua Santos Dumont", "Rua Dom Pedro II"]
+ESPECIES = [
+    # nome, subespécie, peso, vacinas
+    ("Cão", "Canis lupus familiaris", 55, ["V8", "V10", "Raiva", "Gripe Canina", "Giárdia", "Leishmaniose"]),
+    ("Gato", "Felis catus", 35, ["V3 Felina", "V4 Felina", "V5 Felina", "Raiva"]),
+    ("Coelho", "Oryctolagus cuniculus", 3, ["Mixomatose"]),
+    ("Calopsita", "Nymphicus hollandicus", 2, []),
+    ("Papagaio", "Amazona aestiva", 1, []),
+    ("Hamster", "Mesocricetus auratus", 2, []),
+    ("Porquinho-da-índia", "Cavia porcellus", 1, []),
+    ("Furão", "Mustela putorius furo", 1, ["Cinomose", "Raiva"]),
+]
+NOMES_ANIMAIS = ["Thor", "Luna", "Mel", "Bob", "Nina", "Fred", "Pipoca", "Amora", "Max", "Bela", "Tobias", "Lola", "Simba",
+                 "Mia", "Bidu", "Pretinha", "Frida", "Zeca", "Pandora", "Chico", "Cacau", "Jade", "Paçoca", "Toddy",
+                 "Branquinha", "Rex", "Kiara", "Billy", "Maya", "Duque", "Princesa", "Tom", "Nala", "Marley", "Belinha"]
+ESPECIALIZACOES = ["Clínica Geral", "Dermatologia", "Cardiologia", "Ortopedia", "Oftalmologia", "Oncologia", "Animais Silvestres", "Cirurgia"]
+MOTIVOS = ["Consulta de rotina", "Vômito e diarreia", "Coceira e queda de pelo", "Retorno pós-cirúrgico", "Claudicação no membro posterior",
+           "Check-up anual", "Otite", "Perda de apetite", "Avaliação odontológica", "Castração", "Ferida na pata", "Tosse persistente"]
+
+
+def cpf(sorteio):
+    digitos = [sorteio.randint(0, 9) for _ in range(9)]
+    for tamanho in (9, 10):
+        soma = sum(digito * (tamanho + 1 - i) for i, digito in enumerate(digitos))
+        digitos.append(soma * 10 % 11 % 10)
+    return "".join(map(str, digitos))
+
+
+def cnpj(sorteio):
+    digitos = [sorteio.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(digito * peso for digito, peso in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return "".join(map(str, digitos))
+
+
+def _unico(gerar, sorteio, usados):
+    while True:
+        valor = gerar(sorteio)
+        if valor not in usados:
+            usados.add(valor)
+            return valor
+
+
+def _telefone(sorteio):
+    ddd = sorteio.choice(["11", "11", "11", "19", "13", "15", "12"])
+    numero = f"9{sorteio.randint(0, 99999999):08d}"
+    formato = sorteio.random()
+    if formato < 0.5:
+        return f"({ddd}) {numero[:5]}-{numero[5:]}"
+    if formato < 0.8:
+        return ddd + numero
+    return f"{ddd} {numero[:5]} {numero[5:]}"
+
+
+def _dia(sorteio, inicio, fim):
+    return inicio + timedelta(days=sorteio.randrange(max(1, (fim - inicio).days)))
+
+
+def _em_lotes(linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _inserir(conexao, tabela, linhas):
+    total = 0
+    for lote in _em_lotes(linhas):
+        conexao.execute(tabela.insert(), lote)
+        total += len(lote)
+    return total
+
+
+def _sorteio_ponderado(sorteio, pesos, quantidade):
+    # Índices sorteados pelos pesos, em lotes (random.choices com pesos acumulados).
+    acumulados = list(itertools.accumulate(pesos))
+    indices = range(len(pesos))
+    while quantidade > 0:
+        lote = min(LOTE, quantidade)
+        yield from sorteio.choices(indices, cum_weights=acumulados, k=lote)
+        quantidade -= lote
+
+
+def gerar(engine, donos=100_000, animais=300_000, consultas=3_000_000, vacinas=3_000_000, semente=1, hoje=HOJE):
+    sorteio = random.Random(semente)
+    inicio_historico = hoje - timedelta(days=365 * ANOS_DE_HISTORICO)
+    veterinarios = max(3, round(animais * VETERINARIOS_POR_MIL_ANIMAIS / 1000))
+    quantidades = {}
+
+    with engine.begin() as conexao:
+        quantidades["especies"] = _inserir(conexao, Especie.__table__, (
+            {"id": i, "nome": nome, "descricao": "", "subespecie": subespecie}
+            for i, (nome, subespecie, _, _) in enumerate(ESPECIES, 1)
+        ))
+
+        quantidades["veterinarios"] = _inserir(conexao, Veterinario.__table__, (
+            {"id": i, "nome": f"Dr(a). {sorteio.choice(PRENOMES)} {sorteio.choice(SOBRENOMES)}",
+             "especializacao": sorteio.choice(ESPECIALIZACOES), "numero_reg_prof": 10000 + i}
+            for i in range(1, veterinarios + 1)
+        ))
+
+        # Donos: o tipo de cada um decide quantos animais ele tende a ter.
+        ong = [sorteio.random() < FRACAO_ONGS for _ in range(donos)]
+        documentos = set()
+        linhas_dono, pessoas, ongs, telefones = [], [], [], []
+        for i in range(1, donos + 1):
+            cidade = sorteio.choices(CIDADES, weights=[peso for _, peso in CIDADES])[0][0]
+            if ong[i - 1]:
+                nome = f"ONG {sorteio.choice(ONGS)} {sorteio.choice(SOBRENOMES)}"
+                documento = _unico(cnpj, sorteio, documentos)
+                ongs.append({"id": i, "cnpj": documento})
+            else:
+                nome = f"{sorteio.choice(PRENOMES)} {sorteio.choice(SOBRENOMES)} {sorteio.choice(SOBRENOMES)}"
+                documento = _unico(cpf, sorteio, documentos)
+                pessoas.append({"id": i, "cpf": documento})
+            linhas_dono.append({
+                "id": i, "nome": nome, "tipo": "ong" if ong[i - 1] else "pessoa_fisica", "documento": normalizar_documento(documento),
+                "endereco_cep": f"{sorteio.randint(1000000, 19999999):08d}",
+                "endereco_rua": f"{sorteio.choice(RUAS)}, {sorteio.randint(1, 3000)}",
+                "endereco_cidade": cidade,
+                "endereco_complemento": sorteio.choice(["", "", "", "Apto 12", "Casa 2", "Fundos", "Bloco B"]),
+            })
+            for _ in range(sorteio.choices([1, 2, 3], weights=[60, 30, 10])[0]):
+                telefones.append({**colunas_de_telefone(_telefone(sorteio)), "dono_id": i})
+        quantidades["donos"] = _inserir(conexao, Dono.__table__, linhas_dono)
+        _inserir(conexao, PessoaFisica.__table__, pessoas)
+        _inserir(conexao, ONG.__table__, ongs)
+        quantidades["telefones"] = _inserir(conexao, Telefone.__table__, telefones)
+        del linhas_dono, pessoas, ongs, telefones
+
+        # Animais: ONGs pesam 25x; a maioria das pessoas tem um ou dois.
+        pesos_dono = [25.0 if e_ong else sorteio.paretovariate(2.5) for e_ong in ong]
+        pesos_especie = [peso for _, _, peso, _ in ESPECIES]
+        nomes_usados = set()
+        especie_do_animal, cadastro_do_animal = [], []
+        linhas_animal, vinculos = [], []
+        for i, indice_dono in enumerate(_sorteio_ponderado(sorteio, pesos_dono, animais), 1):
+            dono_id = indice_dono + 1
+            nome = sorteio.choice(NOMES_ANIMAIS)
+            repeticao = 1
+            while (dono_id, nome if repeticao == 1 else f"{nome} {repeticao}") in nomes_usados:
+                repeticao += 1
+            if repeticao > 1:
+                nome = f"{nome} {repeticao}"
+            nomes_usados.add((dono_id, nome))
+            especie = sorteio.choices(range(len(ESPECIES)), weights=pesos_especie)[0]
+            nascimento = _dia(sorteio, hoje - timedelta(days=365 * 18), hoje)
+            cadastro = _dia(sorteio, max(nascimento, inicio_historico), hoje)
+            especie_do_animal.append(especie)
+            cadastro_do_animal.append(cadastro)
+            linhas_animal.append({
+                "id": i, "nome": nome, "dono_id": dono_id, "especie_id": especie + 1,
+                "data_nasc": nascimento if sorteio.random() < 0.8 else None, "data_cadastro": cadastro,
+                "tratamentos_realizados": sorteio.choice(["", "", "Vermifugação", "Castração", "Tratamento dermatológico"]),
+                "historico_consultas": "",
+            })
+            for veterinario_id in sorteio.sample(range(1, veterinarios + 1), k=min(veterinarios, sorteio.choice([1, 1, 2]))):
+                vinculos.append({"veterinario_id": veterinario_id, "animal_id": i})
+        quantidades["animais"] = _inserir(conexao, Animal.__table__, linhas_animal)
+        _inserir(conexao, veterinario_Animais, vinculos)
+        del linhas_animal, vinculos, nomes_usados
+
+        # Consultas: poucos animais concentram o histórico; veterinários com carga desigual.
+        pesos_animal = [sorteio.lognormvariate(0, 1) for _ in range(animais)]
+        pesos_veterinario = [1 / posicao for posicao in range(1, veterinarios + 1)]
+        sorteio_veterinarios = _sorteio_ponderado(sorteio, pesos_veterinario, consultas)
+        quantidades["consultas"] = _inserir(conexao, Consulta.__table__, (
+            {"data_consulta": _dia(sorteio, cadastro_do_animal[indice], hoje + timedelta(days=1)),
+             "descricao": f"{sorteio.choice(MOTIVOS)}. {sorteio.choice(['Sem alterações.', 'Prescrito medicamento.', 'Solicitados exames.', 'Retorno em 15 dias.'])}",
+             "animal_id": indice + 1, "veterinario_id": next(sorteio_veterinarios) + 1}
+            for indice in _sorteio_ponderado(sorteio, pesos_animal, consultas)
+        ))
+
+        # Vacinas: só espécies que têm vacina; próxima dose um ano depois.
+        pesos_vacina = [peso if ESPECIES[especie][3] else 0 for peso, especie in zip(pesos_animal, especie_do_animal)]
+
+        def vacina(indice):
+            aplicacao = _dia(sorteio, cadastro_do_animal[indice], hoje + timedelta(days=1))
+            return {"nome": sorteio.choice(ESPECIES[especie_do_animal[indice]][3]),
+                    "status": "Aplicada" if sorteio.random() < 0.92 else "Pendente",
+                    "data_aplicacao": aplicacao, "prox_aplicacao": aplicacao + timedelta(days=365),
+                    "animal_id": indice + 1}
+
+        quantidades["vacinas"] = _inserir(conexao, Vacina.__table__, (
+            vacina(indice) for indice in _sorteio_ponderado(sorteio, pesos_vacina, vacinas if any(pesos_vacina) else 0)
+        ))
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+    return quantidades
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco da clínica com dados sintéticos determinísticos.")
+    parser.add_argument("destino", help="arquivo .db novo")
+    parser.add_argument("--donos", type=int, default=100_000)
+    parser.add_argument("--animais", type=int, default=300_000)
+    parser.add_argument("--consultas", type=int, default=3_000_000)
+    parser.add_argument("--vacinas", type=int, default=3_000_000)
+    parser.add_argument("--semente", type=int, default=1)
+    args = parser.parse_args()
+    if os.path.exists(args.destino):
+        parser.error(f"{args.destino} já existe")
+
+    engine = banco.configurar_banco(f"sqlite:///{args.destino}")
+    banco.inicializar_banco(engine)
+    inicio = time.perf_counter()
+    quantidades = gerar(engine, args.donos, args.animais, args.consultas, args.vacinas, args.semente)
+    print(", ".join(f"{quantidade} {nome}" for nome, quantidade in quantidades.items()))
+    print(f"gerado em {time.perf_counter() - inicio:.0f} s")
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Confere quantos comandos SQL cada tela de leitura emite, com carregamento
+# preguiçoso proibido (CLINICA_LAZY_RAISE=1). Sai com erro se algum limite for
+# ultrapassado ou se alguma tela depender de lazy load.
+#
+#   python -m benchmarks.limites_de_comandos
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+os.environ["CLINICA_LAZY_RAISE"] = "1"
+
+from clinica import banco, repositorio  # noqa: E402
+
+
+CONSULTAS_POR_ANIMAL = 30
+
+
+def popular():
+    with banco.unidade_de_trabalho() as session:
+        especie = repositorio.criar_especie(session, nome="Cão", descricao="", subespecie="Canis lupus familiaris")
+        veterinario = repositorio.criar_veterinario(session, nome="Vet", especializacao="Clínica", numero_reg_prof=1)
+        dono = repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="12345678901", endereco_cep="00000000", telefones="111, 222, 333")
+        for i in range(3):
+            animal = repositorio.criar_animal(session, nome=f"Animal {i}", data_nasc=None, tratamentos_realizados="", especie=especie, dono=dono)
+            for _ in range(CONSULTAS_POR_ANIMAL):
+                repositorio.criar_consulta(session, data_consulta=date(2024, 1, 1), animal=animal, veterinario=veterinario, descricao="Rotina")
+                repositorio.criar_vacina(session, nome="V10", status="Aplicada", data_aplicacao=date(2024, 1, 1), prox_aplicacao=None, animal=animal)
+
+
+def tela_pessoa_fisica(session):
+    pessoa = repositorio.buscar_pessoa_fisica(session, "12345678901", com_telefones=True)
+    [t.numero for t in pessoa.telefones]
+
+
+def tela_animal(session):
+    dono = repositorio.buscar_pessoa_fisica(session, "12345678901")
+    animais = repositorio.listar_animais_do_dono(session, dono.id)
+    animal = repositorio.ficha_animal(session, animais[0].id)
+    animal.especie.nome, animal.dono.nome
+    [evento.data for evento in repositorio.pagina_linha_do_tempo(session, animal.id)]
+
+
+def tela_consultas(session):
+    dono = repositorio.buscar_pessoa_fisica(session, "12345678901")
+    animais = repositorio.listar_animais_do_dono(session, dono.id)
+    for consulta in repositorio.pagina_consultas_do_animal(session, animais[0].id):
+        consulta.veterinario.nome, consulta.veterinario.numero_reg_prof
+
+
+def tela_vacinas(session):
+    dono = repositorio.buscar_pessoa_fisica_por_nome_ou_cpf(session, "12345678901")
+    animal = repositorio.buscar_animal_do_dono(session, dono.id, "Animal 0")
+    [v.nome for v in repositorio.pagina_vacinas_do_animal(session, animal.id)]
+
+
+# tela -> número máximo de comandos, independente da quantidade de registros
+LIMITES = {
+    tela_pessoa_fisica: 2,
+    tela_animal: 4,
+    tela_consultas: 3,
+    tela_vacinas: 3,
+}
+
+
+def medir():
+    # [(tela, comandos emitidos, limite)], num banco novo; também usado por tests/test_limites_de_comandos.py
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        banco.configurar_banco(f"sqlite:///{os.path.join(pasta, 'limites.db')}")
+        banco.inicializar_banco()
+        popular()
+        for tela, limite in LIMITES.items():
+            with banco.unidade_de_trabalho() as session, banco.contar_comandos() as comandos:
+                tela(session)
+            resultados.append((tela, len(comandos), limite))
+        banco.engine.dispose()
+    return resultados
+
+
+def main():
+    falhas = 0
+    for tela, comandos, limite in medir():
+        situacao = "ok" if comandos <= limite else "ACIMA DO LIMITE"
+        falhas += comandos > limite
+        print(f"{tela.__name__:>20}: {comandos} comandos (limite {limite}) {situacao}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
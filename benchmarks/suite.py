@@ -0,0 +1,489 @@
+# Suíte de desempenho de todos os caminhos CRUD da interface, sem Qt. Cada
+# operação repete a sequência de chamadas ao repositório que o menu faz em
+# main.py, uma unidade de trabalho por chamada (como em_segundo_plano), sobre
+# um banco do gerador determinístico. Para cada operação registra p50/p95/p99
+# e máximo da latência, comandos SQL por execução e o pico de memória alocada.
+# O resultado vai para benchmarks/resultados/<data>-<commit>.json; --comparar
+# mostra a diferença para um resultado anterior e sai com erro se alguma
+# operação regrediu.
+#
+#   python -m benchmarks.suite [--banco gerado.db] [--donos N ...] [--execucoes N] [--comparar anterior.json]
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import sqlalchemy
+from sqlalchemy import exists, func, select
+
+from benchmarks import gerador
+from clinica import banco, repositorio
+from clinica.modelos import PessoaFisica, ONG, Animal, Especie, Veterinario
+
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+EXECUCOES = 200
+EXECUCOES_MEMORIA = 20
+AMOSTRA = 2000
+LIMITE_REGRESSAO = 1.25  # p50 25% mais lento...
+FOLGA_MS = 0.5  # ...e pelo menos meio milissegundo (ruído das operações rápidas)
+
+ESCALA_PADRAO = {"donos": 20_000, "animais": 60_000, "consultas": 600_000, "vacinas": 600_000}
+
+
+def passo(funcao, *args, **kwargs):
+    return banco.em_transacao(funcao, *args, **kwargs)
+
+
+def com_alvo(preparar):
+    # preparar(contexto) escolhe o registro fora da medição (o usuário já sabe qual quer).
+    def decorar(operacao):
+        operacao.preparar = preparar
+        return operacao
+    return decorar
+
+
+class Contexto:
+    # Registros existentes sorteados uma vez, para as operações escolherem alvos.
+    def __init__(self, sorteio):
+        self.sorteio = sorteio
+        self.sequencia = 0
+        with banco.unidade_de_trabalho() as session:
+            self.cpfs = self._amostra(session, PessoaFisica.cpf, PessoaFisica.id)
+            self.cnpjs = self._amostra(session, ONG.cnpj, ONG.id)
+            self.especies = session.scalars(select(Especie.nome)).all()
+            self.especie_ids = session.scalars(select(Especie.id)).all()
+            self.veterinarios = session.scalars(select(Veterinario.numero_reg_prof)).all()
+            self.veterinario_ids = session.scalars(select(Veterinario.id)).all()
+            self.maior_animal = session.scalar(select(func.max(Animal.id)))
+        self.criados = {}
+
+    def _amostra(self, session, coluna, chave):
+        maior = session.scalar(select(func.max(chave))) or 0
+        ids = self.sorteio.sample(range(1, maior + 1), k=min(maior, AMOSTRA * 3))
+        # só donos com animais: as telas de animal, consulta e vacina partem deles
+        com_animais = exists().where(Animal.dono_id == chave)
+        return session.scalars(select(coluna).where(chave.in_(ids), com_animais).order_by(chave)).all()[:AMOSTRA]
+
+    def unico(self):
+        self.sequencia += 1
+        return self.sequencia
+
+    def documento(self, tipo):
+        return self.sorteio.choice(self.cpfs if tipo == "pf" else self.cnpjs)
+
+    def animal_com(self, relacao):
+        # Dono sorteado que tenha um animal com consultas/vacinas; o menu precisa dos dois.
+        while True:
+            cpf = self.documento("pf")
+            dono = passo(repositorio.buscar_pessoa_fisica, cpf)
+            for animal in passo(repositorio.listar_animais_do_dono, dono.id):
+                registros = passo(relacao, animal.id)
+                if registros:
+                    return cpf, animal.nome, self.sorteio.choice(registros).id
+
+
+# Donos ----------------------------------------------------------------------
+def _criar_dono(contexto, criar, documento):
+    numero = contexto.unico()
+    dono = passo(criar, nome=f"Suite {numero}", endereco_cep="01001000", endereco_rua="Rua A, 1",
+                 endereco_cidade="São Paulo", endereco_complemento="", telefones=["(11) 91234-5678", "11912345678"],
+                 **{documento: f"9{numero:0{13 if documento == 'cnpj' else 10}d}"})
+    contexto.criados.setdefault(documento, []).append(getattr(dono, documento))
+
+
+def _atualizar_dono(contexto, buscar, documento):
+    dono = passo(buscar, documento, com_telefones=True)
+    dono.nome = dono.nome + " Jr"
+    dono.endereco_cidade = "Campinas"
+    passo(repositorio.definir_telefones, dono, ["(19) 99999-0000"])
+    passo(repositorio.gravar, dono)
+
+
+def _remover_dono(contexto, buscar, documento):
+    dono = passo(buscar, contexto.criados[documento].pop())
+    passo(repositorio.remover, dono)
+
+
+def create_pessoa_fisica(contexto):
+    _criar_dono(contexto, repositorio.criar_pessoa_fisica, "cpf")
+
+
+def read_pessoa_fisica(contexto):
+    pessoa = passo(repositorio.buscar_pessoa_fisica, contexto.documento("pf"), com_telefones=True)
+    [telefone.numero for telefone in pessoa.telefones]
+
+
+def update_pessoa_fisica(contexto):
+    _atualizar_dono(contexto, repositorio.buscar_pessoa_fisica, contexto.documento("pf"))
+
+
+def delete_pessoa_fisica(contexto):
+    _remover_dono(contexto, repositorio.buscar_pessoa_fisica, "cpf")
+
+
+def create_ong(contexto):
+    _criar_dono(contexto, repositorio.criar_ong, "cnpj")
+
+
+def read_ong(contexto):
+    ong = passo(repositorio.buscar_ong, contexto.documento("ong"), com_telefones=True)
+    [telefone.numero for telefone in ong.telefones]
+
+
+def update_ong(contexto):
+    _atualizar_dono(contexto, repositorio.buscar_ong, contexto.documento("ong"))
+
+
+def delete_ong(contexto):
+    _remover_dono(contexto, repositorio.buscar_ong, "cnpj")
+
+
+# Espécies e veterinários ----------------------------------------------------
+def create_especie(contexto):
+    nome = f"Espécie Suite {contexto.unico()}"
+    passo(repositorio.criar_especie, nome=nome, descricao="", subespecie="")
+    contexto.criados.setdefault("especie", []).append(nome)
+
+
+def read_especie(contexto):
+    passo(repositorio.pagina_especies)
+
+
+def update_especie(contexto):
+    especie = passo(repositorio.buscar_especie, contexto.sorteio.choice(contexto.especies))
+    especie.descricao = f"Revisada {contexto.unico()}"
+    passo(repositorio.gravar, especie)
+
+
+def delete_especie(contexto):
+    especie = passo(repositorio.buscar_especie, contexto.criados["especie"].pop())
+    passo(repositorio.remover, especie)
+
+
+def create_veterinario(contexto):
+    numero = 900_000 + contexto.unico()
+    passo(repositorio.criar_veterinario, nome=f"Vet Suite {numero}", especializacao="Clínica Geral", numero_reg_prof=numero)
+    contexto.criados.setdefault("veterinario", []).append(numero)
+
+
+def read_veterinario(contexto):
+    passo(repositorio.buscar_veterinario, contexto.sorteio.choice(contexto.veterinarios))
+
+
+def update_veterinario(contexto):
+    veterinario = passo(repositorio.buscar_veterinario, contexto.sorteio.choice(contexto.veterinarios))
+    veterinario.especializacao = f"Especialização {contexto.unico()}"
+    passo(repositorio.gravar, veterinario)
+
+
+def delete_veterinario(contexto):
+    veterinario = passo(repositorio.buscar_veterinario, contexto.criados["veterinario"].pop())
+    passo(repositorio.remover, veterinario)
+
+
+# Animais --------------------------------------------------------------------
+def _dono_com_animais(contexto):
+    # delete_animal pode esvaziar um dono sorteado
+    while True:
+        cpf = contexto.documento("pf")
+        if passo(repositorio.listar_animais_do_dono, passo(repositorio.buscar_pessoa_fisica, cpf).id):
+            return cpf
+
+
+def _animais_do_dono(cpf):
+    dono = passo(repositorio.buscar_dono_por_documento, cpf)
+    return passo(repositorio.listar_animais_do_dono, dono.id)
+
+
+def _dono_id(contexto):
+    # o seletor de dono da tela já resolveu o id enquanto o usuário digitava
+    return passo(repositorio.buscar_pessoa_fisica, contexto.documento("pf")).id
+
+
+@com_alvo(_dono_id)
+def create_animal(contexto, dono_id):
+    especie_id = contexto.sorteio.choice(contexto.especie_ids)
+
+    def criar(session):
+        return repositorio.criar_animal(session, nome=f"Suite {contexto.unico()}", data_nasc=date(2020, 1, 1), tratamentos_realizados="",
+                                        especie=repositorio.buscar_especie_por_id(session, especie_id),
+                                        dono=repositorio.buscar_dono(session, dono_id))
+    passo(criar)
+
+
+@com_alvo(_dono_com_animais)
+def read_animal(contexto, cpf):
+    animais = _animais_do_dono(cpf)
+    animal = passo(repositorio.ficha_animal, contexto.sorteio.choice(animais).id)
+    animal.especie.nome, animal.dono.nome
+    passo(repositorio.pagina_linha_do_tempo, animal.id)
+
+
+@com_alvo(_dono_com_animais)
+def update_animal(contexto, cpf):
+    animais = _animais_do_dono(cpf)
+    animal = passo(repositorio.buscar_animal, contexto.sorteio.choice(animais).id)
+    animal.tratamentos_realizados = f"Tratamento {contexto.unico()}"
+    passo(repositorio.gravar, animal)
+
+
+@com_alvo(_dono_com_animais)
+def delete_animal(contexto, cpf):
+    # Animal com histórico: a remoção leva junto consultas e vacinas.
+    animais = _animais_do_dono(cpf)
+    animal = passo(repositorio.buscar_animal, contexto.sorteio.choice(animais).id)
+    passo(repositorio.remover, animal)
+
+
+# Consultas ------------------------------------------------------------------
+def create_consulta(contexto):
+    animal_id = contexto.sorteio.randint(1, contexto.maior_animal)
+    veterinario_id = contexto.sorteio.choice(contexto.veterinario_ids)
+
+    def criar(session):
+        animal = repositorio.buscar_animal(session, animal_id)
+        if animal is None:  # removido por delete_animal
+            return None
+        return repositorio.criar_consulta(session, data_consulta=date(2026, 1, 2), animal=animal,
+                                          veterinario=repositorio.buscar_veterinario_por_id(session, veterinario_id),
+                                          descricao="Consulta da suíte de desempenho")
+    passo(criar)
+
+
+@com_alvo(_dono_com_animais)
+def read_consulta(contexto, cpf):
+    animais = _animais_do_dono(cpf)
+    for consulta in passo(repositorio.pagina_consultas_do_animal, contexto.sorteio.choice(animais).id):
+        consulta.veterinario.nome
+
+
+def _com_consultas(contexto):
+    return contexto.animal_com(repositorio.listar_consultas_do_animal)
+
+
+def _consulta_existente(alvo):
+    cpf, nome_animal, consulta_id = alvo
+    dono = passo(repositorio.buscar_pessoa_fisica, cpf)
+    passo(repositorio.listar_animais_do_dono, dono.id)
+    animal = passo(repositorio.buscar_animal_do_dono, dono.id, nome_animal)
+    passo(repositorio.listar_consultas_do_animal, animal.id)
+    return passo(repositorio.buscar_consulta, consulta_id)
+
+
+@com_alvo(_com_consultas)
+def update_consulta(contexto, alvo):
+    consulta = _consulta_existente(alvo)
+    consulta.descricao = f"Revisada {contexto.unico()}"
+    consulta.veterinario_id = contexto.sorteio.choice(contexto.veterinario_ids)
+    passo(repositorio.gravar, consulta)
+
+
+@com_alvo(_com_consultas)
+def delete_consulta(contexto, alvo):
+    passo(repositorio.remover, _consulta_existente(alvo))
+
+
+# Vacinas --------------------------------------------------------------------
+def _nome_de_animal(contexto):
+    animal = None
+    while animal is None:
+        animal = passo(repositorio.buscar_animal, contexto.sorteio.randint(1, contexto.maior_animal))
+    return animal.nome
+
+
+@com_alvo(_nome_de_animal)
+def create_vacina(contexto, nome_animal):
+    animal = passo(repositorio.buscar_animal_por_nome, nome_animal)
+    passo(repositorio.criar_vacina, nome="V10", status="Aplicada", data_aplicacao=date(2026, 1, 2), prox_aplicacao=date(2027, 1, 2), animal=animal)
+
+
+@com_alvo(_dono_com_animais)
+def read_vacina(contexto, cpf):
+    dono = passo(repositorio.buscar_pessoa_fisica_por_nome_ou_cpf, cpf)
+    animais = passo(repositorio.listar_animais_do_dono, dono.id)
+    animal = passo(repositorio.buscar_animal_do_dono, dono.id, contexto.sorteio.choice(animais).nome)
+    [vacina.nome for vacina in passo(repositorio.pagina_vacinas_do_animal, animal.id)]
+
+
+def _com_vacinas(contexto):
+    return contexto.animal_com(repositorio.listar_vacinas_do_animal)
+
+
+def _vacina_existente(alvo):
+    cpf, nome_animal, vacina_id = alvo
+    dono = passo(repositorio.buscar_pessoa_fisica_por_nome_ou_cpf, cpf)
+    animais = passo(repositorio.listar_animais_do_dono, dono.id)
+    animal = next(animal for animal in animais if animal.nome == nome_animal)
+    passo(repositorio.listar_vacinas_do_animal, animal.id)
+    return passo(repositorio.buscar_vacina, vacina_id)
+
+
+@com_alvo(_com_vacinas)
+def update_vacina(contexto, alvo):
+    vacina = _vacina_existente(alvo)
+    vacina.status = "Aplicada"
+    vacina.prox_aplicacao = date(2027, 6, 1)
+    passo(repositorio.gravar, vacina)
+
+
+@com_alvo(_com_vacinas)
+def delete_vacina(contexto, alvo):
+    passo(repositorio.remover, _vacina_existente(alvo))
+
+
+# Na ordem de execução: criar antes de remover o que foi criado.
+OPERACOES = [
+    create_especie, read_especie, update_especie, delete_especie,
+    create_veterinario, read_veterinario, update_veterinario, delete_veterinario,
+    create_pessoa_fisica, read_pessoa_fisica, update_pessoa_fisica, delete_pessoa_fisica,
+    create_ong, read_ong, update_ong, delete_ong,
+    create_animal, read_animal, update_animal,
+    create_consulta, read_consulta, update_consulta, delete_consulta,
+    create_vacina, read_vacina, update_vacina, delete_vacina,
+    delete_animal,
+]
+
+
+def _percentil(valores, fracao):
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))]
+
+
+def _executar(operacao, contexto):
+    # Devolve a chamada já com o alvo escolhido, pronta para ser medida.
+    preparar = getattr(operacao, "preparar", None)
+    if preparar is None:
+        return lambda: operacao(contexto)
+    alvo = preparar(contexto)
+    return lambda: operacao(contexto, alvo)
+
+
+def medir(operacao, contexto, execucoes):
+    latencias, comandos = [], []
+    for _ in range(execucoes):
+        executar = _executar(operacao, contexto)
+        with banco.contar_comandos() as emitidos:
+            inicio = time.perf_counter()
+            executar()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        comandos.append(len(emitidos))
+
+    # Memória numa passada separada: o tracemalloc deixa tudo mais lento.
+    gc.collect()
+    tracemalloc.start()
+    pico = 0
+    for _ in range(EXECUCOES_MEMORIA):
+        executar = _executar(operacao, contexto)
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        executar()
+        pico = max(pico, tracemalloc.get_traced_memory()[1] - antes)
+    tracemalloc.stop()
+
+    latencias.sort()
+    return {
+        "p50_ms": round(_percentil(latencias, 0.50), 3),
+        "p95_ms": round(_percentil(latencias, 0.95), 3),
+        "p99_ms": round(_percentil(latencias, 0.99), 3),
+        "max_ms": round(latencias[-1], 3),
+        "comandos_media": round(sum(comandos) / len(comandos), 2),
+        "comandos_max": max(comandos),
+        "pico_kib": round(pico / 1024, 1),
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def comparar(atual, anterior):
+    # Devolve as operações que regrediram (p50 acima do limite ou mais comandos SQL).
+    regressoes = []
+    print(f"\ncomparação com {anterior['commit']} ({anterior['data']}):")
+    for nome, medida in atual["operacoes"].items():
+        antes = anterior["operacoes"].get(nome)
+        if antes is None:
+            continue
+        razao = medida["p50_ms"] / antes["p50_ms"] if antes["p50_ms"] else 1
+        mais_lenta = razao > LIMITE_REGRESSAO and medida["p50_ms"] - antes["p50_ms"] > FOLGA_MS
+        regrediu = mais_lenta or medida["comandos_max"] > antes["comandos_max"]
+        if regrediu:
+            regressoes.append(nome)
+        print(f"  {nome:22} p50 {antes['p50_ms']:8.2f} -> {medida['p50_ms']:8.2f} ms ({razao:5.2f}x)   "
+              f"comandos {antes['comandos_max']:3d} -> {medida['comandos_max']:3d}{'   REGREDIU' if regrediu else ''}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede todos os caminhos CRUD da interface sobre dados sintéticos.")
+    parser.add_argument("--banco", help="banco já gerado por benchmarks.gerador (é copiado, não alterado)")
+    for nome, padrao in ESCALA_PADRAO.items():
+        parser.add_argument(f"--{nome}", type=int, default=padrao)
+    parser.add_argument("--semente", type=int, default=1)
+    parser.add_argument("--execucoes", type=int, default=EXECUCOES)
+    parser.add_argument("--comparar", help="resultado anterior (.json) para comparação")
+    parser.add_argument("--saida", help="arquivo do resultado (padrão: benchmarks/resultados/<data>-<commit>.json)")
+    args = parser.parse_args()
+
+    escala = {nome: getattr(args, nome) for nome in ESCALA_PADRAO}
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "suite.db")
+        if args.banco:
+            shutil.copy(args.banco, caminho)
+            escala = {"banco": os.path.basename(args.banco)}
+        engine = banco.configurar_banco(f"sqlite:///{caminho}")
+        banco.inicializar_banco(engine)
+        if not args.banco:
+            inicio = time.perf_counter()
+            gerador.gerar(engine, semente=args.semente, **escala)
+            print(f"banco gerado em {time.perf_counter() - inicio:.0f} s: {escala}")
+
+        contexto = Contexto(random.Random(args.semente))
+        operacoes = {}
+        for operacao in OPERACOES:
+            operacoes[operacao.__name__] = medida = medir(operacao, contexto, args.execucoes)
+            print(f"  {operacao.__name__:22} p50 {medida['p50_ms']:8.2f}  p95 {medida['p95_ms']:8.2f}  p99 {medida['p99_ms']:8.2f} ms"
+                  f"   comandos {medida['comandos_media']:5.1f} (máx {medida['comandos_max']:3d})   pico {medida['pico_kib']:8.1f} KiB")
+        engine.dispose()
+
+    resultado = {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                     "sqlalchemy": sqlalchemy.__version__, "plataforma": platform.platform()},
+        "escala": escala,
+        "semente": args.semente,
+        "execucoes": args.execucoes,
+        "operacoes": operacoes,
+    }
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nresultado gravado em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo))
+        if regressoes:
+            print(f"\n{len(regressoes)} operação(ões) regrediram: {', '.join(regressoes)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
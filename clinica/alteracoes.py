@@ -0,0 +1,75 @@
+from sqlalchemy import text
+
+from clinica.arquivo import FORA_DO_ARQUIVAMENTO, TABELAS_ARQUIVADAS
+
+
+# Registro de alterações para extrações incrementais: triggers gravam em
+# registro_alteracoes cada inserção (I), atualização (U) e remoção (D) de
+# qualquer tabela com id, venha a escrita do ORM, do importador ou de SQL
+# direto. seq só cresce, então serve de marca d'água. Linhas movidas para o
+# arquivo (clinica/arquivo.py) não são registradas como removidas.
+#
+# O log cresce a cada escrita: a exportação incremental com --podar
+# (clinica/exportacao.py) remove o que o consumidor já recebeu.
+# registro_alteracoes_poda guarda até onde o log foi podado, para recusar
+# extrações desde uma marca anterior a isso.
+
+_TABELAS_REGISTRADAS = {
+    # tabela física -> nome registrado no log (as subclasses de Dono entram como "Dono")
+    "Dono": "Dono",
+    "Pessoa_Fisica": "Dono",
+    "ONG": "Dono",
+    "Telefone": "Telefone",
+    "Animal": "Animal",
+    "Especie": "Especie",
+    "Veterinario": "Veterinario",
+    "Consulta": "Consulta",
+    "Vacinas": "Vacinas",
+}
+
+_DDL = [
+    """CREATE TABLE IF NOT EXISTS registro_alteracoes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        registro_id INTEGER NOT NULL,
+        operacao TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_registro_alteracoes_tabela_seq ON registro_alteracoes (tabela, seq)",
+    "CREATE TABLE IF NOT EXISTS registro_alteracoes_poda (ate_seq INTEGER NOT NULL)",
+]
+_TRIGGERS = {}
+for _tabela, _registrada in _TABELAS_REGISTRADAS.items():
+    for _evento, _linha in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        _quando = f" WHEN {FORA_DO_ARQUIVAMENTO}" if _evento == "DELETE" and _tabela in TABELAS_ARQUIVADAS else ""
+        _nome = f"alteracoes_{_tabela.lower()}_{_evento.lower()}"
+        _TRIGGERS[_nome] = (
+            f"""CREATE TRIGGER {_nome} AFTER {_evento} ON "{_tabela}"{_quando} BEGIN
+                INSERT INTO registro_alteracoes (tabela, registro_id, operacao) VALUES ('{_registrada}', {_linha}.id, '{_evento[0]}');
+            END"""
+        )
+
+
+def criar_registro_alteracoes(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conexao:
+        for comando in _DDL:
+            conexao.execute(text(comando))
+        # recriados sempre, como os de clinica/resumos.py
+        for nome, comando in _TRIGGERS.items():
+            conexao.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+            conexao.execute(text(comando))
+
+
+def podado_ate(conexao):
+    return conexao.execute(text("SELECT coalesce(max(ate_seq), 0) FROM registro_alteracoes_poda")).scalar()
+
+
+def podar_registro_alteracoes(engine, ate_seq):
+    # Remove do log o que todos os consumidores já leram (seq <= ate_seq).
+    with engine.begin() as conexao:
+        removidas = conexao.execute(text("DELETE FROM registro_alteracoes WHERE seq <= :seq"), {"seq": ate_seq}).rowcount
+        if ate_seq > podado_ate(conexao):
+            conexao.execute(text("DELETE FROM registro_alteracoes_poda"))
+            conexao.execute(text("INSERT INTO registro_alteracoes_poda (ate_seq) VALUES (:seq)"), {"seq": ate_seq})
+        return removidas
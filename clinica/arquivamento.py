@@ -0,0 +1,118 @@
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from clinica import banco, resumos
+from clinica.arquivo import ESQUEMA, em_curso, consultas_arquivadas, vacinas_arquivadas
+from clinica.vacinas_pendentes import DIAS_EM_ATRASO
+
+
+# Move para o arquivo (clinica/arquivo.py) as consultas e vacinas mais antigas
+# que a idade dada, em lotes por id. Cada lote são duas transações: copia para o
+# arquivo e depois remove do banco principal as linhas iguais à cópia. Com WAL o
+# SQLite não garante commit atômico entre dois arquivos; assim uma queda no meio
+# deixa no máximo uma linha nos dois lados (as visões mostram uma vez só e a
+# próxima execução termina a remoção), nunca uma linha perdida. Uma linha
+# alterada entre as duas transações fica no banco principal até a próxima vez.
+#
+#   python -m clinica.arquivamento [--dias N] [--lote N]
+
+IDADE_PADRAO_DIAS = 730
+LOTE = 5000
+
+# tabela do arquivo -> linhas que já podem sair do banco principal. Uma vacina só
+# sai depois que a próxima dose também ficou para trás, e nunca enquanto ainda
+# aparece em Vacinas a Vencer.
+_ANTIGAS = {
+    consultas_arquivadas: "data_consulta < :corte",
+    vacinas_arquivadas: "data_aplicacao < :corte AND coalesce(prox_aplicacao, data_aplicacao) < :corte",
+}
+
+# Remoções de animais e veterinários não chegam ao arquivo (as chaves
+# estrangeiras não atravessam arquivos): as linhas arquivadas deles saem aqui.
+_ORFAS = {
+    consultas_arquivadas: 'animal_id NOT IN (SELECT id FROM main."Animal") OR veterinario_id NOT IN (SELECT id FROM main."Veterinario")',
+    vacinas_arquivadas: 'animal_id NOT IN (SELECT id FROM main."Animal")',
+}
+
+
+def _arquivar_tabela(engine, tabela, antigas, corte, lote):
+    quente, fria = f'main."{tabela.name}"', f'{ESQUEMA}."{tabela.name}"'
+    colunas = ", ".join(f'"{coluna.name}"' for coluna in tabela.columns)
+    iguais = " AND ".join(f'a."{coluna.name}" IS q."{coluna.name}"' for coluna in tabela.columns)
+    faixa = f"id > :apos_id AND id <= :ultimo AND {antigas}"
+    movidas = 0
+    apos_id = 0
+    while True:
+        with engine.begin() as conexao:
+            ultimo = conexao.execute(
+                text(f"SELECT max(id) FROM (SELECT id FROM {quente} WHERE id > :apos_id AND {antigas} ORDER BY id LIMIT :lote)"),
+                {"apos_id": apos_id, "corte": corte, "lote": lote}
+            ).scalar()
+            if ultimo is None:
+                return movidas
+            parametros = {"apos_id": apos_id, "ultimo": ultimo, "corte": corte}
+            conexao.execute(text(f"INSERT OR REPLACE INTO {fria} ({colunas}) SELECT {colunas} FROM {quente} WHERE {faixa}"), parametros)
+        with engine.begin() as conexao:
+            conexao.execute(em_curso.insert(), {"tabela": tabela.name})
+            movidas += conexao.execute(
+                text(f"DELETE FROM {quente} AS q WHERE {faixa} AND EXISTS (SELECT 1 FROM {fria} AS a WHERE a.id = q.id AND {iguais})"),
+                parametros
+            ).rowcount
+            conexao.execute(em_curso.delete())
+        apos_id = ultimo
+
+
+def remover_orfas(engine):
+    # Registradas como removidas (exportações incrementais) e tiradas da busca textual.
+    removidas = 0
+    with engine.begin() as conexao:
+        busca = conexao.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'busca_clinica'")).first() is not None
+        for tabela, orfas in _ORFAS.items():
+            ids = f'SELECT id FROM {ESQUEMA}."{tabela.name}" WHERE {orfas}'
+            conexao.execute(text(f"INSERT INTO registro_alteracoes (tabela, registro_id, operacao) SELECT '{tabela.name}', id, 'D' FROM ({ids})"))
+            if busca and tabela is consultas_arquivadas:
+                conexao.execute(text(f"DELETE FROM busca_clinica WHERE rowid IN (SELECT id * 2 FROM ({ids}))"))
+            removidas += conexao.execute(text(f'DELETE FROM {ESQUEMA}."{tabela.name}" WHERE {orfas}')).rowcount
+    return removidas
+
+
+def arquivar(engine=None, dias=IDADE_PADRAO_DIAS, lote=LOTE, hoje=None):
+    if dias < DIAS_EM_ATRASO:
+        raise ValueError(f"dias deve ser pelo menos {DIAS_EM_ATRASO} (vacinas vencidas há menos tempo aparecem em Vacinas a Vencer)")
+    engine = engine or banco.engine
+    corte = ((hoje or date.today()) - timedelta(days=dias)).isoformat()
+    movidas = {tabela.name: _arquivar_tabela(engine, tabela, antigas, corte, lote) for tabela, antigas in _ANTIGAS.items()}
+    orfas = remover_orfas(engine)
+    if orfas:
+        resumos.reconstruir_resumos(engine)
+    with engine.connect() as conexao:
+        # sem estatísticas o planejador pode escolher mal o índice das visões de histórico
+        conexao.exec_driver_sql(f"ANALYZE {ESQUEMA}")
+    return {"corte": corte, "movidas": movidas, "orfas": orfas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move consultas e vacinas antigas para o arquivo da clínica.")
+    parser.add_argument("--dias", type=int, default=IDADE_PADRAO_DIAS, help=f"idade mínima em dias (padrão {IDADE_PADRAO_DIAS})")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    parser.add_argument("--banco", default=banco.URL_PADRAO)
+    args = parser.parse_args()
+    if args.dias < DIAS_EM_ATRASO:
+        parser.error(f"--dias deve ser pelo menos {DIAS_EM_ATRASO}")
+
+    engine = banco.configurar_banco(args.banco)
+    banco.inicializar_banco(engine)
+    inicio = time.perf_counter()
+    resultado = arquivar(engine, args.dias, args.lote)
+    for tabela, movidas in resultado["movidas"].items():
+        print(f"{tabela}: {movidas} linha(s) anteriores a {resultado['corte']} arquivada(s)")
+    if resultado["orfas"]:
+        print(f"{resultado['orfas']} linha(s) arquivada(s) de animais ou veterinários removidos apagada(s); resumos reconstruídos")
+    print(f"{time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
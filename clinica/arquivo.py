@@ -0,0 +1,94 @@
+import os
+
+from sqlalchemy import MetaData, Table, Column, Boolean, String, Index, inspect, text
+
+from clinica.modelos import Consulta, Vacina
+
+
+# Separação quente/frio: consultas e vacinas antigas saem de "Consulta" e
+# "Vacinas" para tabelas de mesmo nome num segundo arquivo SQLite (ao lado do
+# banco, com sufixo _arquivo), anexado a toda conexão como "arquivo"
+# (clinica.banco). As telas do dia a dia leem só as tabelas quentes, que ficam
+# pequenas; o histórico completo sai das visões historico_consultas e
+# historico_vacinas, que juntam as duas. O SQLite não deixa views e triggers do
+# banco principal citarem outro arquivo, então as visões são TEMP, criadas em
+# cada conexão. O arquivamento em si fica em clinica/arquivamento.py.
+
+ESQUEMA = "arquivo"
+TABELAS_ARQUIVADAS = (Consulta.__tablename__, Vacina.__tablename__)
+
+metadata = MetaData()
+
+# Linha presente só dentro da transação que remove as linhas já copiadas para o
+# arquivo: os triggers de remoção (registro de alterações, busca textual,
+# resumos) não tratam isso como remoção de dados.
+em_curso = Table("arquivamento_em_curso", metadata, Column("tabela", String, primary_key=True))
+FORA_DO_ARQUIVAMENTO = "NOT EXISTS (SELECT 1 FROM arquivamento_em_curso)"
+
+
+def _arquivada(tabela, *indices):
+    # Mesmas colunas, sem chaves estrangeiras (não atravessam arquivos).
+    colunas = [Column(coluna.name, coluna.type, primary_key=coluna.primary_key, nullable=coluna.nullable) for coluna in tabela.columns]
+    return Table(tabela.name, metadata, *colunas, *indices, schema=ESQUEMA)
+
+
+consultas_arquivadas = _arquivada(Consulta.__table__,
+    Index("ix_arquivo_Consulta_animal_id_data_consulta", "animal_id", "data_consulta"),
+)
+vacinas_arquivadas = _arquivada(Vacina.__table__,
+    Index("ix_arquivo_Vacinas_animal_id_nome_data_aplicacao", "animal_id", "nome", "data_aplicacao"),
+    Index("ix_arquivo_Vacinas_animal_id_data_aplicacao", "animal_id", "data_aplicacao"),
+)
+
+# As visões, para consultas pelo Core; não são criadas pelo create_all.
+_visoes = MetaData()
+
+
+def _visao(nome, tabela):
+    return Table(nome, _visoes, *[Column(coluna.name, coluna.type) for coluna in tabela.columns], Column("arquivada", Boolean))
+
+
+historico_consultas = _visao("historico_consultas", Consulta.__table__)
+historico_vacinas = _visao("historico_vacinas", Vacina.__table__)
+
+
+def _ddl_visao(visao, tabela):
+    # Uma linha copiada e ainda não removida do banco principal (arquivamento
+    # interrompido) aparece uma vez só.
+    colunas = ", ".join(f'"{coluna.name}"' for coluna in tabela.columns)
+    return (f'CREATE TEMP VIEW IF NOT EXISTS {visao.name} AS '
+            f'SELECT {colunas}, 0 AS arquivada FROM main."{tabela.name}" '
+            f'UNION ALL '
+            f'SELECT {colunas}, 1 AS arquivada FROM {ESQUEMA}."{tabela.name}" AS a '
+            f'WHERE NOT EXISTS (SELECT 1 FROM main."{tabela.name}" AS q WHERE q.id = a.id)')
+
+
+VISOES = [
+    _ddl_visao(historico_consultas, Consulta.__table__),
+    _ddl_visao(historico_vacinas, Vacina.__table__),
+]
+
+
+def caminho_do_arquivo(url):
+    # clinica_vet.db -> clinica_vet_arquivo.db; banco em memória, arquivo em memória.
+    if url.database in (None, "", ":memory:"):
+        return ":memory:"
+    raiz, extensao = os.path.splitext(url.database)
+    return f"{raiz}_arquivo{extensao or '.db'}"
+
+
+def criar_arquivo(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    metadata.create_all(engine)
+    # colunas e índices novos também nas tabelas do arquivo, como em migrar_colunas e migrar_indices
+    inspetor = inspect(engine)
+    with engine.begin() as conexao:
+        for tabela in (consultas_arquivadas, vacinas_arquivadas):
+            existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name, schema=ESQUEMA)}
+            for coluna in tabela.columns:
+                if coluna.name not in existentes:
+                    conexao.execute(text(f'ALTER TABLE {ESQUEMA}."{tabela.name}" ADD COLUMN "{coluna.name}" {coluna.type.compile(engine.dialect)}'))
+    for tabela in (consultas_arquivadas, vacinas_arquivadas):
+        for indice in tabela.indexes:
+            indice.create(engine, checkfirst=True)
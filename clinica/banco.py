@@ -0,0 +1,219 @@
+import os
+import random
+import time
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from clinica.alteracoes import criar_registro_alteracoes
+from clinica.arquivo import ESQUEMA, VISOES, caminho_do_arquivo, criar_arquivo
+from clinica.arquivo import metadata as metadata_do_arquivo
+from clinica.cache import cache
+from clinica.busca import criar_indice_textual, preencher_indice_textual
+from clinica.instrumentacao import instrumentar
+from clinica.modelos import Base
+from clinica.migracoes import migrar_colunas, migrar_indices, migrar_restricoes
+from clinica.resumos import criar_resumos
+
+
+URL_PADRAO = 'sqlite:///clinica_vet.db'
+
+# Perfis de armazenamento: PRAGMAs aplicados em cada conexão nova. "wal" é para
+# várias estações abrindo o mesmo arquivo num disco local do servidor (leitores
+# não bloqueiam o escritor). WAL depende de memória compartilhada entre os
+# processos e não funciona com o arquivo numa pasta de rede (SMB/NFS); nesse
+# caso use "rede", que fica no journal tradicional e só espera mais pelas travas.
+# "legado" não muda nada (padrões do SQLite) e é o padrão: serve em qualquer
+# disco. Escolha outro com CLINICA_PERFIL.
+PERFIS = {
+    "legado": {},
+    "wal": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # KiB
+        "mmap_size": 268435456,
+    },
+    "rede": {
+        "busy_timeout": 30000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16384,
+        "mmap_size": 0,
+    },
+}
+PERFIL_PADRAO = os.environ.get("CLINICA_PERFIL", "legado")
+
+# Repetição das unidades de trabalho que esbarram na trava de outra estação.
+TENTATIVAS = 5
+ESPERA_INICIAL = 0.05
+ESPERA_MAXIMA = 2.0
+
+
+def aplicar_perfil(engine_alvo, perfil):
+    pragmas = PERFIS[perfil]
+    if engine_alvo.dialect.name != "sqlite" or not pragmas:
+        return engine_alvo
+
+    @event.listens_for(engine_alvo, "connect")
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nome} = {valor}")
+        cursor.close()
+
+    return engine_alvo
+
+
+def ativar_chaves_estrangeiras(engine_alvo):
+    # Em qualquer perfil: as remoções em cascata do esquema dependem disso.
+    if engine_alvo.dialect.name != "sqlite":
+        return engine_alvo
+
+    @event.listens_for(engine_alvo, "connect")
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+
+    return engine_alvo
+
+
+def anexar_arquivo(engine_alvo):
+    # Consultas e vacinas antigas (clinica/arquivo.py). Antes do perfil, para que o
+    # journal_mode dele valha também para o arquivo.
+    if engine_alvo.dialect.name != "sqlite":
+        return engine_alvo
+    caminho = caminho_do_arquivo(engine_alvo.url)
+
+    @event.listens_for(engine_alvo, "connect")
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("ATTACH DATABASE ? AS arquivo", (caminho,))
+        for comando in VISOES:
+            cursor.execute(comando)
+        cursor.close()
+
+    return engine_alvo
+
+
+def _criar_engine(url, perfil, opcoes):
+    return aplicar_perfil(anexar_arquivo(ativar_chaves_estrangeiras(instrumentar(create_engine(url, echo=False, **opcoes)))), perfil)
+
+
+engine = _criar_engine(URL_PADRAO, PERFIL_PADRAO, {})
+Session = sessionmaker(bind=engine)
+
+
+def configurar_banco(url=URL_PADRAO, perfil=None, **opcoes):
+    # Troca o banco usado pelo Session (scripts, benchmarks, outro arquivo .db).
+    global engine
+    engine = _criar_engine(url, perfil or PERFIL_PADRAO, opcoes)
+    Session.configure(bind=engine)
+    cache.invalidar()
+    return engine
+
+
+# Versão do esquema gravada no próprio arquivo (PRAGMA user_version, no banco e
+# no arquivo anexado): com ela em dia, inicializar_banco não inspeciona as
+# tabelas nem refaz triggers a cada partida. A assinatura muda sozinha com
+# tabelas, colunas, índices e chaves dos modelos; aumente VERSAO_DO_ESQUEMA ao
+# mudar triggers, visões ou o preenchimento de colunas.
+VERSAO_DO_ESQUEMA = 2
+
+
+def assinatura_do_esquema():
+    partes = [str(VERSAO_DO_ESQUEMA)]
+    for tabela in Base.metadata.sorted_tables + metadata_do_arquivo.sorted_tables:
+        partes.append(tabela.fullname)
+        partes += [f"{coluna.name} {coluna.type!r} {coluna.nullable} {coluna.server_default is not None}" for coluna in tabela.columns]
+        partes += sorted(f"{chave.target_fullname} {chave.ondelete}" for chave in tabela.foreign_keys)
+        partes += sorted(indice.name for indice in tabela.indexes)
+    return zlib.crc32("\n".join(partes).encode()) & 0x7FFFFFFF  # user_version é um inteiro de 32 bits com sinal
+
+
+def _versoes_gravadas(engine_alvo):
+    if engine_alvo.dialect.name != "sqlite":
+        return set()
+    with engine_alvo.connect() as conexao:
+        return {conexao.exec_driver_sql(f"PRAGMA {esquema}.user_version").scalar() for esquema in ("main", ESQUEMA)}
+
+
+def inicializar_banco(engine_alvo=None):
+    engine_alvo = engine_alvo or engine
+    assinatura = assinatura_do_esquema()
+    if _versoes_gravadas(engine_alvo) == {assinatura}:
+        return engine_alvo
+    Base.metadata.create_all(engine_alvo)
+    migrar_colunas(engine_alvo)
+    migrar_restricoes(engine_alvo)
+    migrar_indices(engine_alvo)
+    criar_arquivo(engine_alvo)
+    criar_registro_alteracoes(engine_alvo)
+    criar_resumos(engine_alvo)
+    if criar_indice_textual(engine_alvo):
+        preencher_indice_textual(engine_alvo)
+    if engine_alvo.dialect.name == "sqlite":
+        with engine_alvo.begin() as conexao:
+            for esquema in ("main", ESQUEMA):
+                conexao.exec_driver_sql(f"PRAGMA {esquema}.user_version = {assinatura}")
+    return engine_alvo
+
+
+@contextmanager
+def unidade_de_trabalho():
+    # Uma sessão por operação: o mapa de identidade morre junto com ela e uma
+    # falha no commit não deixa sessão quebrada para a próxima operação.
+    session = Session(expire_on_commit=False)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def banco_travado(erro):
+    # SQLITE_BUSY / SQLITE_LOCKED, inclusive os códigos estendidos.
+    codigo = getattr(getattr(erro, "orig", None), "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (5, 6)
+    return "locked" in str(erro) or "busy" in str(erro)
+
+
+def em_transacao(funcao, *args, **kwargs):
+    # funcao(session, ...) numa unidade de trabalho. Se o banco estiver travado
+    # por outra estação mesmo depois do busy_timeout, desfaz e repete tudo com
+    # espera crescente: repetir só o commit não basta, porque o que a função leu
+    # pode ter mudado (e em WAL o SQLite devolve BUSY sem esperar quando a
+    # transação leu uma versão que outra estação já alterou).
+    for tentativa in range(1, TENTATIVAS + 1):
+        try:
+            with unidade_de_trabalho() as session:
+                return funcao(session, *args, **kwargs)
+        except OperationalError as erro:
+            if tentativa == TENTATIVAS or not banco_travado(erro):
+                raise
+        espera = min(ESPERA_MAXIMA, ESPERA_INICIAL * 2 ** (tentativa - 1))
+        time.sleep(random.uniform(espera / 2, espera))
+
+
+@contextmanager
+def contar_comandos(engine_alvo=None):
+    # Lista os comandos SQL emitidos dentro do bloco (para limitar N+1).
+    engine_alvo = engine_alvo or engine
+    comandos = []
+
+    def registrar(conexao, cursor, comando, parametros, contexto, executemany):
+        comandos.append(comando)
+
+    event.listen(engine_alvo, "before_cursor_execute", registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(engine_alvo, "before_cursor_execute", registrar)
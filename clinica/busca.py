@@ -0,0 +1,134 @@
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from clinica.arquivo import ESQUEMA, FORA_DO_ARQUIVAMENTO
+
+
+# Índice de texto (FTS5) sobre Consulta.descricao e Animal.tratamentos_realizados/
+# historico_consultas. Os triggers mantêm o índice em dia para qualquer escrita,
+# seja pelo ORM ou por SQL direto. O rowid codifica a origem do documento:
+# id * 2 para consultas e id * 2 + 1 para animais. Consultas movidas para o
+# arquivo (clinica/arquivo.py) continuam no índice e na busca.
+
+TIPO_CONSULTA = 0
+TIPO_ANIMAL = 1
+
+_TEXTO_ANIMAL = "coalesce({r}.tratamentos_realizados, '') || char(10) || coalesce({r}.historico_consultas, '')"
+
+_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS busca_clinica USING fts5(texto, tokenize = 'unicode61 remove_diacritics 2')""",
+
+    """CREATE TRIGGER IF NOT EXISTS busca_consulta_ai AFTER INSERT ON Consulta BEGIN
+        INSERT INTO busca_clinica(rowid, texto) VALUES (new.id * 2, coalesce(new.descricao, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_consulta_au AFTER UPDATE OF descricao ON Consulta BEGIN
+        DELETE FROM busca_clinica WHERE rowid = old.id * 2;
+        INSERT INTO busca_clinica(rowid, texto) VALUES (new.id * 2, coalesce(new.descricao, ''));
+    END""",
+    # recriado sempre: bancos anteriores ao arquivo têm a versão sem o WHEN
+    "DROP TRIGGER IF EXISTS busca_consulta_ad",
+    f"""CREATE TRIGGER busca_consulta_ad AFTER DELETE ON Consulta WHEN {FORA_DO_ARQUIVAMENTO} BEGIN
+        DELETE FROM busca_clinica WHERE rowid = old.id * 2;
+    END""",
+
+    f"""CREATE TRIGGER IF NOT EXISTS busca_animal_ai AFTER INSERT ON Animal BEGIN
+        INSERT INTO busca_clinica(rowid, texto) VALUES (new.id * 2 + 1, {_TEXTO_ANIMAL.format(r='new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS busca_animal_au AFTER UPDATE OF tratamentos_realizados, historico_consultas ON Animal BEGIN
+        DELETE FROM busca_clinica WHERE rowid = old.id * 2 + 1;
+        INSERT INTO busca_clinica(rowid, texto) VALUES (new.id * 2 + 1, {_TEXTO_ANIMAL.format(r='new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_animal_ad AFTER DELETE ON Animal BEGIN
+        DELETE FROM busca_clinica WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+_PREENCHER = {
+    "Consulta": "INSERT OR REPLACE INTO busca_clinica(rowid, texto) "
+                "SELECT id * 2, coalesce(descricao, '') FROM Consulta WHERE id > :apos_id ORDER BY id LIMIT :lote",
+    f"{ESQUEMA}.Consulta": "INSERT OR REPLACE INTO busca_clinica(rowid, texto) "
+                           f"SELECT id * 2, coalesce(descricao, '') FROM {ESQUEMA}.Consulta WHERE id > :apos_id ORDER BY id LIMIT :lote",
+    "Animal": "INSERT OR REPLACE INTO busca_clinica(rowid, texto) "
+              f"SELECT id * 2 + 1, {_TEXTO_ANIMAL.format(r='Animal')} FROM Animal WHERE id > :apos_id ORDER BY id LIMIT :lote",
+}
+
+# A consulta está no banco principal (c) ou no arquivo (ca).
+_BUSCAR = f"""
+    SELECT b.rowid % 2 AS tipo,
+           b.rowid / 2 AS registro_id,
+           coalesce(c.animal_id, ca.animal_id, a.id) AS animal_id,
+           coalesce(animal_consulta.nome, a.nome) AS animal_nome,
+           coalesce(c.data_consulta, ca.data_consulta) AS data_consulta,
+           snippet(busca_clinica, 0, '[', ']', '…', 12) AS trecho,
+           bm25(busca_clinica) AS relevancia
+    FROM busca_clinica AS b
+    LEFT JOIN Consulta AS c ON b.rowid % 2 = 0 AND c.id = b.rowid / 2
+    LEFT JOIN {ESQUEMA}.Consulta AS ca ON b.rowid % 2 = 0 AND c.id IS NULL AND ca.id = b.rowid / 2
+    LEFT JOIN Animal AS animal_consulta ON animal_consulta.id = coalesce(c.animal_id, ca.animal_id)
+    LEFT JOIN Animal AS a ON b.rowid % 2 = 1 AND a.id = b.rowid / 2
+    WHERE busca_clinica MATCH :consulta {{filtros}}
+    ORDER BY relevancia
+    LIMIT :limite
+"""
+
+
+def criar_indice_textual(engine):
+    # Devolve True quando o índice acabou de ser criado e precisa de preenchimento.
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conexao:
+        existia = conexao.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'busca_clinica'")).first() is not None
+        try:
+            for comando in _DDL:
+                conexao.execute(text(comando))
+        except OperationalError as erro:
+            print(f"Aviso: busca textual indisponível neste SQLite (FTS5): {erro}")
+            return False
+    return not existia
+
+
+def preencher_indice_textual(engine, lote=5000):
+    # Preenche o índice de um banco existente em lotes, um commit por lote.
+    total = 0
+    for tabela, comando in _PREENCHER.items():
+        apos_id = 0
+        while True:
+            with engine.begin() as conexao:
+                ultimo = conexao.execute(
+                    text(f"SELECT max(id) FROM (SELECT id FROM {tabela} WHERE id > :apos_id ORDER BY id LIMIT :lote)"),
+                    {"apos_id": apos_id, "lote": lote}
+                ).scalar()
+                if ultimo is None:
+                    break
+                conexao.execute(text(comando), {"apos_id": apos_id, "lote": lote})
+            total += 1
+            apos_id = ultimo
+    return total
+
+
+def montar_consulta(termos):
+    # Cada palavra vira uma frase entre aspas, para que pontuação digitada pelo
+    # usuário não seja lida como sintaxe do FTS5. "parvo*" continua buscando por prefixo.
+    partes = []
+    for palavra in termos.split():
+        prefixo = palavra.endswith("*")
+        palavra = palavra.rstrip("*").replace('"', '""')
+        if palavra:
+            partes.append(f'"{palavra}"' + ("*" if prefixo else ""))
+    return " ".join(partes)
+
+
+def buscar_texto(session, termos, limite=50, desde=None, ate=None):
+    # desde/ate restringem a busca às consultas do período.
+    consulta = montar_consulta(termos)
+    if not consulta:
+        return []
+    filtros = ""
+    parametros = {"consulta": consulta, "limite": limite}
+    if desde is not None:
+        filtros += " AND coalesce(c.data_consulta, ca.data_consulta) >= :desde"
+        parametros["desde"] = str(desde)
+    if ate is not None:
+        filtros += " AND coalesce(c.data_consulta, ca.data_consulta) <= :ate"
+        parametros["ate"] = str(ate)
+    return session.execute(text(_BUSCAR.format(filtros=filtros)), parametros).mappings().all()
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from clinica.modelos import Especie, Veterinario
+
+
+# Cache em memória das tabelas de referência (Especie, Veterinario), que são
+# pequenas e quase não mudam: busca por id, por chave natural e a tabela
+# inteira (para os seletores filtrarem por prefixo sem ir ao banco). Guarda
+# cópias desanexadas só com as colunas; cada acerto devolve uma cópia
+# incorporada à sessão de quem pediu (merge sem SQL), então alterar o objeto
+# devolvido não altera o cache.
+#
+# Escritas pelo ORM nesses modelos invalidam as entradas do modelo no flush e
+# de novo no fim da transação. O TTL limita o tempo em que uma alteração feita
+# por outra estação ou por SQL direto (importador) fica invisível.
+
+TTL_SEGUNDOS = float(os.environ.get("CLINICA_CACHE_TTL", "300"))
+MAX_ENTRADAS = 2000
+MAX_LINHAS_TABELA = 1000  # acima disso a tabela inteira não é guardada
+MODELOS = (Especie, Veterinario)
+
+_TABELA = "*"
+
+
+def _copia_desanexada(objeto):
+    mapper = type(objeto).__mapper__
+    copia = mapper.class_manager.new_instance()
+    for atributo in mapper.column_attrs:
+        setattr(copia, atributo.key, getattr(objeto, atributo.key))
+    make_transient_to_detached(copia)
+    return copia
+
+
+class CacheDeReferencia:
+    def __init__(self, ttl=TTL_SEGUNDOS, max_entradas=MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # (modelo, coluna, valor) -> (expira_em, cópias)
+        self._trava = threading.Lock()
+        self._contadores = dict.fromkeys(["acertos", "falhas", "expiradas", "descartadas", "invalidacoes"], 0)
+
+    def _ler(self, chave):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] < time.monotonic():
+                del self._entradas[chave]
+                self._contadores["expiradas"] += 1
+                entrada = None
+            if entrada is None:
+                self._contadores["falhas"] += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self._contadores["acertos"] += 1
+            return entrada[1]
+
+    def _guardar(self, chave, copias):
+        with self._trava:
+            self._entradas[chave] = (time.monotonic() + self.ttl, copias)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._contadores["descartadas"] += 1
+
+    def buscar(self, session, modelo, coluna, valor, carregar):
+        # carregar(): a consulta de verdade, feita só na falta. None não é guardado.
+        chave = (modelo, coluna, valor)
+        copia = self._ler(chave)
+        if copia is not None:
+            return session.merge(copia, load=False)
+        objeto = carregar()
+        if objeto is not None:
+            self._guardar(chave, _copia_desanexada(objeto))
+        return objeto
+
+    def tabela(self, session, modelo, carregar):
+        # Todas as linhas do modelo, ou None se a tabela passar de MAX_LINHAS_TABELA.
+        chave = (modelo, _TABELA, None)
+        copias = self._ler(chave)
+        if copias is None:
+            objetos = carregar(MAX_LINHAS_TABELA + 1)
+            if len(objetos) > MAX_LINHAS_TABELA:
+                return None
+            copias = [_copia_desanexada(objeto) for objeto in objetos]
+            self._guardar(chave, copias)
+        return copias
+
+    def incorporar(self, session, copias):
+        return [session.merge(copia, load=False) for copia in copias]
+
+    def invalidar(self, modelo=None):
+        with self._trava:
+            for chave in [chave for chave in self._entradas if modelo is None or chave[0] is modelo]:
+                del self._entradas[chave]
+            self._contadores["invalidacoes"] += 1
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self._contadores["acertos"] + self._contadores["falhas"]
+            return {
+                **self._contadores,
+                "taxa_de_acerto": self._contadores["acertos"] / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+            }
+
+    def zerar_contadores(self):
+        with self._trava:
+            self._contadores = dict.fromkeys(self._contadores, 0)
+
+
+cache = CacheDeReferencia()
+
+
+def marcar_alteracao(session, modelo):
+    # Também para escritas pelo Core, que não passam pelos eventos (repositorio.gravar_varios).
+    if modelo not in MODELOS:
+        return
+    cache.invalidar(modelo)
+    if session is not None:
+        session.info.setdefault("cache_modelos_alterados", set()).add(modelo)
+
+
+def _escrita(mapper, conexao, alvo):
+    marcar_alteracao(object_session(alvo), mapper.class_)
+
+
+for _modelo in MODELOS:
+    for _evento in ("after_insert", "after_update", "after_delete"):
+        event.listen(_modelo, _evento, _escrita)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _escrita_em_massa(estado):
+    # UPDATE/DELETE em massa pelo ORM não passam pelos eventos do mapper.
+    if (estado.is_update or estado.is_delete) and estado.bind_mapper is not None and estado.bind_mapper.class_ in MODELOS:
+        marcar_alteracao(estado.session, estado.bind_mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _fim_da_transacao(session, *args):
+    # De novo no fim: outra thread pode ter relido a versão antiga entre o flush e o commit.
+    for modelo in session.info.pop("cache_modelos_alterados", ()):
+        cache.invalidar(modelo)
@@ -0,0 +1,322 @@
+import http.client
+import threading
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from clinica import busca, relatorios, repositorio
+from clinica import vacinas_pendentes as pendentes
+from clinica.protocolo import codificar, decodificar
+
+
+# Modo cliente (python main.py --servidor URL): as mesmas funções que as telas
+# chamam em clinica.repositorio (e na busca, nos relatórios, em vacinas a
+# vencer), atendidas pelo servidor da clínica (clinica/servidor.py). O primeiro
+# argumento (a sessão) é ignorado: cada chamada é um pedido HTTP, e o servidor
+# abre a transação. Os objetos chegam como Registro, com os mesmos atributos
+# que o repositório carregaria.
+
+RECURSOS = {
+    "PessoaFisica": "donos", "ONG": "donos", "Dono": "donos", "Animal": "animais", "Consulta": "consultas",
+    "Vacina": "vacinas", "Veterinario": "veterinarios", "Especie": "especies",
+}
+
+
+class ErroDoServidor(Exception):
+    def __init__(self, situacao, mensagem, resposta=None):
+        super().__init__(mensagem)
+        self.situacao = situacao
+        self.resposta = resposta
+
+
+class Registro:
+    # Atributos lidos do JSON; o que a tela altera fica anotado para gravar()
+    # mandar só as colunas mudadas, como repositorio.gravar faz com o histórico do ORM.
+    # _originais guarda o valor lido de cada coluna alterada (para mostrar um conflito).
+    def __init__(self, campos):
+        object.__setattr__(self, "_campos", campos)
+        object.__setattr__(self, "_alterados", {})
+        object.__setattr__(self, "_originais", {})
+
+    def __getattr__(self, nome):
+        try:
+            return self._campos[nome]
+        except KeyError:
+            raise AttributeError(nome) from None
+
+    def __setattr__(self, nome, valor):
+        self._originais.setdefault(nome, self._campos.get(nome))
+        self._campos[nome] = valor
+        self._alterados[nome] = valor
+
+    def __getitem__(self, nome):
+        return self._campos[nome]
+
+    def get(self, nome, padrao=None):
+        return self._campos.get(nome, padrao)
+
+    def __repr__(self):
+        return f"Registro({self._campos!r})"
+
+
+def _caminho(registro):
+    return f"/{RECURSOS[registro._tipo]}/{registro.id}"
+
+
+def _meus(registro):
+    return {nome: valor for nome, valor in registro._alterados.items() if valor != registro._originais.get(nome)}
+
+
+def _corpo(registro, meus, sobrepor):
+    return dict(meus) if sobrepor or registro.get("versao") is None else {**meus, "versao": registro.versao}
+
+
+def _conflito(erro, originais, meus):
+    # 409 com o registro atual vira Conflito (ou StaleDataError, se o servidor não o mandou).
+    if erro.situacao != 409 or not isinstance(erro.resposta, Registro) or "atual" not in erro.resposta._campos:
+        raise erro
+    if erro.resposta.atual is None:
+        raise StaleDataError(str(erro)) from None
+    raise repositorio.Conflito(erro.resposta.atual._campos, originais, meus) from None
+
+
+class ClienteRemoto:
+    def __init__(self, url, tempo_limite=30):
+        partes = urlsplit(url)
+        self.host, self.porta = partes.hostname, partes.port or 80
+        self.tempo_limite = tempo_limite
+        self._local = threading.local()  # uma conexão persistente por thread
+        # função local -> método que a atende no servidor, para as tarefas que
+        # recebem a função do módulo em vez de chamá-la por este objeto
+        self._equivalentes = {}
+        for modulo in (repositorio, busca, relatorios, pendentes):
+            for nome, funcao in vars(modulo).items():
+                if callable(funcao) and not nome.startswith("_") and hasattr(type(self), nome):
+                    self._equivalentes[funcao] = getattr(self, nome)
+
+    def equivalente(self, funcao):
+        return self._equivalentes.get(funcao, funcao)
+
+    def _pedir(self, metodo, caminho, parametros=None, corpo=None, ausente=False):
+        # ausente: 404 vira None, como as buscas do repositório que não encontram nada.
+        parametros = {nome: valor for nome, valor in (parametros or {}).items() if valor is not None}
+        if parametros:
+            caminho += "?" + urlencode({nome: valor.isoformat() if hasattr(valor, "isoformat") else valor for nome, valor in parametros.items()})
+        dados = codificar(corpo) if corpo is not None else None
+        cabecalhos = {"Content-Type": "application/json"} if dados is not None else {}
+        for tentativa in (1, 2):
+            conexao = getattr(self._local, "conexao", None)
+            if conexao is None:
+                conexao = self._local.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.tempo_limite)
+            try:
+                conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                conteudo = resposta.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # o servidor fechou a conexão parada: uma nova tentativa, numa conexão nova
+                conexao.close()
+                self._local.conexao = None
+                if tentativa == 2:
+                    raise
+        if resposta.status == 404 and ausente:
+            return None
+        resultado = decodificar(conteudo, Registro)
+        if resposta.status >= 400:
+            mensagem = resultado.get("erro") if isinstance(resultado, Registro) else resposta.reason
+            if resposta.status == 400:
+                raise ValueError(mensagem)
+            raise ErroDoServidor(resposta.status, mensagem, resultado)
+        return resultado
+
+    # Genéricas
+    def gravar(self, session, objeto, sobrepor=False):
+        # Manda a versão lida junto; o servidor responde 409 com o registro atual se outra estação gravou antes.
+        meus = _meus(objeto)
+        if not meus:
+            return objeto
+        try:
+            return self._pedir("PATCH", _caminho(objeto), corpo=_corpo(objeto, meus, sobrepor))
+        except ErroDoServidor as erro:
+            _conflito(erro, {**objeto._campos, **objeto._originais}, meus)
+
+    def gravar_varios(self, session, objetos, sobrepor=False):
+        # Um PATCH na coleção com a lista de alterações; o servidor grava num UPDATE em lote.
+        alterados = [(objeto, _meus(objeto)) for objeto in objetos]
+        alterados = [(objeto, meus) for objeto, meus in alterados if meus]
+        if not alterados:
+            return 0
+        if RECURSOS[alterados[0][0]._tipo] == "donos":
+            for objeto, _ in alterados:
+                self.gravar(session, objeto, sobrepor)
+            return len(alterados)
+        corpo = [{**_corpo(objeto, meus, sobrepor), "id": objeto.id} for objeto, meus in alterados]
+        try:
+            return self._pedir("PATCH", f"/{RECURSOS[alterados[0][0]._tipo]}", corpo=corpo).alterados
+        except ErroDoServidor as erro:
+            # como no repositório, o Conflito mostra só os registros que a outra estação gravou (os que vieram em "atual")
+            atual = erro.resposta.get("atual") if isinstance(erro.resposta, Registro) else None
+            em_conflito = [(objeto, meus) for objeto, meus in alterados
+                           if isinstance(atual, Registro) and repositorio.rotulo_em_lote(objeto.id, "id") in atual._campos]
+            _conflito(erro,
+                      {repositorio.rotulo_em_lote(objeto.id, nome): valor for objeto, _ in em_conflito for nome, valor in {**objeto._campos, **objeto._originais}.items()},
+                      {repositorio.rotulo_em_lote(objeto.id, nome): valor for objeto, meus in em_conflito for nome, valor in meus.items()})
+
+    def remover(self, session, objeto):
+        self._pedir("DELETE", _caminho(objeto))
+
+    # Donos
+    def criar_pessoa_fisica(self, session, nome, cpf, endereco_cep, endereco_rua=None, endereco_cidade=None, endereco_complemento=None, telefones=()):
+        return self._pedir("POST", "/pessoas_fisicas", corpo={
+            "nome": nome, "cpf": cpf, "endereco_cep": endereco_cep, "endereco_rua": endereco_rua,
+            "endereco_cidade": endereco_cidade, "endereco_complemento": endereco_complemento,
+            "telefones": telefones if isinstance(telefones, str) else list(telefones),
+        })
+
+    def criar_ong(self, session, nome, cnpj, endereco_cep, endereco_rua=None, endereco_cidade=None, endereco_complemento=None, telefones=()):
+        return self._pedir("POST", "/ongs", corpo={
+            "nome": nome, "cnpj": cnpj, "endereco_cep": endereco_cep, "endereco_rua": endereco_rua,
+            "endereco_cidade": endereco_cidade, "endereco_complemento": endereco_complemento,
+            "telefones": telefones if isinstance(telefones, str) else list(telefones),
+        })
+
+    def buscar_dono_por_documento(self, session, documento, com_telefones=False):
+        return self._pedir("GET", "/donos", {"documento": documento, "telefones": 1 if com_telefones else None}, ausente=True)
+
+    def buscar_pessoa_fisica(self, session, cpf, com_telefones=False):
+        dono = self.buscar_dono_por_documento(session, cpf, com_telefones)
+        return dono if dono is not None and dono._tipo == "PessoaFisica" else None
+
+    def buscar_ong(self, session, cnpj, com_telefones=False):
+        dono = self.buscar_dono_por_documento(session, cnpj, com_telefones)
+        return dono if dono is not None and dono._tipo == "ONG" else None
+
+    def buscar_pessoas_fisicas_por_prefixo(self, session, prefixo, limite=20):
+        return self._pedir("GET", "/pessoas_fisicas", {"prefixo": prefixo, "limite": limite})
+
+    def buscar_dono(self, session, dono_id):
+        return self._pedir("GET", f"/donos/{dono_id}", ausente=True)
+
+    def buscar_pessoa_fisica_por_nome_ou_cpf(self, session, nome_ou_cpf):
+        return self._pedir("GET", "/pessoas_fisicas", {"nome_ou_cpf": nome_ou_cpf}, ausente=True)
+
+    def definir_telefones(self, session, dono, telefones):
+        return self._pedir("PUT", f"/donos/{dono.id}/telefones", corpo={"telefones": telefones if isinstance(telefones, str) else list(telefones)})
+
+    def buscar_donos_por_telefone(self, session, numero, limite=20):
+        return self._pedir("GET", "/donos", {"telefone": numero, "limite": limite})
+
+    # Espécie
+    def criar_especie(self, session, nome, descricao, subespecie):
+        return self._pedir("POST", "/especies", corpo={"nome": nome, "descricao": descricao, "subespecie": subespecie})
+
+    def pagina_especies(self, session, apos_id=0, limite=100):
+        return self._pedir("GET", "/especies", {"apos_id": apos_id, "limite": limite})
+
+    def buscar_especie(self, session, nome):
+        return self._pedir("GET", "/especies", {"nome": nome}, ausente=True)
+
+    def buscar_especie_por_id(self, session, especie_id):
+        return self._pedir("GET", f"/especies/{especie_id}", ausente=True)
+
+    def buscar_especies_por_prefixo(self, session, prefixo, limite=20):
+        return self._pedir("GET", "/especies", {"prefixo": prefixo, "limite": limite})
+
+    # Vacina
+    def criar_vacina(self, session, nome, status, data_aplicacao, prox_aplicacao, animal):
+        return self._pedir("POST", "/vacinas", corpo={"nome": nome, "status": status, "data_aplicacao": data_aplicacao,
+                                                      "prox_aplicacao": prox_aplicacao, "animal_id": animal.id})
+
+    def listar_vacinas_do_animal(self, session, animal_id):
+        return self._pedir("GET", f"/animais/{animal_id}/vacinas")
+
+    def pagina_vacinas_do_animal(self, session, animal_id, apos_id=0, limite=100):
+        return self._pedir("GET", f"/animais/{animal_id}/vacinas", {"apos_id": apos_id, "limite": limite})
+
+    def pagina_historico_vacinas_do_animal(self, session, animal_id, apos_id=0, limite=100):
+        return self._pedir("GET", f"/animais/{animal_id}/historico/vacinas", {"apos_id": apos_id, "limite": limite})
+
+    def buscar_vacina(self, session, vacina_id):
+        return self._pedir("GET", f"/vacinas/{vacina_id}", ausente=True)
+
+    # Animal
+    def criar_animal(self, session, nome, data_nasc, tratamentos_realizados, especie, dono):
+        return self._pedir("POST", "/animais", corpo={"nome": nome, "data_nasc": data_nasc, "tratamentos_realizados": tratamentos_realizados,
+                                                      "especie_id": especie.id, "dono_id": dono.id})
+
+    def listar_animais_do_dono(self, session, dono_id):
+        return self._pedir("GET", "/animais", {"dono_id": dono_id})
+
+    def buscar_animal(self, session, animal_id):
+        return self._pedir("GET", f"/animais/{animal_id}", ausente=True)
+
+    def ficha_animal(self, session, animal_id):
+        return self._pedir("GET", f"/animais/{animal_id}/ficha", ausente=True)
+
+    def buscar_animal_por_nome(self, session, nome):
+        return self._pedir("GET", "/animais", {"nome": nome}, ausente=True)
+
+    def buscar_animais_por_prefixo(self, session, prefixo, limite=20):
+        return self._pedir("GET", "/animais", {"prefixo": prefixo, "limite": limite})
+
+    def buscar_animal_do_dono(self, session, dono_id, nome):
+        return self._pedir("GET", "/animais", {"dono_id": dono_id, "nome": nome}, ausente=True)
+
+    # Consulta
+    def criar_consulta(self, session, data_consulta, animal, veterinario, descricao):
+        return self._pedir("POST", "/consultas", corpo={"data_consulta": data_consulta, "animal_id": animal.id,
+                                                        "veterinario_id": veterinario.id, "descricao": descricao})
+
+    def listar_consultas_do_animal(self, session, animal_id):
+        return self._pedir("GET", f"/animais/{animal_id}/consultas")
+
+    def pagina_consultas_do_animal(self, session, animal_id, apos_id=0, limite=100):
+        return self._pedir("GET", f"/animais/{animal_id}/consultas", {"apos_id": apos_id, "limite": limite})
+
+    def pagina_historico_consultas_do_animal(self, session, animal_id, apos_id=0, limite=100):
+        return self._pedir("GET", f"/animais/{animal_id}/historico/consultas", {"apos_id": apos_id, "limite": limite})
+
+    def buscar_consulta(self, session, consulta_id):
+        return self._pedir("GET", f"/consultas/{consulta_id}", ausente=True)
+
+    # Linha do tempo
+    EVENTO_CONSULTA, EVENTO_VACINA = repositorio.EVENTO_CONSULTA, repositorio.EVENTO_VACINA
+
+    def pagina_linha_do_tempo(self, session, animal_id, apos=None, limite=100):
+        data, tipo, evento_id = apos if apos is not None else (None, None, None)
+        return self._pedir("GET", f"/animais/{animal_id}/linha_do_tempo", {"data": data, "tipo": tipo, "id": evento_id, "limite": limite})
+
+    # Veterinário
+    def criar_veterinario(self, session, nome, especializacao, numero_reg_prof):
+        return self._pedir("POST", "/veterinarios", corpo={"nome": nome, "especializacao": especializacao, "numero_reg_prof": numero_reg_prof})
+
+    def buscar_veterinario(self, session, numero_reg_prof):
+        return self._pedir("GET", "/veterinarios", {"numero_reg_prof": numero_reg_prof}, ausente=True)
+
+    def buscar_veterinario_por_nome(self, session, nome):
+        return self._pedir("GET", "/veterinarios", {"nome": nome}, ausente=True)
+
+    def buscar_veterinario_por_id(self, session, veterinario_id):
+        return self._pedir("GET", f"/veterinarios/{veterinario_id}", ausente=True)
+
+    def buscar_veterinarios_por_prefixo(self, session, prefixo, limite=20):
+        return self._pedir("GET", "/veterinarios", {"prefixo": prefixo, "limite": limite})
+
+    # Busca textual, vacinas a vencer e relatórios
+    def buscar_texto(self, session, termos, limite=50, desde=None, ate=None):
+        return self._pedir("GET", "/busca", {"termos": termos, "limite": limite, "desde": desde, "ate": ate})
+
+    def vacinas_pendentes(self, session, desde=None, ate=None, status=None):
+        return self._pedir("GET", "/vacinas_pendentes", {"desde": desde, "ate": ate, "status": status})
+
+    def _relatorio(self, nome, desde, ate, do_historico, limite=None):
+        return self._pedir("GET", f"/relatorios/{nome}", {"desde": desde, "ate": ate, "historico": 1 if do_historico else None, "limite": limite})
+
+    def consultas_por_veterinario_mes(self, session, desde=None, ate=None, do_historico=False):
+        return self._relatorio("veterinarios", desde, ate, do_historico)
+
+    def novos_pacientes_por_especie(self, session, desde=None, ate=None, do_historico=False):
+        return self._relatorio("especies", desde, ate, do_historico)
+
+    def visitas_por_dono(self, session, desde=None, ate=None, limite=50, do_historico=False):
+        return self._relatorio("donos", desde, ate, do_historico, limite)
@@ -0,0 +1,185 @@
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date, datetime
+
+from sqlalchemy import select, text
+
+from clinica import banco
+from clinica.alteracoes import podado_ate, podar_registro_alteracoes
+from clinica.arquivo import historico_consultas, historico_vacinas
+from clinica.modelos import Dono, PessoaFisica, ONG, Telefone, Animal, Especie, Veterinario, Consulta, Vacina, veterinario_Animais
+
+
+# Exportação em fluxo de todas as entidades para CSV ou JSONL, um arquivo por
+# entidade, lendo com yield_per para a memória não depender do tamanho das
+# tabelas. Tudo é lido dentro de uma única transação de leitura, então os
+# arquivos formam uma fotografia consistente do banco.
+#
+# Extrações incrementais usam o registro_alteracoes (clinica/alteracoes.py).
+# O manifesto de cada exportação guarda a marca d'água (maior seq lido);
+# passando-a em --desde, só saem as linhas alteradas depois dela, e as
+# removidas vão para <entidade>_removidos com o id. A tabela de ligação veterinario_Animais não
+# tem id próprio e é sempre exportada inteira. Consultas e vacinas saem das
+# visões de histórico: as linhas movidas para o arquivo (clinica/arquivo.py)
+# continuam nas exportações e não contam como removidas.
+#
+# Com podar, uma exportação incremental bem-sucedida remove do log o que vem
+# até --desde: o consumidor já o recebeu, pois pediu a partir dali. Sem isso o
+# registro_alteracoes cresce para sempre. Com vários consumidores, pode com a
+# menor marca entre eles (alteracoes.podar_registro_alteracoes).
+
+YIELD_PER = 5000
+
+
+def _consulta_donos():
+    dono, pessoa_fisica, ong = Dono.__table__, PessoaFisica.__table__, ONG.__table__
+    return (select(*dono.c, pessoa_fisica.c.cpf, ong.c.cnpj)
+            .select_from(dono.outerjoin(pessoa_fisica, pessoa_fisica.c.id == dono.c.id).outerjoin(ong, ong.c.id == dono.c.id)))
+
+
+def _historico(visao, tabela):
+    # só as colunas da tabela, na mesma ordem
+    return select(*[visao.c[coluna.name] for coluna in tabela.columns])
+
+
+# arquivo -> (tabela registrada no log, consulta, coluna id)
+ENTIDADES = {
+    "donos": ("Dono", _consulta_donos, Dono.__table__.c.id),
+    "telefones": ("Telefone", lambda: select(Telefone.__table__), Telefone.__table__.c.id),
+    "especies": ("Especie", lambda: select(Especie.__table__), Especie.__table__.c.id),
+    "veterinarios": ("Veterinario", lambda: select(Veterinario.__table__), Veterinario.__table__.c.id),
+    "animais": ("Animal", lambda: select(Animal.__table__), Animal.__table__.c.id),
+    "consultas": ("Consulta", lambda: _historico(historico_consultas, Consulta.__table__), historico_consultas.c.id),
+    "vacinas": ("Vacinas", lambda: _historico(historico_vacinas, Vacina.__table__), historico_vacinas.c.id),
+    "veterinario_animais": (None, lambda: select(veterinario_Animais), None),
+}
+
+
+def _valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+class _Escritor:
+    def __init__(self, caminho, formato, colunas):
+        self.arquivo = open(f"{caminho}.{formato}", "w", encoding="utf-8", newline="")
+        self.formato = formato
+        self.colunas = colunas
+        self.linhas = 0
+        if formato == "csv":
+            self.csv = csv.writer(self.arquivo)
+            self.csv.writerow(colunas)
+
+    def escrever(self, linha):
+        valores = [_valor(valor) for valor in linha]
+        if self.formato == "csv":
+            self.csv.writerow(valores)
+        else:
+            self.arquivo.write(json.dumps(dict(zip(self.colunas, valores)), ensure_ascii=False) + "\n")
+        self.linhas += 1
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+def _exportar_entidade(conexao, destino, nome, formato, desde, yield_per):
+    tabela_log, montar_consulta, coluna_id = ENTIDADES[nome]
+    consulta = montar_consulta()
+    incremental = desde is not None and tabela_log is not None
+    if incremental:
+        alterados = text("SELECT registro_id FROM registro_alteracoes WHERE tabela = :tabela AND seq > :desde")
+        consulta = consulta.where(coluna_id.in_(alterados.bindparams(tabela=tabela_log, desde=desde).columns(registro_id=coluna_id.type)))
+    if coluna_id is not None:
+        consulta = consulta.order_by(coluna_id)
+
+    resultado = conexao.execution_options(stream_results=True, yield_per=yield_per).execute(consulta)
+    escritor = _Escritor(os.path.join(destino, nome), formato, list(resultado.keys()))
+    try:
+        for linha in resultado:
+            escritor.escrever(linha)
+    finally:
+        escritor.fechar()
+    contagem = {"linhas": escritor.linhas}
+
+    if incremental:
+        removidos = conexao.execution_options(stream_results=True, yield_per=yield_per).execute(
+            text(f"""SELECT DISTINCT r.registro_id AS id FROM registro_alteracoes AS r
+                     WHERE r.tabela = :tabela AND r.seq > :desde
+                       AND NOT EXISTS (SELECT 1 FROM "{coluna_id.table.name}" AS t WHERE t.id = r.registro_id)
+                     ORDER BY r.registro_id"""),
+            {"tabela": tabela_log, "desde": desde}
+        )
+        escritor = _Escritor(os.path.join(destino, f"{nome}_removidos"), formato, ["id"])
+        try:
+            for linha in removidos:
+                escritor.escrever(linha)
+        finally:
+            escritor.fechar()
+        contagem["removidos"] = escritor.linhas
+    return contagem
+
+
+def exportar(destino, formato="csv", desde=None, engine=None, yield_per=YIELD_PER, podar=False):
+    # Devolve o manifesto, também gravado em destino/manifesto.json.
+    if formato not in ("csv", "jsonl"):
+        raise ValueError("formato deve ser 'csv' ou 'jsonl'")
+    if podar and desde is None:
+        raise ValueError("podar só vale para exportações incrementais (desde)")
+    engine = engine or banco.engine
+    os.makedirs(destino, exist_ok=True)
+    inicio = time.perf_counter()
+    with engine.connect() as conexao:
+        # BEGIN explícito: a marca d'água e todas as tabelas vêm da mesma fotografia.
+        conexao.exec_driver_sql("BEGIN")
+        try:
+            podado = podado_ate(conexao)
+            if desde is not None and desde < podado:
+                raise ValueError(f"O registro de alterações já foi podado até {podado}; faça uma exportação completa (sem --desde).")
+            marca = conexao.execute(text("SELECT coalesce(max(seq), 0) FROM registro_alteracoes")).scalar()
+            entidades = {nome: _exportar_entidade(conexao, destino, nome, formato, desde, yield_per) for nome in ENTIDADES}
+        finally:
+            conexao.rollback()
+    manifesto = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "formato": formato,
+        "desde": desde,
+        "marca_dagua": marca,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "entidades": entidades,
+    }
+    with open(os.path.join(destino, "manifesto.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    if podar:
+        # depois do manifesto gravado: uma exportação que falhou não poda nada
+        manifesto["podadas"] = podar_registro_alteracoes(engine, desde)
+    return manifesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os dados da clínica para CSV ou JSONL.")
+    parser.add_argument("destino", help="pasta de saída")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--desde", type=int, help="marca d'água de uma exportação anterior (manifesto.json)")
+    parser.add_argument("--banco", default=banco.URL_PADRAO)
+    parser.add_argument("--yield-per", type=int, default=YIELD_PER)
+    parser.add_argument("--podar", action="store_true", help="com --desde: remove do registro de alterações o que vem até essa marca")
+    args = parser.parse_args()
+    if args.podar and args.desde is None:
+        parser.error("--podar exige --desde")
+
+    engine = banco.configurar_banco(args.banco)
+    banco.inicializar_banco(engine)
+    manifesto = exportar(args.destino, args.formato, args.desde, engine, args.yield_per, args.podar)
+    for nome, contagem in manifesto["entidades"].items():
+        print(f"{nome}: {contagem}")
+    print(f"marca d'água: {manifesto['marca_dagua']} ({manifesto['segundos']} s)")
+    if args.podar:
+        print(f"registro de alterações: {manifesto['podadas']} linha(s) podada(s) até {args.desde}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,421 @@
+import argparse
+import csv
+import json
+import time
+from datetime import date
+
+from sqlalchemy import bindparam, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from clinica import banco
+from clinica.cache import cache
+from clinica.modelos import Dono, PessoaFisica, ONG, Animal, Especie, Veterinario, colunas_de_telefone, normalizar_documento
+
+
+# Importação em massa a partir de CSV ou JSONL (um arquivo por entidade, lido
+# em fluxo). As linhas são gravadas em lotes com executemany e o commit é feito
+# a cada COMMIT_A_CADA linhas. As chaves estrangeiras são resolvidas por chaves
+# naturais mantidas em memória (CPF/CNPJ, nome da espécie, registro do
+# veterinário, dono + nome do animal). Reexecutar a mesma importação atualiza
+# os registros existentes em vez de duplicá-los, e só os que mudaram: uma linha
+# igual ao que já está no banco não é regravada. Um CPF/CNPJ já cadastrado
+# com o outro tipo (pessoa física x ONG) é rejeitado, não convertido. Um lote
+# recusado pelo banco (restrição violada) é refeito linha a linha, e só as
+# linhas ruins são rejeitadas.
+#
+# Colunas esperadas:
+#   especies:        nome, descricao, subespecie
+#   veterinarios:    nome, especializacao, numero_reg_prof
+#   pessoas_fisicas: nome, cpf, endereco_cep, endereco_rua, endereco_cidade, endereco_complemento, telefones
+#   ongs:            nome, cnpj, endereco_cep, endereco_rua, endereco_cidade, endereco_complemento, telefones
+#   telefones:       documento, numero
+#   animais:         dono_documento, nome, especie, data_nasc, tratamentos_realizados, historico_consultas
+#   vacinas:         dono_documento, animal, nome, status, data_aplicacao, prox_aplicacao
+#   consultas:       dono_documento, animal, numero_reg_prof, data_consulta, descricao
+
+TAMANHO_LOTE = 1000
+COMMIT_A_CADA = 20000
+ORDEM = ["especies", "veterinarios", "pessoas_fisicas", "ongs", "telefones", "animais", "vacinas", "consultas"]
+
+_CAMPOS_DONO = ["nome", "endereco_cep", "endereco_rua", "endereco_cidade", "endereco_complemento"]
+
+_INSERIR_TELEFONE = text(
+    "INSERT INTO Telefone (numero, digitos, digitos_invertidos, dono_id) SELECT :numero, :digitos, :digitos_invertidos, :dono_id "
+    "WHERE NOT EXISTS (SELECT 1 FROM Telefone WHERE dono_id = :dono_id AND coalesce(digitos, numero) IS coalesce(:digitos, :numero))"
+)
+_ATUALIZAR_VACINA = text(
+    "UPDATE Vacinas SET status = :status, prox_aplicacao = :prox_aplicacao, versao = versao + 1 "
+    "WHERE animal_id = :animal_id AND nome = :nome AND data_aplicacao = :data_aplicacao "
+    "AND (status IS NOT :status OR prox_aplicacao IS NOT :prox_aplicacao)"
+)
+# Registros já movidos para o arquivo (clinica/arquivo.py) não voltam: a checagem olha o histórico todo.
+_INSERIR_VACINA = text(
+    "INSERT INTO Vacinas (status, nome, data_aplicacao, prox_aplicacao, animal_id) "
+    "SELECT :status, :nome, :data_aplicacao, :prox_aplicacao, :animal_id "
+    "WHERE NOT EXISTS (SELECT 1 FROM historico_vacinas WHERE animal_id = :animal_id AND nome = :nome AND data_aplicacao = :data_aplicacao)"
+)
+_ATUALIZAR_CONSULTA = text(
+    "UPDATE Consulta SET descricao = :descricao, versao = versao + 1 "
+    "WHERE animal_id = :animal_id AND data_consulta = :data_consulta AND veterinario_id = :veterinario_id AND descricao IS NOT :descricao"
+)
+_INSERIR_CONSULTA = text(
+    "INSERT INTO Consulta (data_consulta, descricao, animal_id, veterinario_id) "
+    "SELECT :data_consulta, :descricao, :animal_id, :veterinario_id "
+    "WHERE NOT EXISTS (SELECT 1 FROM historico_consultas WHERE animal_id = :animal_id AND data_consulta = :data_consulta AND veterinario_id = :veterinario_id)"
+)
+
+
+class ErroDeLinha(ValueError):
+    pass
+
+
+class Resultado:
+    def __init__(self, entidade):
+        self.entidade = entidade
+        self.lidas = 0
+        self.inseridas = 0
+        self.atualizadas = 0
+        self.rejeitadas = 0
+        self.erros = []
+        self.segundos = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+    def rejeitar(self, numero_linha, motivo):
+        self.rejeitadas += 1
+        if len(self.erros) < 100:
+            self.erros.append(f"linha {numero_linha}: {motivo}")
+
+    def contagens(self):
+        return self.inseridas, self.atualizadas, self.rejeitadas, len(self.erros)
+
+    def voltar(self, contagens):
+        # desfaz o que um lote desfeito no banco tinha contado
+        self.inseridas, self.atualizadas, self.rejeitadas, erros = contagens
+        del self.erros[erros:]
+
+    def __str__(self):
+        return (f"{self.entidade}: {self.lidas} lidas, {self.inseridas} inseridas, {self.atualizadas} atualizadas, "
+                f"{self.rejeitadas} rejeitadas em {self.segundos:.1f} s ({self.linhas_por_segundo:,.0f} linhas/s)")
+
+
+def ler_registros(caminho):
+    # Gera (número da linha, dicionário) sem carregar o arquivo inteiro. Uma
+    # linha JSONL ilegível vem como ErroDeLinha, para ser rejeitada com o número.
+    with open(caminho, encoding="utf-8", newline="") as arquivo:
+        if caminho.endswith(".jsonl"):
+            for numero, linha in enumerate(arquivo, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except ValueError as erro:
+                    yield numero, ErroDeLinha(f"JSON inválido: {erro}")
+                    continue
+                yield numero, registro if isinstance(registro, dict) else ErroDeLinha("a linha não é um objeto JSON")
+        else:
+            for numero, registro in enumerate(csv.DictReader(arquivo), 2):
+                yield numero, registro
+
+
+def _em_lotes(registros, tamanho):
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _texto(registro, campo, obrigatorio=False):
+    valor = registro.get(campo)
+    valor = str(valor).strip() if valor is not None else ""
+    if obrigatorio and not valor:
+        raise ErroDeLinha(f"campo '{campo}' vazio")
+    return valor or None
+
+
+def _data(registro, campo, obrigatorio=False):
+    valor = _texto(registro, campo, obrigatorio)
+    if valor is None:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ErroDeLinha(f"data inválida em '{campo}': {valor}")
+
+
+class Mapas:
+    # Chaves naturais -> id, carregadas uma vez e mantidas durante a importação.
+    def __init__(self, conexao):
+        self.conexao = conexao
+        dono = Dono.__table__
+        linhas_donos = conexao.execute(select(dono.c.documento, dono.c.id, dono.c.tipo).where(dono.c.documento.is_not(None))).all()
+        self.donos = {documento: id_ for documento, id_, _ in linhas_donos}
+        self.tipos_de_dono = {documento: tipo for documento, _, tipo in linhas_donos}
+        self.especies = dict(conexao.execute(select(Especie.nome, Especie.id)).all())
+        self.veterinarios = {str(numero): id_ for numero, id_ in conexao.execute(select(Veterinario.numero_reg_prof, Veterinario.id)).all()}
+        self._animais = None
+
+    @property
+    def animais(self):
+        if self._animais is None:
+            self._animais = {(dono_id, nome): id_ for id_, dono_id, nome in self.conexao.execute(select(Animal.id, Animal.dono_id, Animal.nome))}
+        return self._animais
+
+    def dono(self, documento):
+        try:
+            return self.donos[normalizar_documento(documento)]
+        except KeyError:
+            raise ErroDeLinha(f"dono {documento} não cadastrado")
+
+    def animal(self, registro):
+        dono_id = self.dono(_texto(registro, "dono_documento", True))
+        nome = _texto(registro, "animal", True)
+        try:
+            return self.animais[(dono_id, nome)]
+        except KeyError:
+            raise ErroDeLinha(f"animal '{nome}' não cadastrado para o dono")
+
+
+class Importador:
+    def __init__(self, conexao, tamanho_lote=TAMANHO_LOTE, commit_a_cada=COMMIT_A_CADA):
+        self.conexao = conexao
+        self.tamanho_lote = tamanho_lote
+        self.commit_a_cada = commit_a_cada
+        self.pendentes = 0
+        self.mapas = Mapas(conexao)
+
+    def _talvez_commit(self, linhas):
+        self.pendentes += linhas
+        if self.pendentes >= self.commit_a_cada:
+            self.conexao.commit()
+            self.pendentes = 0
+
+    def importar(self, entidade, registros):
+        resultado = Resultado(entidade)
+        inicio = time.perf_counter()
+        metodo = getattr(self, f"_importar_{entidade}")
+        for lote in _em_lotes(registros, self.tamanho_lote):
+            resultado.lidas += len(lote)
+            self._gravar_lote(metodo, lote, resultado)
+            self._talvez_commit(len(lote))
+        self.conexao.commit()
+        self.pendentes = 0
+        resultado.segundos = time.perf_counter() - inicio
+        return resultado
+
+    def _gravar_lote(self, metodo, lote, resultado):
+        # Cada lote num SAVEPOINT. Se o banco recusar alguma linha (ex.: documento
+        # gravado por outra estação depois de carregados os mapas), o lote é
+        # desfeito e refeito linha a linha, cada uma no seu SAVEPOINT.
+        contagens = resultado.contagens()
+        try:
+            with self.conexao.begin_nested():
+                metodo(lote, resultado)
+            return
+        except IntegrityError:
+            resultado.voltar(contagens)
+            self.mapas = Mapas(self.conexao)  # ids do lote desfeito não existem mais
+        for numero, registro in lote:
+            contagens = resultado.contagens()
+            try:
+                with self.conexao.begin_nested():
+                    metodo([(numero, registro)], resultado)
+            except IntegrityError as erro:
+                resultado.voltar(contagens)
+                self.mapas = Mapas(self.conexao)
+                resultado.rejeitar(numero, f"recusada pelo banco: {erro.orig}")
+
+    def _preparar(self, lote, resultado, preparar_linha):
+        linhas = []
+        for numero, registro in lote:
+            try:
+                if isinstance(registro, ErroDeLinha):
+                    raise registro
+                linhas.append(preparar_linha(registro))
+            except ErroDeLinha as erro:
+                resultado.rejeitar(numero, erro)
+        return linhas
+
+    def _upsert(self, tabela, linhas, mapa, resultado):
+        # linhas: (chave natural, valores). Insere as novas (recebendo os ids) e
+        # atualiza as existentes que mudaram; a última ocorrência de uma chave no lote vence.
+        por_chave = dict(linhas)
+        novas = [(chave, valores) for chave, valores in por_chave.items() if chave not in mapa]
+        existentes = [{**{f"b_{campo}": valor for campo, valor in valores.items()}, "b_id": mapa[chave]}
+                      for chave, valores in por_chave.items() if chave in mapa]
+        if novas:
+            ids = self.conexao.execute(
+                insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True),
+                [valores for _, valores in novas]
+            ).scalars().all()
+            for (chave, _), id_ in zip(novas, ids):
+                mapa[chave] = id_
+            resultado.inseridas += len(novas)
+        if existentes:
+            # versão incrementada como o ORM faz: uma tela aberta com o registro detecta a importação
+            campos = [tabela.c[campo[2:]] for campo in existentes[0] if campo != "b_id"]
+            parametros = {coluna.name: bindparam(f"b_{coluna.name}", type_=coluna.type) for coluna in campos}
+            resultado.atualizadas += self.conexao.execute(
+                update(tabela)
+                .where(tabela.c.id == bindparam("b_id"), or_(*(coluna.is_distinct_from(parametros[coluna.name]) for coluna in campos)))
+                .values({**parametros, "versao": tabela.c.versao + 1}),
+                existentes
+            ).rowcount
+        return novas
+
+    def _importar_especies(self, lote, resultado):
+        def preparar(registro):
+            nome = _texto(registro, "nome", True)
+            return nome, {"nome": nome, "descricao": _texto(registro, "descricao"), "subespecie": _texto(registro, "subespecie", True)}
+        self._upsert(Especie.__table__, self._preparar(lote, resultado, preparar), self.mapas.especies, resultado)
+
+    def _importar_veterinarios(self, lote, resultado):
+        def preparar(registro):
+            numero = _texto(registro, "numero_reg_prof", True)
+            if not numero.isdigit():
+                raise ErroDeLinha(f"registro profissional inválido: {numero}")
+            return numero, {"nome": _texto(registro, "nome", True), "especializacao": _texto(registro, "especializacao"), "numero_reg_prof": int(numero)}
+        self._upsert(Veterinario.__table__, self._preparar(lote, resultado, preparar), self.mapas.veterinarios, resultado)
+
+    def _importar_donos(self, lote, resultado, modelo, campo_documento, identidade):
+        telefones = []
+        digitados = {}
+
+        def preparar(registro):
+            digitado = _texto(registro, campo_documento, True)
+            documento = normalizar_documento(digitado)
+            # o mesmo documento como pessoa física e como ONG: o tipo não muda por aqui
+            tipo = self.mapas.tipos_de_dono.get(documento)
+            if tipo is not None and tipo != identidade:
+                raise ErroDeLinha(f"{campo_documento.upper()} {digitado} já cadastrado como {tipo}")
+            digitados[documento] = digitado
+            valores = {campo: _texto(registro, campo, campo in ("nome", "endereco_cep")) for campo in _CAMPOS_DONO}
+            for numero in (_texto(registro, "telefones") or "").split(","):
+                if numero.strip():
+                    telefones.append((documento, numero.strip()))
+            return documento, {**valores, "tipo": identidade, "documento": documento}
+
+        linhas = self._preparar(lote, resultado, preparar)
+        self._upsert(Dono.__table__, linhas, self.mapas.donos, resultado)
+        # Linha da subclasse (cpf/cnpj como digitado): atualizada se já existe,
+        # inserida para os donos novos e para os antigos que ficaram sem ela.
+        subclasse = modelo.__table__
+        ids = {documento: self.mapas.donos[documento] for documento, _ in linhas}
+        for documento in ids:
+            self.mapas.tipos_de_dono[documento] = identidade
+        com_linha = set(self.conexao.execute(select(subclasse.c.id).where(subclasse.c.id.in_(ids.values()))).scalars()) if ids else set()
+        atualizar = [{"b_id": id_, "b_documento": digitados[documento]} for documento, id_ in ids.items() if id_ in com_linha]
+        inserir = [{"id": id_, campo_documento: digitados[documento]} for documento, id_ in ids.items() if id_ not in com_linha]
+        if atualizar:
+            documento = subclasse.c[campo_documento]
+            self.conexao.execute(update(subclasse).where(subclasse.c.id == bindparam("b_id"), documento.is_distinct_from(bindparam("b_documento")))
+                                 .values({campo_documento: bindparam("b_documento")}), atualizar)
+        if inserir:
+            self.conexao.execute(insert(subclasse), inserir)
+        if telefones:
+            self.conexao.execute(_INSERIR_TELEFONE, [{"dono_id": self.mapas.donos[documento], **colunas_de_telefone(numero)} for documento, numero in telefones])
+
+    def _importar_pessoas_fisicas(self, lote, resultado):
+        self._importar_donos(lote, resultado, PessoaFisica, "cpf", "pessoa_fisica")
+
+    def _importar_ongs(self, lote, resultado):
+        self._importar_donos(lote, resultado, ONG, "cnpj", "ong")
+
+    def _importar_telefones(self, lote, resultado):
+        def preparar(registro):
+            return {"dono_id": self.mapas.dono(_texto(registro, "documento", True)), **colunas_de_telefone(_texto(registro, "numero", True))}
+        linhas = self._preparar(lote, resultado, preparar)
+        if linhas:
+            resultado.inseridas += self.conexao.execute(_INSERIR_TELEFONE, linhas).rowcount
+
+    def _importar_animais(self, lote, resultado):
+        def preparar(registro):
+            dono_id = self.mapas.dono(_texto(registro, "dono_documento", True))
+            nome = _texto(registro, "nome", True)
+            especie = _texto(registro, "especie")
+            if especie is not None and especie not in self.mapas.especies:
+                raise ErroDeLinha(f"espécie '{especie}' não cadastrada")
+            return (dono_id, nome), {
+                "nome": nome,
+                "dono_id": dono_id,
+                "especie_id": self.mapas.especies.get(especie),
+                "data_nasc": _data(registro, "data_nasc"),
+                "tratamentos_realizados": _texto(registro, "tratamentos_realizados"),
+                "historico_consultas": _texto(registro, "historico_consultas"),
+            }
+        self._upsert(Animal.__table__, self._preparar(lote, resultado, preparar), self.mapas.animais, resultado)
+
+    def _gravar_com_chave(self, atualizar, inserir, linhas, resultado):
+        if not linhas:
+            return
+        atualizadas = self.conexao.execute(atualizar, linhas).rowcount
+        inseridas = self.conexao.execute(inserir, linhas).rowcount
+        resultado.atualizadas += atualizadas
+        resultado.inseridas += inseridas
+
+    def _importar_vacinas(self, lote, resultado):
+        def preparar(registro):
+            prox_aplicacao = _data(registro, "prox_aplicacao")
+            return {
+                "animal_id": self.mapas.animal(registro),
+                "nome": _texto(registro, "nome", True),
+                "status": _texto(registro, "status", True),
+                "data_aplicacao": str(_data(registro, "data_aplicacao", True)),
+                "prox_aplicacao": str(prox_aplicacao) if prox_aplicacao else None,
+            }
+        self._gravar_com_chave(_ATUALIZAR_VACINA, _INSERIR_VACINA, self._preparar(lote, resultado, preparar), resultado)
+
+    def _importar_consultas(self, lote, resultado):
+        def preparar(registro):
+            numero = _texto(registro, "numero_reg_prof", True)
+            if numero not in self.mapas.veterinarios:
+                raise ErroDeLinha(f"veterinário {numero} não cadastrado")
+            return {
+                "animal_id": self.mapas.animal(registro),
+                "veterinario_id": self.mapas.veterinarios[numero],
+                "data_consulta": str(_data(registro, "data_consulta", True)),
+                "descricao": _texto(registro, "descricao"),
+            }
+        self._gravar_com_chave(_ATUALIZAR_CONSULTA, _INSERIR_CONSULTA, self._preparar(lote, resultado, preparar), resultado)
+
+
+def importar(arquivos, engine=None, tamanho_lote=TAMANHO_LOTE, commit_a_cada=COMMIT_A_CADA):
+    # arquivos: {entidade: caminho}. As entidades são importadas na ordem de ORDEM,
+    # para que as chaves estrangeiras já existam quando forem referenciadas.
+    engine = engine or banco.engine
+    resultados = []
+    with engine.connect() as conexao:
+        importador = Importador(conexao, tamanho_lote, commit_a_cada)
+        for entidade in ORDEM:
+            if entidade in arquivos:
+                resultados.append(importador.importar(entidade, ler_registros(arquivos[entidade])))
+    cache.invalidar()  # o importador escreve pelo Core, sem os eventos do ORM
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa dados da clínica a partir de arquivos CSV ou JSONL.")
+    for entidade in ORDEM:
+        parser.add_argument(f"--{entidade.replace('_', '-')}", dest=entidade, metavar="ARQUIVO")
+    parser.add_argument("--banco", default=banco.URL_PADRAO)
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="linhas por executemany")
+    parser.add_argument("--commit-a-cada", type=int, default=COMMIT_A_CADA, help="linhas por transação")
+    args = parser.parse_args()
+
+    engine = banco.configurar_banco(args.banco)
+    banco.inicializar_banco(engine)
+    arquivos = {entidade: getattr(args, entidade) for entidade in ORDEM if getattr(args, entidade)}
+    for resultado in importar(arquivos, engine, args.lote, args.commit_a_cada):
+        print(resultado)
+        for erro in resultado.erros[:10]:
+            print(f"  {erro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+
+# Métricas por ação (ex.: "read_animal"): quantidade de comandos SQL, tempo em
+# SQL e tempo total. Guarda as últimas AMOSTRAS_POR_ACAO execuções de cada ação
+# para o histograma e grava no log de operações lentas as ações cujo tempo em
+# SQL passa de LIMITE_LENTO_MS. O tempo total das ações da interface inclui o
+# tempo do usuário nos diálogos, por isso o limite olha o tempo de SQL.
+
+LIMITE_LENTO_MS = float(os.environ.get("CLINICA_LIMITE_LENTO_MS", "200"))
+AMOSTRAS_POR_ACAO = 1000
+FAIXAS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+log_lento = logging.getLogger("clinica.operacoes_lentas")
+
+_acao_atual = ContextVar("acao_atual", default=None)
+_trava = threading.Lock()
+_amostras = defaultdict(lambda: deque(maxlen=AMOSTRAS_POR_ACAO))
+_totais = defaultdict(lambda: {"execucoes": 0, "comandos": 0, "sql_ms": 0.0, "total_ms": 0.0, "lentas": 0})
+
+
+class _Medicao:
+    def __init__(self, nome):
+        self.nome = nome
+        self.comandos = 0
+        self.sql_ms = 0.0
+        self.mais_lento = (0.0, "")
+
+
+def instrumentar(engine):
+    if getattr(engine, "_clinica_instrumentado", False):
+        return engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def antes(conexao, cursor, comando, parametros, contexto, executemany):
+        conexao.info.setdefault("_inicio_comando", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def depois(conexao, cursor, comando, parametros, contexto, executemany):
+        duracao_ms = (time.perf_counter() - conexao.info["_inicio_comando"].pop()) * 1000
+        medicao = _acao_atual.get()
+        if medicao is not None:
+            medicao.comandos += 1
+            medicao.sql_ms += duracao_ms
+            if duracao_ms > medicao.mais_lento[0]:
+                medicao.mais_lento = (duracao_ms, comando)
+
+    engine._clinica_instrumentado = True
+    return engine
+
+
+@contextmanager
+def medir_acao(nome):
+    medicao = _Medicao(nome)
+    token = _acao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        total_ms = (time.perf_counter() - inicio) * 1000
+        _acao_atual.reset(token)
+        _registrar(medicao, total_ms)
+
+
+def _registrar(medicao, total_ms):
+    lenta = medicao.sql_ms >= LIMITE_LENTO_MS
+    with _trava:
+        _amostras[medicao.nome].append(total_ms)
+        totais = _totais[medicao.nome]
+        totais["execucoes"] += 1
+        totais["comandos"] += medicao.comandos
+        totais["sql_ms"] += medicao.sql_ms
+        totais["total_ms"] += total_ms
+        totais["lentas"] += lenta
+    if lenta:
+        log_lento.warning(
+            "%s: %.1f ms em SQL (%d comandos), %.1f ms no total; comando mais lento (%.1f ms): %s",
+            medicao.nome, medicao.sql_ms, medicao.comandos, total_ms,
+            medicao.mais_lento[0], " ".join(medicao.mais_lento[1].split())[:500]
+        )
+
+
+def _percentil(ordenadas, fracao):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * fracao))]
+
+
+def resumo():
+    with _trava:
+        acoes = {nome: (dict(_totais[nome]), sorted(amostras)) for nome, amostras in _amostras.items()}
+    saida = {}
+    for nome, (totais, ordenadas) in acoes.items():
+        histograma = [0] * (len(FAIXAS_MS) + 1)
+        for valor in ordenadas:
+            histograma[bisect_left(FAIXAS_MS, valor)] += 1
+        execucoes = totais["execucoes"] or 1
+        saida[nome] = {
+            **totais,
+            "comandos_por_execucao": totais["comandos"] / execucoes,
+            "sql_ms_medio": totais["sql_ms"] / execucoes,
+            "total_ms_p50": _percentil(ordenadas, 0.50),
+            "total_ms_p90": _percentil(ordenadas, 0.90),
+            "total_ms_p99": _percentil(ordenadas, 0.99),
+            "histograma_total_ms": {
+                **{f"<={limite}": quantidade for limite, quantidade in zip(FAIXAS_MS, histograma)},
+                f">{FAIXAS_MS[-1]}": histograma[-1],
+            },
+        }
+    return saida
+
+
+def exportar_resumo(caminho, **secoes):
+    # secoes: outras métricas gravadas junto (ex.: cache=cache.estatisticas()).
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump({"gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"), "acoes": resumo(), **secoes}, arquivo, ensure_ascii=False, indent=2)
+
+
+def ativar_log_lento(caminho="operacoes_lentas.log", limite_ms=None):
+    global LIMITE_LENTO_MS
+    if limite_ms is not None:
+        LIMITE_LENTO_MS = limite_ms
+    if not any(isinstance(h, logging.FileHandler) for h in log_lento.handlers):
+        handler = logging.FileHandler(caminho, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        log_lento.addHandler(handler)
+    log_lento.setLevel(logging.WARNING)
+
+
+def zerar():
+    with _trava:
+        _amostras.clear()
+        _totais.clear()
@@ -0,0 +1,148 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.exc import IntegrityError
+
+from clinica.modelos import Base, colunas_de_telefone, normalizar_documento
+
+
+LOTE_PREENCHIMENTO = 10000
+
+
+def _preencher_telefones(conexao):
+    # A normalização é feita em Python (o SQLite não tem como inverter texto), em lotes por id.
+    ultimo = 0
+    while True:
+        linhas = conexao.execute(text('SELECT id, numero FROM "Telefone" WHERE id > :ultimo ORDER BY id LIMIT :limite'),
+                                 {"ultimo": ultimo, "limite": LOTE_PREENCHIMENTO}).all()
+        if not linhas:
+            return
+        conexao.execute(text('UPDATE "Telefone" SET digitos = :digitos, digitos_invertidos = :digitos_invertidos WHERE id = :id'),
+                        [{"id": id_, **colunas_de_telefone(numero)} for id_, numero in linhas])
+        ultimo = linhas[-1].id
+
+
+def _preencher_documentos(conexao):
+    ultimo = 0
+    while True:
+        linhas = conexao.execute(text(
+            'SELECT "Dono".id, coalesce("Pessoa_Fisica".cpf, "ONG".cnpj) AS documento FROM "Dono" '
+            'LEFT JOIN "Pessoa_Fisica" ON "Pessoa_Fisica".id = "Dono".id LEFT JOIN "ONG" ON "ONG".id = "Dono".id '
+            'WHERE "Dono".id > :ultimo ORDER BY "Dono".id LIMIT :limite'), {"ultimo": ultimo, "limite": LOTE_PREENCHIMENTO}).all()
+        if not linhas:
+            return
+        conexao.execute(text('UPDATE "Dono" SET documento = :documento WHERE id = :id'),
+                        [{"id": id_, "documento": normalizar_documento(documento)} for id_, documento in linhas])
+        ultimo = linhas[-1].id
+
+
+# Preenchimento das colunas novas em bancos antigos: SQL ou função que recebe a conexão.
+_PREENCHIMENTOS = {
+    # data de cadastro desconhecida: primeira consulta ou, sem consultas, primeira vacina
+    ("Animal", "data_cadastro"): """UPDATE "Animal" SET data_cadastro = coalesce(
+        (SELECT min(data_consulta) FROM "Consulta" WHERE animal_id = "Animal".id),
+        (SELECT min(data_aplicacao) FROM "Vacinas" WHERE animal_id = "Animal".id))""",
+    ("Telefone", "digitos"): _preencher_telefones,
+    ("Dono", "documento"): _preencher_documentos,
+}
+
+
+def _definicao(coluna, dialeto):
+    # O SQLite só aceita NOT NULL numa coluna nova que tenha DEFAULT (as linhas existentes o recebem).
+    definicao = coluna.type.compile(dialeto)
+    if coluna.server_default is not None:
+        definicao += f" DEFAULT {coluna.server_default.arg}" + ("" if coluna.nullable else " NOT NULL")
+    return definicao
+
+
+def migrar_colunas(engine):
+    # create_all também não acrescenta colunas novas a tabelas existentes.
+    inspetor = inspect(engine)
+    with engine.begin() as conexao:
+        for tabela in Base.metadata.sorted_tables:
+            existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+            novas = [coluna for coluna in tabela.columns if coluna.name not in existentes]
+            for coluna in novas:
+                conexao.execute(text(f'ALTER TABLE "{tabela.name}" ADD COLUMN "{coluna.name}" {_definicao(coluna, engine.dialect)}'))
+            # só depois de todas as colunas da tabela existirem: um preenchimento pode usar mais de uma
+            for coluna in novas:
+                preenchimento = _PREENCHIMENTOS.get((tabela.name, coluna.name))
+                if callable(preenchimento):
+                    preenchimento(conexao)
+                elif preenchimento is not None:
+                    conexao.execute(text(preenchimento))
+
+
+def _acoes_de_remocao(chaves):
+    return {(tuple(colunas), tabela): (acao or "").upper() for colunas, tabela, acao in chaves}
+
+
+def _autoincremento_no_banco(conexao, tabela):
+    sql = conexao.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nome"), {"nome": tabela.name}).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+
+def migrar_restricoes(engine):
+    # O SQLite não altera as restrições de uma tabela existente: as tabelas de um
+    # banco anterior ao ON DELETE ou ao AUTOINCREMENT são recriadas com o esquema
+    # atual e os dados copiados, como descrito na documentação do ALTER TABLE. Os
+    # triggers são apagados antes (alguns citam as tabelas recriadas) e, como os
+    # índices, voltam nos passos seguintes de inicializar_banco.
+    if engine.dialect.name != "sqlite":
+        return
+    inspetor = inspect(engine)
+    antigas = []
+    with engine.connect() as conexao:
+        for tabela in Base.metadata.sorted_tables:
+            no_banco = _acoes_de_remocao((chave["constrained_columns"], chave["referred_table"], chave["options"].get("ondelete"))
+                                         for chave in inspetor.get_foreign_keys(tabela.name))
+            no_modelo = _acoes_de_remocao(([chave.parent.name], chave.column.table.name, chave.ondelete) for chave in tabela.foreign_keys)
+            autoincremento = bool(tabela.dialect_options["sqlite"]["autoincrement"])
+            if no_banco != no_modelo or autoincremento != _autoincremento_no_banco(conexao, tabela):
+                antigas.append(tabela)
+    if not antigas:
+        return
+
+    preparador = engine.dialect.identifier_preparer
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("PRAGMA foreign_keys = OFF")  # só tem efeito fora de transação
+        # o RENAME não revalida as visões de histórico (clinica/arquivo.py), que citam tabelas no meio da troca
+        conexao.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+        try:
+            conexao.exec_driver_sql("BEGIN")
+            for (nome,) in conexao.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").all():
+                conexao.exec_driver_sql(f"DROP TRIGGER {preparador.quote(nome)}")
+            for tabela in antigas:
+                antiga = preparador.format_table(tabela)
+                nova = preparador.quote(f"{tabela.name}_migracao")
+                ddl = str(CreateTable(tabela).compile(dialect=engine.dialect))
+                conexao.exec_driver_sql(ddl.replace(f"CREATE TABLE {antiga}", f"CREATE TABLE {nova}", 1))
+                colunas = ", ".join(preparador.quote(coluna.name) for coluna in tabela.columns)
+                conexao.exec_driver_sql(f"INSERT INTO {nova} ({colunas}) SELECT {colunas} FROM {antiga}")
+                conexao.exec_driver_sql(f"DROP TABLE {antiga}")
+                conexao.exec_driver_sql(f"ALTER TABLE {nova} RENAME TO {antiga}")
+            violacoes = conexao.exec_driver_sql("PRAGMA foreign_key_check").all()
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+            conexao.exec_driver_sql("PRAGMA foreign_keys = ON")
+    if violacoes:
+        tabelas = sorted({linha[0] for linha in violacoes})
+        print(f"Aviso: {len(violacoes)} registro(s) apontam para linhas que não existem em {', '.join(tabelas)}.")
+
+
+def migrar_indices(engine):
+    # create_all não mexe em tabelas que já existem, então os índices de um
+    # clinica_vet.db antigo precisam ser criados aqui.
+    for tabela in Base.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            try:
+                indice.create(engine, checkfirst=True)
+            except IntegrityError:
+                # Dados antigos com duplicatas: mantém a busca indexada sem a restrição.
+                print(f"Aviso: valores duplicados em {tabela.name}; criando {indice.name} sem UNIQUE.")
+                colunas = ", ".join(f'"{coluna.name}"' for coluna in indice.columns)
+                with engine.begin() as conexao:
+                    conexao.execute(text(f'CREATE INDEX IF NOT EXISTS "{indice.name}" ON "{tabela.name}" ({colunas})'))
@@ -0,0 +1,234 @@
+import os
+import re
+from datetime import date
+
+from sqlalchemy import Column, String, Integer, Date, Text, ForeignKey, Table, Index
+from sqlalchemy.orm import declarative_base, relationship, validates
+
+
+Base = declarative_base()
+
+# Remoções: as chaves estrangeiras têm ON DELETE (CASCADE ou SET NULL) e os
+# relacionamentos passive_deletes, então o banco apaga/desvincula os dependentes
+# sem que o ORM precise carregá-los. Requer PRAGMA foreign_keys (clinica.banco).
+#
+# Com CLINICA_LAZY_RAISE=1 (desenvolvimento) qualquer relacionamento lido sem
+# carregamento explícito (selectinload/joinedload) levanta erro em vez de
+# disparar uma consulta escondida.
+CARREGAMENTO_PADRAO = "raise" if os.environ.get("CLINICA_LAZY_RAISE") == "1" else "select"
+
+
+def coluna_de_versao():
+    # Concorrência otimista (version_id_col): todo UPDATE do ORM confere e
+    # incrementa a versão; quem grava um registro que outra estação alterou
+    # depois da leitura recebe StaleDataError (repositorio.gravar).
+    return Column(Integer, nullable=False, server_default="1")
+
+veterinario_Animais = Table("veterinario_Animais", Base.metadata,
+    Column("veterinario_id", Integer, ForeignKey("Veterinario.id", ondelete="CASCADE")),
+    Column("animal_id", Integer, ForeignKey("Animal.id", ondelete="CASCADE")),
+    # as remoções em cascata procuram por qualquer um dos lados
+    Index("ix_veterinario_Animais_veterinario_id_animal_id", "veterinario_id", "animal_id"),
+    Index("ix_veterinario_Animais_animal_id", "animal_id"),
+)
+
+def normalizar_documento(documento):
+    # CPF ou CNPJ sem pontuação; letras maiúsculas porque o CNPJ também pode ser alfanumérico.
+    return re.sub(r"[^0-9A-Z]", "", (documento or "").upper()) or None
+
+
+class Dono(Base):
+    __tablename__ = "Dono"
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False, index=True)
+    documento = Column(String, unique=True, index=True)  # CPF ou CNPJ normalizado, preenchido pelas subclasses
+    endereco_cep = Column(String, nullable=False)
+    endereco_rua = Column(String)
+    endereco_cidade = Column(String)
+    endereco_complemento = Column(String)
+
+    animais = relationship("Animal", back_populates="dono", passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    telefones = relationship("Telefone", back_populates="dono", cascade="all, delete-orphan", passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    tipo = Column(String(50))  
+    versao = coluna_de_versao()
+
+    __mapper_args__ = {
+        'polymorphic_identity': 'dono',
+        'polymorphic_on': tipo,
+        'version_id_col': versao,
+    }
+
+class PessoaFisica(Dono):
+    __tablename__ = "Pessoa_Fisica"
+    id = Column(Integer, ForeignKey('Dono.id', ondelete="CASCADE"), primary_key=True)
+    cpf = Column(String, nullable=False, unique=True, index=True)
+
+    __mapper_args__ = {
+        'polymorphic_identity': 'pessoa_fisica',
+    }
+
+    @validates("cpf")
+    def _normalizar(self, chave, cpf):
+        self.documento = normalizar_documento(cpf)
+        return cpf
+
+class ONG(Dono):
+    __tablename__ = "ONG"
+    id = Column(Integer, ForeignKey("Dono.id", ondelete="CASCADE"), primary_key=True)
+    cnpj = Column(String, nullable=False, unique=True, index=True)
+
+    __mapper_args__ = {
+        'polymorphic_identity': 'ong',
+    }
+
+    @validates("cnpj")
+    def _normalizar(self, chave, cnpj):
+        self.documento = normalizar_documento(cnpj)
+        return cnpj
+
+def normalizar_telefone(numero):
+    # Forma canônica: só dígitos, sem o +55 e sem o 0 de longa distância (com ou sem código de operadora).
+    digitos = re.sub(r"[^0-9]", "", numero or "")
+    if digitos.startswith("55") and len(digitos) in (12, 13):
+        digitos = digitos[2:]
+    elif digitos.startswith("0") and len(digitos) in (11, 12):
+        digitos = digitos[1:]
+    elif digitos.startswith("0") and len(digitos) in (13, 14):
+        digitos = digitos[3:]
+    return digitos or None
+
+
+def colunas_de_telefone(numero):
+    # Valores das colunas de Telefone para escritas sem o ORM (importador, migração).
+    digitos = normalizar_telefone(numero)
+    return {"numero": numero, "digitos": digitos, "digitos_invertidos": digitos[::-1] if digitos else None}
+
+
+class Telefone(Base):
+    __tablename__ = "Telefone"
+    __table_args__ = (
+        # busca pelo final do número (sem DDD) como faixa de prefixo, sem ler a tabela
+        Index("ix_Telefone_digitos_invertidos_dono_id", "digitos_invertidos", "dono_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    numero = Column(String)  # como foi digitado, para exibição
+    digitos = Column(String)
+    digitos_invertidos = Column(String)
+    dono_id = Column(Integer, ForeignKey("Dono.id", ondelete="CASCADE"), nullable=False, index=True)
+    dono = relationship("Dono", back_populates="telefones", lazy=CARREGAMENTO_PADRAO)
+
+    @validates("numero")
+    def _normalizar(self, chave, numero):
+        colunas = colunas_de_telefone(numero)
+        self.digitos = colunas["digitos"]
+        self.digitos_invertidos = colunas["digitos_invertidos"]
+        return numero
+
+class Animal(Base):
+    __tablename__ = "Animal"
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False)
+    tratamentos_realizados = Column(String)
+    historico_consultas = Column(String)
+    data_nasc = Column(Date, nullable=True)
+    data_cadastro = Column(Date, nullable=True, default=date.today)
+
+
+    dono_id = Column(Integer, ForeignKey("Dono.id", ondelete="SET NULL"))
+    dono = relationship('Dono', back_populates='animais', lazy=CARREGAMENTO_PADRAO)
+
+    especie_id = Column(Integer, ForeignKey('Especie.id', ondelete="SET NULL"), index=True)
+    especie = relationship('Especie', back_populates='animais', lazy=CARREGAMENTO_PADRAO)
+
+    consultas = relationship("Consulta", back_populates="animal", cascade="all, delete-orphan", passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    veterinarios = relationship('Veterinario', secondary=veterinario_Animais, back_populates='animais', passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    vacinas = relationship("Vacina", back_populates="animal", cascade="all, delete-orphan", passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    versao = coluna_de_versao()
+
+    __table_args__ = (
+        Index("ix_Animal_dono_id_nome", "dono_id", "nome"),
+        Index("ix_Animal_nome", "nome"),
+    )
+    __mapper_args__ = {"version_id_col": versao}
+
+class Vacina(Base):
+    __tablename__ = "Vacinas"
+    __table_args__ = (
+        # vacinas a vencer/vencidas: faixa em prox_aplicacao, status lido do próprio índice
+        Index("ix_Vacinas_prox_aplicacao_status", "prox_aplicacao", "status"),
+        # dose posterior da mesma vacina no mesmo animal, sem ler a tabela
+        Index("ix_Vacinas_animal_id_nome_data_aplicacao", "animal_id", "nome", "data_aplicacao"),
+        # linha do tempo do animal, por data (o id vai junto no índice)
+        Index("ix_Vacinas_animal_id_data_aplicacao", "animal_id", "data_aplicacao"),
+        # ids nunca reaproveitados: os antigos continuam no arquivo (clinica/arquivo.py)
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False)  
+    nome = Column(String, nullable=False)  
+    data_aplicacao = Column(Date, nullable=False)  
+    prox_aplicacao = Column(Date, nullable=True)  
+
+    
+    animal_id = Column(Integer, ForeignKey("Animal.id", ondelete="CASCADE"), nullable=False, index=True)
+    animal = relationship("Animal", back_populates="vacinas", lazy=CARREGAMENTO_PADRAO)
+
+    versao = coluna_de_versao()
+    __mapper_args__ = {"version_id_col": versao}
+
+class Consulta(Base):
+    __tablename__ = "Consulta"
+    __table_args__ = (
+        Index("ix_Consulta_animal_id_data_consulta", "animal_id", "data_consulta"),  # como em Vacina
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    data_consulta = Column(Date, nullable=False)
+    descricao = Column(Text, nullable=True)  
+
+    animal_id = Column(Integer, ForeignKey("Animal.id", ondelete="CASCADE"), nullable=False, index=True)
+    animal = relationship("Animal", back_populates="consultas", lazy=CARREGAMENTO_PADRAO)
+
+    
+    veterinario_id = Column(Integer, ForeignKey("Veterinario.id", ondelete="CASCADE"), nullable=False, index=True)
+    veterinario = relationship("Veterinario", back_populates="consultas", lazy=CARREGAMENTO_PADRAO)
+
+    versao = coluna_de_versao()
+    __mapper_args__ = {"version_id_col": versao}
+
+
+class Veterinario(Base):
+    __tablename__ = "Veterinario"
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False, index=True)
+    especializacao = Column(String)
+    numero_reg_prof = Column(Integer, nullable=False, unique=True, index=True)
+
+    animais = relationship('Animal', secondary=veterinario_Animais, back_populates='veterinarios', passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+    consultas = relationship("Consulta", back_populates="veterinario", cascade="all, delete-orphan", passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    versao = coluna_de_versao()
+    __mapper_args__ = {"version_id_col": versao}
+
+
+
+class Especie(Base):
+    __tablename__ = "Especie"
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False, index=True)
+    descricao = Column(Text, nullable=True)
+    subespecie = Column(String, nullable=False)
+
+    animais = relationship('Animal', back_populates='especie', passive_deletes=True, lazy=CARREGAMENTO_PADRAO)
+
+    versao = coluna_de_versao()
+    __mapper_args__ = {"version_id_col": versao}
@@ -0,0 +1,34 @@
+import json
+from datetime import date, datetime
+
+
+# Formato das mensagens entre o servidor (clinica/servidor.py) e o cliente
+# (clinica/cliente.py): JSON em UTF-8, com datas marcadas ({"$data": "2024-01-31"})
+# para voltarem como date. Um texto com cara de data continua texto, como a
+# data que a busca textual devolve.
+
+PORTA_PADRAO = 8765
+
+
+def _padrao(valor):
+    if isinstance(valor, datetime):
+        return {"$data_hora": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$data": valor.isoformat()}
+    raise TypeError(f"{type(valor).__name__} não é serializável em JSON")
+
+
+def codificar(valor):
+    return json.dumps(valor, default=_padrao, ensure_ascii=False).encode("utf-8")
+
+
+def decodificar(dados, objeto=dict):
+    # objeto: o que cada dicionário do JSON vira (o cliente usa Registro).
+    def gancho(campos):
+        if len(campos) == 1:
+            if "$data" in campos:
+                return date.fromisoformat(campos["$data"])
+            if "$data_hora" in campos:
+                return datetime.fromisoformat(campos["$data_hora"])
+        return objeto(campos)
+    return json.loads(dados, object_hook=gancho) if dados else None
@@ -0,0 +1,129 @@
+import argparse
+from datetime import datetime
+
+from sqlalchemy import select, func
+
+from clinica import banco, resumos
+from clinica.modelos import Dono, Especie, Veterinario
+
+
+# Relatórios gerenciais lidos das tabelas de resumo (clinica/resumos.py): as
+# contagens por mês já estão prontas e o SQL só junta os nomes e calcula
+# posições, acumulados e variações com funções de janela. Os meses são textos
+# "YYYY-MM"; desde/ate incluem os extremos e também podem ser datas (vale o
+# mês: "2024-01-31" é "2024-01"). Com do_historico=True o mesmo
+# relatório é calculado direto de Consulta/Animal (para conferir os resumos).
+
+
+def _origem(resumo, do_historico):
+    return resumos.HISTORICO[resumo].subquery() if do_historico else resumo
+
+
+def normalizar_mes(valor):
+    # Mês, data ou texto "YYYY-MM"/"YYYY-MM-DD" -> "YYYY-MM", como nos resumos; vazio -> None.
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%Y-%m")
+    texto = str(valor).strip() if valor is not None else ""
+    if not texto:
+        return None
+    for formato in ("%Y-%m", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m")
+        except ValueError:
+            pass
+    raise ValueError(f"Mês inválido: {texto} (use YYYY-MM).")
+
+
+def _periodo(consulta, coluna, desde, ate):
+    # comparação de textos: só funciona com os dois lados em "YYYY-MM"
+    desde, ate = normalizar_mes(desde), normalizar_mes(ate)
+    if desde:
+        consulta = consulta.where(coluna >= desde)
+    if ate:
+        consulta = consulta.where(coluna <= ate)
+    return consulta
+
+
+def consultas_por_veterinario_mes(session, desde=None, ate=None, do_historico=False):
+    resumo = _origem(resumos.consultas_por_veterinario, do_historico)
+    por_veterinario = dict(partition_by=resumo.c.veterinario_id, order_by=resumo.c.mes)
+    consulta = (select(
+                    resumo.c.mes,
+                    Veterinario.nome.label("veterinario"),
+                    resumo.c.consultas,
+                    func.rank().over(partition_by=resumo.c.mes, order_by=resumo.c.consultas.desc()).label("posicao"),
+                    (resumo.c.consultas - func.lag(resumo.c.consultas).over(**por_veterinario)).label("variacao"),
+                    func.sum(resumo.c.consultas).over(**por_veterinario).label("acumulado"),
+                )
+                .join(Veterinario, Veterinario.id == resumo.c.veterinario_id))
+    consulta = _periodo(consulta, resumo.c.mes, desde, ate).order_by(resumo.c.mes, "posicao", Veterinario.nome)
+    return [dict(linha._mapping) for linha in session.execute(consulta)]
+
+
+def novos_pacientes_por_especie(session, desde=None, ate=None, do_historico=False):
+    resumo = _origem(resumos.novos_pacientes, do_historico)
+    consulta = (select(
+                    resumo.c.mes,
+                    func.coalesce(Especie.nome, "Sem espécie").label("especie"),
+                    resumo.c.animais,
+                    (resumo.c.animais * 100.0 / func.sum(resumo.c.animais).over(partition_by=resumo.c.mes)).label("percentual"),
+                    func.sum(resumo.c.animais).over(partition_by=resumo.c.especie_id, order_by=resumo.c.mes).label("acumulado"),
+                )
+                .outerjoin(Especie, Especie.id == resumo.c.especie_id))
+    consulta = _periodo(consulta, resumo.c.mes, desde, ate).order_by(resumo.c.mes, resumo.c.animais.desc())
+    return [dict(linha._mapping) for linha in session.execute(consulta)]
+
+
+def visitas_por_dono(session, desde=None, ate=None, limite=50, do_historico=False):
+    resumo = _origem(resumos.visitas_por_dono, do_historico)
+    por_dono = _periodo(
+        select(
+            resumo.c.dono_id,
+            func.sum(resumo.c.consultas).label("consultas"),
+            func.count().label("meses_com_visita"),
+            func.max(resumo.c.mes).label("ultimo_mes"),
+        ).group_by(resumo.c.dono_id),
+        resumo.c.mes, desde, ate
+    ).subquery()
+    consulta = (select(
+                    func.rank().over(order_by=por_dono.c.consultas.desc()).label("posicao"),
+                    Dono.nome.label("dono"),
+                    por_dono.c.consultas,
+                    por_dono.c.meses_com_visita,
+                    por_dono.c.ultimo_mes,
+                )
+                .join(Dono, Dono.id == por_dono.c.dono_id)
+                .order_by(por_dono.c.consultas.desc(), Dono.nome)
+                .limit(limite))
+    return [dict(linha._mapping) for linha in session.execute(consulta)]
+
+
+RELATORIOS = {
+    "veterinarios": consultas_por_veterinario_mes,
+    "especies": novos_pacientes_por_especie,
+    "donos": visitas_por_dono,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatórios gerenciais da clínica.")
+    parser.add_argument("relatorio", choices=list(RELATORIOS))
+    parser.add_argument("--desde", type=normalizar_mes, help="mês inicial (YYYY-MM)")
+    parser.add_argument("--ate", type=normalizar_mes, help="mês final (YYYY-MM)")
+    parser.add_argument("--historico", action="store_true", help="calcula do histórico em vez dos resumos")
+    parser.add_argument("--reconstruir", action="store_true", help="recalcula as tabelas de resumo antes")
+    parser.add_argument("--banco", default=banco.URL_PADRAO)
+    args = parser.parse_args()
+
+    engine = banco.configurar_banco(args.banco)
+    banco.inicializar_banco(engine)
+    if args.reconstruir:
+        resumos.reconstruir_resumos(engine)
+    with banco.unidade_de_trabalho() as session:
+        linhas = RELATORIOS[args.relatorio](session, args.desde, args.ate, do_historico=args.historico)
+    for linha in linhas:
+        print("  ".join(f"{chave}={valor}" for chave, valor in linha.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,532 @@
+from sqlalchemy import Date, String, and_, bindparam, delete, func, inspect, literal, null, or_, select, type_coerce, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, with_polymorphic
+from sqlalchemy.orm.exc import StaleDataError
+
+from clinica.arquivo import historico_consultas, historico_vacinas
+from clinica.cache import cache, marcar_alteracao
+from clinica.modelos import Dono, PessoaFisica, ONG, Telefone, Animal, Especie, Vacina, Consulta, Veterinario, normalizar_documento, normalizar_telefone
+
+
+# Funções de acesso a dados usadas pela interface gráfica e por scripts.
+# Nenhuma delas faz commit: quem chama decide o fim da transação.
+# As funções pagina_* paginam por chave (id > apos_id ... LIMIT), nunca por OFFSET.
+# Consultas e vacinas antigas ficam no arquivo (clinica/arquivo.py): só as
+# funções pagina_historico_* e pagina_linha_do_tempo as alcançam, devolvendo
+# linhas do Core.
+
+
+# Genéricas
+def _comeca_com(coluna, prefixo):
+    # Faixa [prefixo, prefixo + U+10FFFF): usa o índice B-tree da coluna, o que LIKE não faz no SQLite.
+    return and_(coluna >= prefixo, coluna < prefixo + '\U0010ffff')
+
+
+def _por_prefixo_em_cache(session, modelo, coluna, prefixo, limite):
+    # Tabelas de referência: filtra a tabela guardada no cache em vez de consultar a cada tecla.
+    todos = cache.tabela(session, modelo, lambda maximo: session.query(modelo).order_by(modelo.id).limit(maximo).all())
+    if todos is None:
+        return session.query(modelo).filter(_comeca_com(coluna, prefixo)).order_by(coluna).limit(limite).all()
+    encontrados = sorted((objeto for objeto in todos if getattr(objeto, coluna.key).startswith(prefixo)), key=lambda objeto: getattr(objeto, coluna.key))
+    return cache.incorporar(session, encontrados[:limite])
+
+
+def atualizar(session, objeto, **campos):
+    for nome, valor in campos.items():
+        setattr(objeto, nome, valor)
+    session.flush()
+    return objeto
+
+
+class Conflito(StaleDataError):
+    # Outra estação gravou o registro depois que ele foi lido. atual: colunas
+    # como estão no banco; outros: as que a outra estação mudou desde a leitura;
+    # meus: as que esta estação queria gravar.
+    def __init__(self, atual, originais, meus):
+        super().__init__("O registro foi alterado por outra estação depois de aberto.")
+        self.atual = atual
+        self.outros = {nome: valor for nome, valor in atual.items() if nome in originais and originais[nome] != valor}
+        self.meus = dict(meus)
+
+
+class JaCadastrado(ValueError):
+    # CPF/CNPJ ou registro profissional que outro cadastro já usa
+    pass
+
+
+def _inserir_unico(session, objeto, mensagem):
+    # Sem consulta antes: quem decide é o índice único, o que vale também para
+    # duas estações cadastrando o mesmo documento ao mesmo tempo.
+    session.add(objeto)
+    try:
+        session.flush()
+    except IntegrityError as erro:
+        if "UNIQUE" not in str(erro.orig):
+            raise
+        raise JaCadastrado(mensagem) from None
+    return objeto
+
+
+def conferir_versao(persistente, versao_lida, originais=None, meus=None):
+    # Concorrência otimista: nada fica travado enquanto a tela está aberta; na
+    # gravação, a versão lida tem que ser a que está no banco.
+    if versao_lida is not None and versao_lida != persistente.versao:
+        atual = {atributo.key: getattr(persistente, atributo.key) for atributo in inspect(persistente).mapper.column_attrs if atributo.key != "versao"}
+        raise Conflito(atual, originais or {}, meus or {})
+
+
+def _alteracoes(estado):
+    # (originais, meus): o valor lido de cada coluna carregada e as que a tela mudou.
+    originais, meus = {}, {}
+    for atributo in estado.mapper.column_attrs:
+        if atributo.key in estado.unloaded or atributo.key == "versao":
+            continue
+        historico = estado.attrs[atributo.key].history
+        originais[atributo.key] = (historico.deleted or historico.unchanged or [None])[0]
+        if historico.added and historico.added[0] != originais[atributo.key]:
+            meus[atributo.key] = historico.added[0]
+    return originais, meus
+
+
+def gravar(session, objeto, sobrepor=False):
+    # Leva ao banco as colunas alteradas de um objeto lido por outra sessão
+    # (as telas recebem objetos desanexados das tarefas em segundo plano).
+    # Se outra estação gravou o registro nesse meio tempo, levanta Conflito;
+    # com sobrepor, as colunas alteradas aqui vão por cima da versão atual e as
+    # outras ficam como a outra estação deixou.
+    estado = inspect(objeto)
+    persistente = session.get(type(objeto), estado.identity)
+    if persistente is None:
+        raise ValueError("Registro não encontrado; ele pode ter sido removido.")
+    originais, meus = _alteracoes(estado)
+    if not sobrepor:
+        conferir_versao(persistente, getattr(objeto, "versao", None), originais, meus)
+    for chave, valor in meus.items():
+        setattr(persistente, chave, valor)
+    session.flush()
+    return persistente
+
+
+def rotulo_em_lote(objeto_id, nome):
+    # Nome de uma coluna num Conflito de vários registros.
+    return f"{nome} (#{objeto_id})"
+
+
+def atualizar_varios(session, modelo, alteracoes, sobrepor=False):
+    # alteracoes: (id, versão lida, valores lidos, colunas novas) de cada
+    # registro de um modelo de uma tabela só. Uma leitura das linhas atuais e um
+    # único UPDATE em lote (executemany), conferindo a versão de cada linha; o
+    # ORM faria um UPDATE por linha (com version_id_col não há executemany).
+    # Uma coluna que outro registro do lote mudou é regravada com o valor atual.
+    tabela = inspect(modelo).local_table
+    ids = [objeto_id for objeto_id, _, _, _ in alteracoes]
+    atuais = {linha.id: linha._asdict() for linha in session.execute(select(tabela).where(tabela.c.id.in_(ids)))}
+    faltando = [str(objeto_id) for objeto_id in ids if objeto_id not in atuais]
+    if faltando:
+        raise ValueError(f"Registro(s) {', '.join(faltando)} não encontrado(s); podem ter sido removidos.")
+    if not sobrepor:
+        conflitos = [(objeto_id, originais, meus) for objeto_id, versao, originais, meus in alteracoes
+                     if versao is not None and versao != atuais[objeto_id]["versao"]]
+        if conflitos:
+            raise Conflito({rotulo_em_lote(i, nome): valor for i, _, _ in conflitos for nome, valor in atuais[i].items() if nome != "versao"},
+                           {rotulo_em_lote(i, nome): valor for i, originais, _ in conflitos for nome, valor in originais.items()},
+                           {rotulo_em_lote(i, nome): valor for i, _, meus in conflitos for nome, valor in meus.items()})
+    colunas = set().union(*(meus for _, _, _, meus in alteracoes))
+    parametros = [{**{nome: atuais[i][nome] for nome in colunas}, **meus, "b_id": i, "b_versao": atuais[i]["versao"]}
+                  for i, _, _, meus in alteracoes]
+    comando = (update(tabela)
+               .where(tabela.c.id == bindparam("b_id"), tabela.c.versao == bindparam("b_versao"))
+               .values(versao=tabela.c.versao + 1))
+    if session.execute(comando, parametros).rowcount != len(parametros):
+        raise StaleDataError(f'UPDATE em "{tabela.name}": outra estação gravou um dos registros durante a gravação.')
+    marcar_alteracao(session, modelo)  # o Core não passa pelos eventos que invalidam o cache
+    return len(parametros)
+
+
+def gravar_varios(session, objetos, sobrepor=False):
+    # Como gravar, para vários registros de um modelo editados numa tela só (a
+    # grade das vacinas de um animal): uma transação e um UPDATE em lote.
+    alteracoes = []
+    for objeto in objetos:
+        originais, meus = _alteracoes(inspect(objeto))
+        if meus:
+            alteracoes.append((objeto, originais, meus))
+    if not alteracoes:
+        return 0
+    modelo = type(alteracoes[0][0])
+    if len(inspect(modelo).tables) > 1:
+        # herança em duas tabelas (PessoaFisica, ONG): um registro por vez
+        for objeto, _, _ in alteracoes:
+            gravar(session, objeto, sobrepor)
+        return len(alteracoes)
+    return atualizar_varios(session, modelo, [(objeto.id, objeto.versao, originais, meus) for objeto, originais, meus in alteracoes], sobrepor)
+
+
+def remover(session, objeto):
+    session.delete(objeto)
+    session.flush()
+
+
+LOTE_REMOCAO = 500
+
+
+def _remover_em_massa(session, coluna, ids):
+    # Um DELETE por lote de ids. Os dependentes saem (ou ficam sem o vínculo) pelo
+    # ON DELETE das chaves estrangeiras, sem serem carregados na sessão.
+    removidos = 0
+    for inicio in range(0, len(ids), LOTE_REMOCAO):
+        removidos += session.execute(delete(coluna.class_).where(coluna.in_(ids[inicio:inicio + LOTE_REMOCAO]))).rowcount
+    return removidos
+
+
+# Donos (Pessoa Física e ONG)
+# Um único alias: criado a cada chamada, a consulta não aproveitaria o cache de compilação.
+_DONOS_E_SUBCLASSES = with_polymorphic(Dono, "*")
+
+
+def _separar_telefones(telefones):
+    if isinstance(telefones, str):
+        telefones = telefones.split(',')
+    return [numero.strip() for numero in telefones if numero.strip()]
+
+
+def criar_pessoa_fisica(session, nome, cpf, endereco_cep, endereco_rua=None, endereco_cidade=None, endereco_complemento=None, telefones=()):
+    pessoa_fisica = PessoaFisica(
+        nome=nome,
+        cpf=cpf,
+        endereco_cep=endereco_cep,
+        endereco_rua=endereco_rua,
+        endereco_cidade=endereco_cidade,
+        endereco_complemento=endereco_complemento,
+        telefones=[Telefone(numero=numero) for numero in _separar_telefones(telefones)]
+    )
+    return _inserir_unico(session, pessoa_fisica, f"Documento {cpf} já cadastrado.")
+
+
+def criar_ong(session, nome, cnpj, endereco_cep, endereco_rua=None, endereco_cidade=None, endereco_complemento=None, telefones=()):
+    ong = ONG(
+        nome=nome,
+        cnpj=cnpj,
+        endereco_cep=endereco_cep,
+        endereco_rua=endereco_rua,
+        endereco_cidade=endereco_cidade,
+        endereco_complemento=endereco_complemento,
+        telefones=[Telefone(numero=numero) for numero in _separar_telefones(telefones)]
+    )
+    return _inserir_unico(session, ong, f"Documento {cnpj} já cadastrado.")
+
+
+def buscar_dono_por_documento(session, documento, com_telefones=False):
+    # CPF ou CNPJ, com ou sem pontuação: uma consulta pelo índice de Dono.documento,
+    # já trazendo as colunas da subclasse (PessoaFisica ou ONG).
+    documento = normalizar_documento(documento)
+    if documento is None:
+        return None
+    consulta = session.query(_DONOS_E_SUBCLASSES).filter(_DONOS_E_SUBCLASSES.documento == documento)
+    if com_telefones:
+        consulta = consulta.options(selectinload(_DONOS_E_SUBCLASSES.telefones))
+    return consulta.first()
+
+
+def buscar_pessoa_fisica(session, cpf, com_telefones=False):
+    dono = buscar_dono_por_documento(session, cpf, com_telefones)
+    return dono if isinstance(dono, PessoaFisica) else None
+
+
+def buscar_ong(session, cnpj, com_telefones=False):
+    dono = buscar_dono_por_documento(session, cnpj, com_telefones)
+    return dono if isinstance(dono, ONG) else None
+
+
+def buscar_pessoas_fisicas_por_prefixo(session, prefixo, limite=20):
+    documento = normalizar_documento(prefixo)
+    if documento and documento.isdigit():
+        coluna, prefixo = PessoaFisica.documento, documento
+    else:
+        coluna = PessoaFisica.nome
+    return session.query(PessoaFisica).filter(_comeca_com(coluna, prefixo)).order_by(coluna).limit(limite).all()
+
+
+def buscar_dono(session, dono_id):
+    return session.get(Dono, dono_id)
+
+
+def buscar_pessoa_fisica_por_nome_ou_cpf(session, nome_ou_cpf):
+    condicao = PessoaFisica.nome == nome_ou_cpf
+    documento = normalizar_documento(nome_ou_cpf)
+    if documento is not None:
+        condicao = condicao | (PessoaFisica.documento == documento)
+    return session.query(PessoaFisica).filter(condicao).first()
+
+
+def definir_telefones(session, dono, telefones):
+    dono = session.get(Dono, dono.id, options=[selectinload(Dono.telefones)])
+    dono.telefones.clear()
+    for numero in _separar_telefones(telefones):
+        dono.telefones.append(Telefone(numero=numero))
+    session.flush()
+    return dono
+
+
+def remover_donos(session, dono_ids, com_animais=False):
+    # Os telefones vão junto; os animais ficam sem dono, a não ser com com_animais.
+    dono_ids = list(dono_ids)
+    if com_animais:
+        _remover_em_massa(session, Animal.dono_id, dono_ids)
+    return _remover_em_massa(session, Dono.id, dono_ids)
+
+
+MIN_DIGITOS_TELEFONE = 4
+
+
+def buscar_donos_por_telefone(session, numero, limite=20):
+    # Número completo ou só o final (sem DDD, últimos dígitos): "termina com" vira
+    # uma faixa de prefixo no índice dos dígitos invertidos. Para a tela de quem
+    # está ligando devolve linhas prontas (um único SELECT), não objetos.
+    digitos = normalizar_telefone(numero)
+    if digitos is None or len(digitos) < MIN_DIGITOS_TELEFONE:
+        return []
+    dono, pessoa_fisica, ong, telefone = Dono.__table__, PessoaFisica.__table__, ONG.__table__, Telefone.__table__
+    ids = select(telefone.c.dono_id).where(_comeca_com(telefone.c.digitos_invertidos, digitos[::-1])).distinct().limit(limite)
+    telefones = select(func.group_concat(telefone.c.numero, ",")).where(telefone.c.dono_id == dono.c.id).scalar_subquery()
+    consulta = (select(dono.c.id, dono.c.nome, dono.c.tipo, func.coalesce(pessoa_fisica.c.cpf, ong.c.cnpj).label("documento"), telefones.label("telefones"))
+                .select_from(dono.outerjoin(pessoa_fisica, pessoa_fisica.c.id == dono.c.id).outerjoin(ong, ong.c.id == dono.c.id))
+                .where(dono.c.id.in_(ids))
+                .order_by(dono.c.nome))
+    return [{**linha._mapping, "telefones": linha.telefones.split(",") if linha.telefones else []} for linha in session.execute(consulta)]
+
+
+# Espécie
+def criar_especie(session, nome, descricao, subespecie):
+    especie = Especie(nome=nome, descricao=descricao, subespecie=subespecie)
+    session.add(especie)
+    session.flush()
+    return especie
+
+
+def pagina_especies(session, apos_id=0, limite=100):
+    return session.query(Especie).filter(Especie.id > apos_id).order_by(Especie.id).limit(limite).all()
+
+
+def buscar_especie(session, nome):
+    return cache.buscar(session, Especie, "nome", nome, lambda: session.query(Especie).filter(Especie.nome == nome).first())
+
+
+def buscar_especie_por_id(session, especie_id):
+    return cache.buscar(session, Especie, "id", especie_id, lambda: session.get(Especie, especie_id))
+
+
+def buscar_especies_por_prefixo(session, prefixo, limite=20):
+    return _por_prefixo_em_cache(session, Especie, Especie.nome, prefixo, limite)
+
+
+# Vacina
+def criar_vacina(session, nome, status, data_aplicacao, prox_aplicacao, animal):
+    vacina = Vacina(
+        nome=nome,
+        status=status,
+        data_aplicacao=data_aplicacao,
+        prox_aplicacao=prox_aplicacao,
+        animal_id=animal.id
+    )
+    session.add(vacina)
+    session.flush()
+    return vacina
+
+
+def listar_vacinas_do_animal(session, animal_id):
+    return session.query(Vacina).filter(Vacina.animal_id == animal_id).all()
+
+
+def pagina_vacinas_do_animal(session, animal_id, apos_id=0, limite=100):
+    return (session.query(Vacina)
+            .filter(Vacina.animal_id == animal_id, Vacina.id > apos_id)
+            .order_by(Vacina.id)
+            .limit(limite)
+            .all())
+
+
+def pagina_historico_vacinas_do_animal(session, animal_id, apos_id=0, limite=100):
+    historico = historico_vacinas.c
+    return session.execute(select(historico_vacinas)
+                           .where(historico.animal_id == animal_id, historico.id > apos_id)
+                           .order_by(historico.id)
+                           .limit(limite)).all()
+
+
+def buscar_vacina(session, vacina_id):
+    return session.query(Vacina).filter(Vacina.id == vacina_id).first()
+
+
+# Animal
+def criar_animal(session, nome, data_nasc, tratamentos_realizados, especie, dono):
+    animal = Animal(
+        nome=nome,
+        data_nasc=data_nasc,
+        tratamentos_realizados=tratamentos_realizados,
+        especie=especie,
+        dono=dono
+    )
+    session.add(animal)
+    session.flush()
+    return animal
+
+
+def listar_animais_do_dono(session, dono_id):
+    return session.query(Animal).filter(Animal.dono_id == dono_id).all()
+
+
+def buscar_animal(session, animal_id):
+    return session.query(Animal).filter(Animal.id == animal_id).first()
+
+
+def ficha_animal(session, animal_id):
+    # Cabeçalho da tela de detalhes do animal, numa consulta só; consultas e
+    # vacinas vêm aos poucos por pagina_linha_do_tempo.
+    return (session.query(Animal)
+            .options(
+                joinedload(Animal.especie),
+                joinedload(Animal.dono),
+            )
+            .filter(Animal.id == animal_id)
+            .first())
+
+
+def buscar_animal_por_nome(session, nome):
+    return session.query(Animal).filter(Animal.nome == nome).first()
+
+
+def buscar_animais_por_prefixo(session, prefixo, limite=20):
+    return session.query(Animal).filter(_comeca_com(Animal.nome, prefixo)).order_by(Animal.nome).limit(limite).all()
+
+
+def remover_animais(session, animal_ids):
+    # Consultas, vacinas e vínculos com veterinários vão junto.
+    return _remover_em_massa(session, Animal.id, list(animal_ids))
+
+
+def buscar_animal_do_dono(session, dono_id, nome):
+    return session.query(Animal).filter(Animal.nome == nome, Animal.dono_id == dono_id).first()
+
+
+# Consulta
+def criar_consulta(session, data_consulta, animal, veterinario, descricao):
+    consulta = Consulta(
+        data_consulta=data_consulta,
+        animal=animal,
+        veterinario=veterinario,
+        descricao=descricao
+    )
+    session.add(consulta)
+    session.flush()
+    return consulta
+
+
+def listar_consultas_do_animal(session, animal_id):
+    return session.query(Consulta).filter(Consulta.animal_id == animal_id).all()
+
+
+def pagina_consultas_do_animal(session, animal_id, apos_id=0, limite=100):
+    return (session.query(Consulta)
+            .options(joinedload(Consulta.veterinario))
+            .filter(Consulta.animal_id == animal_id, Consulta.id > apos_id)
+            .order_by(Consulta.id)
+            .limit(limite)
+            .all())
+
+
+def pagina_historico_consultas_do_animal(session, animal_id, apos_id=0, limite=100):
+    historico = historico_consultas.c
+    veterinario = Veterinario.__table__.c
+    return session.execute(select(historico_consultas, veterinario.nome.label("veterinario"), veterinario.especializacao, veterinario.numero_reg_prof)
+                           .join(Veterinario.__table__, veterinario.id == historico.veterinario_id)
+                           .where(historico.animal_id == animal_id, historico.id > apos_id)
+                           .order_by(historico.id)
+                           .limit(limite)).all()
+
+
+def buscar_consulta(session, consulta_id):
+    return session.query(Consulta).filter(Consulta.id == consulta_id).first()
+
+
+# Linha do tempo do animal: consultas e vacinas (inclusive arquivadas), da mais
+# recente para a mais antiga. O cursor é (data, tipo, id) do último evento lido;
+# "tipo" desempata eventos do mesmo dia.
+EVENTO_CONSULTA, EVENTO_VACINA = 0, 1
+
+
+def _eventos_do_animal(visao, tipo, data, colunas, tipo_apos):
+    # Com o tipo fixo em cada lado, "(data, tipo, id) < cursor" vira uma faixa
+    # em data no índice (animal_id, data) e cada lado lê no máximo uma página.
+    filtros = [visao.c.animal_id == bindparam("animal_id")]
+    if tipo_apos is not None:
+        data_apos, id_apos = bindparam("data_apos", type_=Date), bindparam("id_apos")
+        if tipo > tipo_apos:
+            filtros.append(data < data_apos)
+        elif tipo < tipo_apos:
+            filtros.append(data <= data_apos)
+        else:
+            filtros += [data <= data_apos, or_(data < data_apos, visao.c.id < id_apos)]
+    return (select(literal(tipo).label("tipo"), visao.c.id, data.label("data"), *colunas, visao.c.arquivada)
+            .where(*filtros)
+            .order_by(data.desc(), visao.c.id.desc())
+            .limit(bindparam("limite"))
+            .subquery())
+
+
+def _linha_do_tempo(tipo_apos):
+    consulta, vacina = historico_consultas.c, historico_vacinas.c
+    consultas = _eventos_do_animal(historico_consultas, EVENTO_CONSULTA, consulta.data_consulta, [
+        consulta.descricao, consulta.veterinario_id, type_coerce(null(), String).label("status"), type_coerce(null(), Date).label("prox_aplicacao"),
+    ], tipo_apos)
+    vacinas = _eventos_do_animal(historico_vacinas, EVENTO_VACINA, vacina.data_aplicacao, [
+        vacina.nome.label("descricao"), null().label("veterinario_id"), vacina.status, vacina.prox_aplicacao,
+    ], tipo_apos)
+    eventos = union_all(select(consultas), select(vacinas)).subquery("eventos")
+    veterinario = Veterinario.__table__.c
+    return (select(eventos, veterinario.nome.label("veterinario"))
+            .outerjoin(Veterinario.__table__, veterinario.id == eventos.c.veterinario_id)
+            .order_by(eventos.c.data.desc(), eventos.c.tipo.desc(), eventos.c.id.desc())
+            .limit(bindparam("limite")))
+
+
+# Montadas uma vez (primeira página e cursor em cada tipo): montar a consulta
+# custava mais que executá-la.
+_LINHA_DO_TEMPO = {tipo_apos: _linha_do_tempo(tipo_apos) for tipo_apos in (None, EVENTO_CONSULTA, EVENTO_VACINA)}
+
+
+def pagina_linha_do_tempo(session, animal_id, apos=None, limite=100):
+    parametros = {"animal_id": animal_id, "limite": limite}
+    if apos is not None:
+        parametros["data_apos"], tipo_apos, parametros["id_apos"] = apos
+    else:
+        tipo_apos = None
+    return session.execute(_LINHA_DO_TEMPO[tipo_apos], parametros).all()
+
+
+# Veterinário
+def criar_veterinario(session, nome, especializacao, numero_reg_prof):
+    veterinario = Veterinario(nome=nome, especializacao=especializacao, numero_reg_prof=numero_reg_prof)
+    return _inserir_unico(session, veterinario, f"Registro profissional {numero_reg_prof} já cadastrado.")
+
+
+def buscar_veterinario(session, numero_reg_prof):
+    return cache.buscar(session, Veterinario, "numero_reg_prof", numero_reg_prof,
+                        lambda: session.query(Veterinario).filter(Veterinario.numero_reg_prof == numero_reg_prof).first())
+
+
+def buscar_veterinario_por_nome(session, nome):
+    return session.query(Veterinario).filter(Veterinario.nome == nome).first()
+
+
+def buscar_veterinario_por_id(session, veterinario_id):
+    return cache.buscar(session, Veterinario, "id", veterinario_id, lambda: session.get(Veterinario, veterinario_id))
+
+
+def buscar_veterinarios_por_prefixo(session, prefixo, limite=20):
+    return _por_prefixo_em_cache(session, Veterinario, Veterinario.nome, prefixo, limite)
+
+
+def remover_veterinarios(session, veterinario_ids):
+    # As consultas do veterinário vão junto, como na remoção pelo ORM.
+    return _remover_em_massa(session, Veterinario.id, list(veterinario_ids))
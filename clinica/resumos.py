@@ -0,0 +1,162 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String, select, func, inspect, text
+
+from clinica.arquivo import FORA_DO_ARQUIVAMENTO, historico_consultas
+from clinica.modelos import Animal
+
+
+# Tabelas de resumo dos relatórios gerenciais (clinica/relatorios.py), uma linha
+# por chave e mês ("YYYY-MM"; "" quando a data é desconhecida). Triggers mantêm
+# as contagens a cada inserção, remoção ou mudança de Consulta e Animal, venha
+# a escrita do ORM, do importador ou de SQL direto; os painéis leem poucas
+# linhas em vez de varrer o histórico. reconstruir_resumos() recalcula tudo a
+# partir do histórico (criação das tabelas num banco antigo, conferência).
+#
+# Consultas movidas para o arquivo (clinica/arquivo.py) continuam contadas, mas
+# os triggers não as alcançam: se o animal muda de dono, as visitas arquivadas
+# ficam com o anterior até a próxima reconstrução (o arquivamento reconstrói
+# quando remove linhas arquivadas de animais ou veterinários que não existem mais).
+
+metadata = MetaData()
+
+consultas_por_veterinario = Table("resumo_consultas_veterinario", metadata,
+    Column("veterinario_id", Integer, primary_key=True),
+    Column("mes", String, primary_key=True),
+    Column("consultas", Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+novos_pacientes = Table("resumo_novos_pacientes", metadata,
+    Column("especie_id", Integer, primary_key=True),  # 0: sem espécie
+    Column("mes", String, primary_key=True),
+    Column("animais", Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+visitas_por_dono = Table("resumo_visitas_dono", metadata,
+    Column("dono_id", Integer, primary_key=True),  # 0: animal sem dono
+    Column("mes", String, primary_key=True),
+    Column("consultas", Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+
+def _mes(coluna):
+    return func.coalesce(func.substr(coluna, 1, 7), "")
+
+
+# As mesmas contagens calculadas direto do histórico (consultas arquivadas inclusive).
+_consulta = historico_consultas.c
+HISTORICO = {
+    consultas_por_veterinario: select(
+            _consulta.veterinario_id.label("veterinario_id"),
+            _mes(_consulta.data_consulta).label("mes"),
+            func.count().label("consultas"))
+        .group_by(_consulta.veterinario_id, _mes(_consulta.data_consulta)),
+    novos_pacientes: select(
+            func.coalesce(Animal.especie_id, 0).label("especie_id"),
+            _mes(Animal.data_cadastro).label("mes"),
+            func.count().label("animais"))
+        .group_by(func.coalesce(Animal.especie_id, 0), _mes(Animal.data_cadastro)),
+    visitas_por_dono: select(
+            func.coalesce(Animal.dono_id, 0).label("dono_id"),
+            _mes(_consulta.data_consulta).label("mes"),
+            func.count().label("consultas"))
+        .select_from(historico_consultas.outerjoin(Animal.__table__, Animal.id == _consulta.animal_id))
+        .group_by(func.coalesce(Animal.dono_id, 0), _mes(_consulta.data_consulta)),
+}
+
+
+# resumo -> (tabela, colunas da chave, contador, expressões da chave com {l} = NEW/OLD)
+_MES_CONSULTA = "coalesce(substr({l}.data_consulta, 1, 7), '')"
+_CHAVES = {
+    "veterinario": ("resumo_consultas_veterinario", ("veterinario_id", "mes"), "consultas",
+                    ("{l}.veterinario_id", _MES_CONSULTA)),
+    "dono": ("resumo_visitas_dono", ("dono_id", "mes"), "consultas",
+             ('coalesce((SELECT dono_id FROM "Animal" WHERE id = {l}.animal_id), 0)', _MES_CONSULTA)),
+    "especie": ("resumo_novos_pacientes", ("especie_id", "mes"), "animais",
+                ("coalesce({l}.especie_id, 0)", "coalesce(substr({l}.data_cadastro, 1, 7), '')")),
+}
+
+
+def _somar(resumo, linha):
+    tabela, chave, contador, expressoes = _CHAVES[resumo]
+    colunas = ", ".join(chave)
+    valores = ", ".join(expressao.format(l=linha) for expressao in expressoes)
+    return (f"INSERT INTO {tabela} ({colunas}, {contador}) VALUES ({valores}, 1) "
+            f"ON CONFLICT ({colunas}) DO UPDATE SET {contador} = {contador} + 1;")
+
+
+def _subtrair(resumo, linha, se=None):
+    tabela, chave, contador, expressoes = _CHAVES[resumo]
+    condicao = " AND ".join(f"{coluna} = {expressao.format(l=linha)}" for coluna, expressao in zip(chave, expressoes))
+    if se:
+        condicao = f"{condicao} AND {se}"
+    return (f"UPDATE {tabela} SET {contador} = {contador} - 1 WHERE {condicao};"
+            f"DELETE FROM {tabela} WHERE {condicao} AND {contador} <= 0;")
+
+
+def _trigger(nome, evento, corpo, quando=None, momento="AFTER"):
+    quando = f" WHEN {quando}" if quando else ""
+    return nome, f"CREATE TRIGGER {nome} {momento} {evento}{quando} BEGIN {' '.join(corpo)} END"
+
+
+_TRIGGERS = dict([
+    _trigger("resumo_consulta_insert", 'INSERT ON "Consulta"', [_somar("veterinario", "new"), _somar("dono", "new")]),
+    # removida junto com o animal (ON DELETE CASCADE): o dono já não é encontrado e
+    # as visitas dele saíram em resumo_animal_delete_visitas
+    _trigger("resumo_consulta_delete", 'DELETE ON "Consulta"', [
+        _subtrair("veterinario", "old"),
+        _subtrair("dono", "old", 'EXISTS (SELECT 1 FROM "Animal" WHERE id = old.animal_id)'),
+    ], FORA_DO_ARQUIVAMENTO),
+    _trigger("resumo_consulta_update", 'UPDATE OF data_consulta, veterinario_id, animal_id ON "Consulta"',
+             [_subtrair("veterinario", "old"), _subtrair("dono", "old"), _somar("veterinario", "new"), _somar("dono", "new")],
+             "old.data_consulta IS NOT new.data_consulta OR old.veterinario_id IS NOT new.veterinario_id OR old.animal_id IS NOT new.animal_id"),
+    _trigger("resumo_animal_insert", 'INSERT ON "Animal"', [_somar("especie", "new")]),
+    _trigger("resumo_animal_delete", 'DELETE ON "Animal"', [_subtrair("especie", "old")]),
+    # antes da remoção, enquanto as consultas do animal ainda existem
+    _trigger("resumo_animal_delete_visitas", 'DELETE ON "Animal"', [
+        """UPDATE resumo_visitas_dono SET consultas = consultas - (
+               SELECT count(*) FROM "Consulta" AS c
+               WHERE c.animal_id = old.id AND coalesce(substr(c.data_consulta, 1, 7), '') = resumo_visitas_dono.mes)
+           WHERE dono_id = coalesce(old.dono_id, 0)
+             AND mes IN (SELECT coalesce(substr(data_consulta, 1, 7), '') FROM "Consulta" WHERE animal_id = old.id);""",
+        "DELETE FROM resumo_visitas_dono WHERE dono_id = coalesce(old.dono_id, 0) AND consultas <= 0;",
+    ], momento="BEFORE"),
+    _trigger("resumo_animal_update", 'UPDATE OF especie_id, data_cadastro ON "Animal"',
+             [_subtrair("especie", "old"), _somar("especie", "new")],
+             "old.especie_id IS NOT new.especie_id OR old.data_cadastro IS NOT new.data_cadastro"),
+    # animal trocou de dono: as consultas dele passam para o dono novo, mês a mês
+    _trigger("resumo_animal_dono", 'UPDATE OF dono_id ON "Animal"', [
+        """UPDATE resumo_visitas_dono SET consultas = consultas - (
+               SELECT count(*) FROM "Consulta" AS c
+               WHERE c.animal_id = new.id AND coalesce(substr(c.data_consulta, 1, 7), '') = resumo_visitas_dono.mes)
+           WHERE dono_id = coalesce(old.dono_id, 0)
+             AND mes IN (SELECT coalesce(substr(data_consulta, 1, 7), '') FROM "Consulta" WHERE animal_id = new.id);""",
+        "DELETE FROM resumo_visitas_dono WHERE dono_id = coalesce(old.dono_id, 0) AND consultas <= 0;",
+        """INSERT INTO resumo_visitas_dono (dono_id, mes, consultas)
+               SELECT coalesce(new.dono_id, 0), coalesce(substr(data_consulta, 1, 7), ''), count(*) FROM "Consulta"
+               WHERE animal_id = new.id GROUP BY 2
+           ON CONFLICT (dono_id, mes) DO UPDATE SET consultas = consultas + excluded.consultas;""",
+    ], "old.dono_id IS NOT new.dono_id"),
+])
+
+
+def criar_resumos(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    novas = [tabela for tabela in metadata.sorted_tables if not inspect(engine).has_table(tabela.name)]
+    metadata.create_all(engine)
+    with engine.begin() as conexao:
+        # recriados sempre, para que um banco existente receba a versão atual de cada um
+        for nome, comando in _TRIGGERS.items():
+            conexao.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+            conexao.execute(text(comando))
+    if novas:
+        reconstruir_resumos(engine)
+
+
+def reconstruir_resumos(engine):
+    with engine.begin() as conexao:
+        for tabela, consulta in HISTORICO.items():
+            conexao.execute(tabela.delete())
+            conexao.execute(tabela.insert().from_select([coluna.name for coluna in tabela.columns], consulta))
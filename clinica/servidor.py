@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from sqlalchemy import Date, inspect
+from sqlalchemy.engine import Row, RowMapping
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from clinica import banco, busca, relatorios, repositorio
+from clinica.modelos import Base, Dono, Animal, Consulta, Vacina, Veterinario, Especie
+from clinica.protocolo import PORTA_PADRAO, codificar, decodificar
+from clinica.vacinas_pendentes import vacinas_pendentes
+
+
+# Servidor HTTP/JSON da clínica: um único processo abre o clinica_vet.db e as
+# estações (python main.py --servidor http://maquina:8765) falam com ele. As
+# leituras rodam em paralelo num grupo limitado de threads, com o pool de
+# conexões do mesmo tamanho; as escritas passam uma por vez por uma thread só,
+# então as estações não disputam entre si a trava de escrita do SQLite. Cada
+# pedido é uma transação (banco.em_transacao). Os objetos vão como JSON com as
+# colunas e os relacionamentos que a função do repositório carregou.
+#
+#   python -m clinica.servidor [--host H] [--porta N] [--leitores N] [--banco URL] [--perfil wal]
+
+LEITORES = 8
+LIMITE_MAXIMO = 1000
+CORPO_MAXIMO = 1 << 20
+
+
+class NaoEncontrado(LookupError):
+    pass
+
+
+# Parâmetros da URL e campos do corpo
+def _inteiro(parametros, nome, padrao=None):
+    valor = parametros.get(nome)
+    if valor in (None, ""):
+        if padrao is None:
+            raise ValueError(f"Informe {nome}.")
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"{nome} deve ser um número inteiro.") from None
+
+
+def _data(parametros, nome):
+    valor = parametros.get(nome)
+    if valor in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"{nome} deve ser uma data AAAA-MM-DD.") from None
+
+
+def _limite(parametros, padrao=100):
+    return min(_inteiro(parametros, "limite", padrao), LIMITE_MAXIMO)
+
+
+def _existente(objeto, descricao):
+    if objeto is None:
+        raise NaoEncontrado(f"{descricao} não encontrado(a).")
+    return objeto
+
+
+def _campos(corpo, modelo, obrigatorios=(), opcionais=()):
+    # Só as colunas previstas; datas podem vir marcadas ou como texto AAAA-MM-DD.
+    if not isinstance(corpo, dict):
+        raise ValueError("O corpo deve ser um objeto JSON.")
+    desconhecidos = set(corpo) - set(obrigatorios) - set(opcionais)
+    if desconhecidos:
+        raise ValueError(f"Campo(s) desconhecido(s): {', '.join(sorted(desconhecidos))}.")
+    faltando = [nome for nome in obrigatorios if corpo.get(nome) in (None, "")]
+    if faltando:
+        raise ValueError(f"Campo(s) obrigatório(s): {', '.join(faltando)}.")
+    colunas = inspect(modelo).columns
+    campos = {}
+    for nome, valor in corpo.items():
+        if nome in colunas and isinstance(colunas[nome].type, Date) and isinstance(valor, str):
+            valor = _data(corpo, nome)
+        campos[nome] = valor
+    return campos
+
+
+def _para_json(valor, caminho=()):
+    # Objetos do ORM viram dicionários com "_tipo" (a classe) e só o que já está
+    # carregado: nada de lazy load fora da tela que pediu.
+    if isinstance(valor, Base):
+        estado = inspect(valor)
+        campos = {"_tipo": type(valor).__name__}
+        for atributo in estado.mapper.column_attrs:
+            if atributo.key not in estado.unloaded:
+                campos[atributo.key] = getattr(valor, atributo.key)
+        for relacao in estado.mapper.relationships:
+            if relacao.key not in estado.unloaded:
+                relacionado = getattr(valor, relacao.key)
+                if relacionado is None or relacionado in caminho:
+                    campos[relacao.key] = None if relacionado is None else {"_tipo": type(relacionado).__name__, "id": relacionado.id}
+                elif isinstance(relacionado, Base):
+                    campos[relacao.key] = _para_json(relacionado, caminho + (valor,))
+                else:
+                    campos[relacao.key] = [_para_json(item, caminho + (valor,)) for item in relacionado if item not in caminho]
+        return campos
+    if isinstance(valor, Row):
+        return dict(valor._mapping)
+    if isinstance(valor, RowMapping):
+        return dict(valor)
+    if isinstance(valor, dict):
+        return {chave: _para_json(item, caminho) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_json(item, caminho) for item in valor]
+    return valor
+
+
+# Recursos: leituras recebem (session, parametros, *grupos da URL); escritas
+# recebem também o corpo, depois dos parâmetros.
+RECURSOS = {
+    "donos": (Dono, repositorio.buscar_dono, "Dono"),
+    "animais": (Animal, repositorio.buscar_animal, "Animal"),
+    "consultas": (Consulta, repositorio.buscar_consulta, "Consulta"),
+    "vacinas": (Vacina, repositorio.buscar_vacina, "Vacina"),
+    "veterinarios": (Veterinario, repositorio.buscar_veterinario_por_id, "Veterinário"),
+    "especies": (Especie, repositorio.buscar_especie_por_id, "Espécie"),
+}
+_RECURSO = "/(" + "|".join(RECURSOS) + ")"
+
+COLUNAS_DE_DONO = ("nome", "endereco_cep", "endereco_rua", "endereco_cidade", "endereco_complemento", "telefones")
+
+
+def _buscar(session, parametros, recurso, objeto_id):
+    _, buscar, descricao = RECURSOS[recurso]
+    return _existente(buscar(session, int(objeto_id)), descricao)
+
+
+def _editaveis(modelo):
+    return [atributo.key for atributo in inspect(modelo).column_attrs if atributo.key not in ("id", "tipo", "documento")]
+
+
+def _alterar(session, parametros, corpo, recurso, objeto_id):
+    # Como repositorio.gravar: só as colunas enviadas, conferindo a versão lida
+    # ("versao" no corpo; sem ela, grava por cima da atual). Chave, tipo e
+    # documento normalizado não mudam por aqui.
+    modelo, _, descricao = RECURSOS[recurso]
+    objeto = _existente(session.get(modelo, int(objeto_id)), descricao)
+    campos = _campos(corpo, type(objeto), opcionais=_editaveis(type(objeto)))
+    if "versao" in campos:
+        repositorio.conferir_versao(objeto, _inteiro(campos, "versao"))
+        del campos["versao"]
+    return repositorio.atualizar(session, objeto, **campos)
+
+
+def _alterar_varios(session, parametros, corpo, recurso):
+    # Como repositorio.atualizar_varios: uma lista de {"id", "versao", colunas},
+    # gravada num UPDATE em lote. Donos (duas tabelas) vão um por vez.
+    modelo, _, descricao = RECURSOS[recurso]
+    if len(inspect(modelo).tables) > 1 or inspect(modelo).polymorphic_map:
+        raise ValueError(f"{descricao}: altere um registro por vez.")
+    if not isinstance(corpo, list) or not corpo:
+        raise ValueError("O corpo deve ser uma lista de registros.")
+    alteracoes = []
+    for item in corpo:
+        campos = _campos(item, modelo, ("id",), _editaveis(modelo))
+        objeto_id = _inteiro(campos, "id")
+        versao = _inteiro(campos, "versao") if "versao" in campos else None
+        alteracoes.append((objeto_id, versao, {}, {nome: valor for nome, valor in campos.items() if nome not in ("id", "versao")}))
+    return {"alterados": repositorio.atualizar_varios(session, modelo, alteracoes)}
+
+
+def _remover(session, parametros, corpo, recurso, objeto_id):
+    modelo, _, descricao = RECURSOS[recurso]
+    repositorio.remover(session, _existente(session.get(modelo, int(objeto_id)), descricao))
+
+
+# Donos
+def _buscar_donos(session, parametros):
+    if "documento" in parametros:
+        dono = repositorio.buscar_dono_por_documento(session, parametros["documento"], com_telefones=parametros.get("telefones") == "1")
+        return _existente(dono, "Dono")
+    if "telefone" in parametros:
+        return repositorio.buscar_donos_por_telefone(session, parametros["telefone"], _limite(parametros, 20))
+    raise ValueError("Informe documento ou telefone.")
+
+
+def _buscar_pessoas_fisicas(session, parametros):
+    if "nome_ou_cpf" in parametros:
+        return _existente(repositorio.buscar_pessoa_fisica_por_nome_ou_cpf(session, parametros["nome_ou_cpf"]), "Pessoa física")
+    return repositorio.buscar_pessoas_fisicas_por_prefixo(session, parametros.get("prefixo", ""), _limite(parametros, 20))
+
+
+def _criar_pessoa_fisica(session, parametros, corpo):
+    return repositorio.criar_pessoa_fisica(session, **_campos(corpo, Dono, ("nome", "cpf", "endereco_cep"), COLUNAS_DE_DONO))
+
+
+def _criar_ong(session, parametros, corpo):
+    return repositorio.criar_ong(session, **_campos(corpo, Dono, ("nome", "cnpj", "endereco_cep"), COLUNAS_DE_DONO))
+
+
+def _definir_telefones(session, parametros, corpo, dono_id):
+    dono = _existente(repositorio.buscar_dono(session, int(dono_id)), "Dono")
+    return repositorio.definir_telefones(session, dono, _campos(corpo, Dono, ("telefones",))["telefones"])
+
+
+# Animais e o que é deles
+def _buscar_animais(session, parametros):
+    if "dono_id" in parametros and "nome" in parametros:
+        return _existente(repositorio.buscar_animal_do_dono(session, _inteiro(parametros, "dono_id"), parametros["nome"]), "Animal")
+    if "dono_id" in parametros:
+        return repositorio.listar_animais_do_dono(session, _inteiro(parametros, "dono_id"))
+    if "nome" in parametros:
+        return _existente(repositorio.buscar_animal_por_nome(session, parametros["nome"]), "Animal")
+    return repositorio.buscar_animais_por_prefixo(session, parametros.get("prefixo", ""), _limite(parametros, 20))
+
+
+def _criar_animal(session, parametros, corpo):
+    campos = _campos(corpo, Animal, ("nome", "especie_id", "dono_id"), ("data_nasc", "tratamentos_realizados"))
+    return repositorio.criar_animal(
+        session,
+        nome=campos["nome"],
+        data_nasc=campos.get("data_nasc"),
+        tratamentos_realizados=campos.get("tratamentos_realizados"),
+        especie=_existente(repositorio.buscar_especie_por_id(session, campos["especie_id"]), "Espécie"),
+        dono=_existente(repositorio.buscar_dono(session, campos["dono_id"]), "Dono"),
+    )
+
+
+def _ficha(session, parametros, animal_id):
+    return _existente(repositorio.ficha_animal(session, int(animal_id)), "Animal")
+
+
+def _consultas_do_animal(session, parametros, animal_id):
+    # Com limite, uma página; sem, a lista inteira (telas de escolha).
+    if "limite" in parametros:
+        return repositorio.pagina_consultas_do_animal(session, int(animal_id), _inteiro(parametros, "apos_id", 0), _limite(parametros))
+    return repositorio.listar_consultas_do_animal(session, int(animal_id))
+
+
+def _vacinas_do_animal(session, parametros, animal_id):
+    if "limite" in parametros:
+        return repositorio.pagina_vacinas_do_animal(session, int(animal_id), _inteiro(parametros, "apos_id", 0), _limite(parametros))
+    return repositorio.listar_vacinas_do_animal(session, int(animal_id))
+
+
+def _historico_do_animal(session, parametros, animal_id, tabela):
+    pagina = repositorio.pagina_historico_consultas_do_animal if tabela == "consultas" else repositorio.pagina_historico_vacinas_do_animal
+    return pagina(session, int(animal_id), _inteiro(parametros, "apos_id", 0), _limite(parametros))
+
+
+def _linha_do_tempo(session, parametros, animal_id):
+    # Cursor (data, tipo, id) do último evento lido; sem ele, a primeira página.
+    apos = None
+    if "data" in parametros:
+        apos = (_data(parametros, "data"), _inteiro(parametros, "tipo"), _inteiro(parametros, "id"))
+    return repositorio.pagina_linha_do_tempo(session, int(animal_id), apos, _limite(parametros))
+
+
+def _criar_consulta(session, parametros, corpo):
+    campos = _campos(corpo, Consulta, ("data_consulta", "animal_id", "veterinario_id"), ("descricao",))
+    return repositorio.criar_consulta(
+        session,
+        data_consulta=campos["data_consulta"],
+        animal=_existente(repositorio.buscar_animal(session, campos["animal_id"]), "Animal"),
+        veterinario=_existente(repositorio.buscar_veterinario_por_id(session, campos["veterinario_id"]), "Veterinário"),
+        descricao=campos.get("descricao"),
+    )
+
+
+def _criar_vacina(session, parametros, corpo):
+    campos = _campos(corpo, Vacina, ("nome", "status", "data_aplicacao", "animal_id"), ("prox_aplicacao",))
+    return repositorio.criar_vacina(
+        session,
+        nome=campos["nome"],
+        status=campos["status"],
+        data_aplicacao=campos["data_aplicacao"],
+        prox_aplicacao=campos.get("prox_aplicacao"),
+        animal=_existente(repositorio.buscar_animal(session, campos["animal_id"]), "Animal"),
+    )
+
+
+# Veterinários e espécies
+def _buscar_veterinarios(session, parametros):
+    if "numero_reg_prof" in parametros:
+        return _existente(repositorio.buscar_veterinario(session, _inteiro(parametros, "numero_reg_prof")), "Veterinário")
+    if "nome" in parametros:
+        return _existente(repositorio.buscar_veterinario_por_nome(session, parametros["nome"]), "Veterinário")
+    return repositorio.buscar_veterinarios_por_prefixo(session, parametros.get("prefixo", ""), _limite(parametros, 20))
+
+
+def _criar_veterinario(session, parametros, corpo):
+    return repositorio.criar_veterinario(session, **_campos(corpo, Veterinario, ("nome", "numero_reg_prof"), ("especializacao",)))
+
+
+def _buscar_especies(session, parametros):
+    if "nome" in parametros:
+        return _existente(repositorio.buscar_especie(session, parametros["nome"]), "Espécie")
+    if "prefixo" in parametros:
+        return repositorio.buscar_especies_por_prefixo(session, parametros["prefixo"], _limite(parametros, 20))
+    return repositorio.pagina_especies(session, _inteiro(parametros, "apos_id", 0), _limite(parametros))
+
+
+def _criar_especie(session, parametros, corpo):
+    return repositorio.criar_especie(session, **_campos(corpo, Especie, ("nome",), ("descricao", "subespecie")))
+
+
+# Telas de consulta
+def _buscar_texto(session, parametros):
+    return busca.buscar_texto(session, parametros.get("termos", ""), _limite(parametros, 50), _data(parametros, "desde"), _data(parametros, "ate"))
+
+
+def _vacinas_pendentes(session, parametros):
+    return vacinas_pendentes(session, _data(parametros, "desde"), _data(parametros, "ate"), status=parametros.get("status") or None)
+
+
+def _relatorio(session, parametros, nome):
+    # só as visitas por dono têm limite (os donos com mais visitas)
+    opcoes = {"limite": _limite(parametros, 50)} if nome == "donos" else {}
+    return relatorios.RELATORIOS[nome](session, relatorios.normalizar_mes(parametros.get("desde")), relatorios.normalizar_mes(parametros.get("ate")),
+                                       do_historico=parametros.get("historico") == "1", **opcoes)
+
+
+# (método, caminho, função); GET lê em paralelo, o resto passa pela thread de escrita.
+ROTAS = [
+    ("GET", r"/donos", _buscar_donos),
+    ("PUT", r"/donos/(\d+)/telefones", _definir_telefones),
+    ("GET", r"/pessoas_fisicas", _buscar_pessoas_fisicas),
+    ("POST", r"/pessoas_fisicas", _criar_pessoa_fisica),
+    ("POST", r"/ongs", _criar_ong),
+    ("GET", r"/animais", _buscar_animais),
+    ("POST", r"/animais", _criar_animal),
+    ("GET", r"/animais/(\d+)/ficha", _ficha),
+    ("GET", r"/animais/(\d+)/consultas", _consultas_do_animal),
+    ("GET", r"/animais/(\d+)/vacinas", _vacinas_do_animal),
+    ("GET", r"/animais/(\d+)/historico/(consultas|vacinas)", _historico_do_animal),
+    ("GET", r"/animais/(\d+)/linha_do_tempo", _linha_do_tempo),
+    ("POST", r"/consultas", _criar_consulta),
+    ("POST", r"/vacinas", _criar_vacina),
+    ("GET", r"/veterinarios", _buscar_veterinarios),
+    ("POST", r"/veterinarios", _criar_veterinario),
+    ("GET", r"/especies", _buscar_especies),
+    ("POST", r"/especies", _criar_especie),
+    ("GET", r"/busca", _buscar_texto),
+    ("GET", r"/vacinas_pendentes", _vacinas_pendentes),
+    ("GET", r"/relatorios/(" + "|".join(relatorios.RELATORIOS) + ")", _relatorio),
+    ("GET", _RECURSO + r"/(\d+)", _buscar),
+    ("PATCH", _RECURSO, _alterar_varios),
+    ("PATCH", _RECURSO + r"/(\d+)", _alterar),
+    ("DELETE", _RECURSO + r"/(\d+)", _remover),
+]
+_ROTAS = [(metodo, re.compile(caminho + "$"), funcao) for metodo, caminho, funcao in ROTAS]
+
+SITUACAO_DE_SUCESSO = {"POST": HTTPStatus.CREATED, "DELETE": HTTPStatus.NO_CONTENT}
+
+
+class Servidor:
+    def __init__(self, engine, leitores=LEITORES):
+        self.engine = engine
+        self.leituras = ThreadPoolExecutor(leitores, thread_name_prefix="leitura")
+        self.escrita = ThreadPoolExecutor(1, thread_name_prefix="escrita")
+
+    def _rota(self, metodo, caminho):
+        permitidos = []
+        for metodo_rota, padrao, funcao in _ROTAS:
+            encontrado = padrao.match(caminho)
+            if encontrado:
+                if metodo_rota == metodo:
+                    return funcao, encontrado.groups()
+                permitidos.append(metodo_rota)
+        if permitidos:
+            return HTTPStatus.METHOD_NOT_ALLOWED, f"Método {metodo} não aceito em {caminho}."
+        return HTTPStatus.NOT_FOUND, f"Caminho desconhecido: {caminho}."
+
+    def _executar(self, funcao, metodo, argumentos):
+        # Na thread: a transação inteira e a conversão para JSON, ainda com a sessão aberta.
+        def trabalho(session):
+            return codificar(_para_json(funcao(session, *argumentos)))
+        try:
+            return SITUACAO_DE_SUCESSO.get(metodo, HTTPStatus.OK), banco.em_transacao(trabalho)
+        except NaoEncontrado as erro:
+            return HTTPStatus.NOT_FOUND, codificar({"erro": str(erro)})
+        except ValueError as erro:
+            return HTTPStatus.BAD_REQUEST, codificar({"erro": str(erro)})
+        except repositorio.Conflito as erro:
+            # o cliente compara "atual" com o que leu para mostrar o que a outra estação mudou
+            return HTTPStatus.CONFLICT, codificar({"erro": str(erro), "atual": erro.atual})
+        except StaleDataError:
+            return HTTPStatus.CONFLICT, codificar({"erro": "O registro foi alterado por outra estação; tente de novo.", "atual": None})
+        except IntegrityError as erro:
+            return HTTPStatus.CONFLICT, codificar({"erro": f"Registro em conflito com outro já cadastrado ({erro.orig})."})
+        except OperationalError as erro:
+            if banco.banco_travado(erro):
+                return HTTPStatus.SERVICE_UNAVAILABLE, codificar({"erro": "Banco de dados ocupado; tente de novo."})
+            raise
+
+    async def tratar(self, metodo, alvo, corpo):
+        partes = urlsplit(alvo)
+        rota, argumentos = self._rota(metodo, unquote(partes.path).rstrip("/") or "/")
+        if isinstance(rota, HTTPStatus):
+            return rota, codificar({"erro": argumentos})
+        parametros = dict(parse_qsl(partes.query))
+        if metodo == "GET":
+            argumentos = (parametros, *argumentos)
+            executor = self.leituras
+        else:
+            try:
+                argumentos = (parametros, decodificar(corpo), *argumentos)
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, codificar({"erro": "Corpo não é JSON válido."})
+            executor = self.escrita
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, self._executar, rota, metodo, argumentos)
+        except Exception as erro:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, codificar({"erro": f"{type(erro).__name__}: {erro}"})
+
+    async def atender(self, leitor, escritor):
+        # HTTP/1.1 com conexões persistentes: um pedido de cada vez por conexão.
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = cabecalhos.get("content-length") or "0"
+                tamanho = int(tamanho) if tamanho.isascii() and tamanho.isdigit() else None
+                if tamanho is None:
+                    # sem saber onde o corpo termina, a conexão não tem como seguir
+                    situacao, dados = HTTPStatus.BAD_REQUEST, codificar({"erro": "Content-Length inválido."})
+                    cabecalhos["connection"] = "close"
+                elif tamanho > CORPO_MAXIMO:
+                    situacao, dados = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, codificar({"erro": "Corpo grande demais."})
+                    cabecalhos["connection"] = "close"
+                else:
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+                    situacao, dados = await self.tratar(metodo.upper(), alvo, corpo)
+                fechar = cabecalhos.get("connection", "").lower() == "close" or versao == "HTTP/1.0"
+                if situacao == HTTPStatus.NO_CONTENT:
+                    dados = b""
+                resposta = [f"HTTP/1.1 {situacao.value} {situacao.phrase}", "Content-Type: application/json; charset=utf-8", f"Content-Length: {len(dados)}"]
+                if fechar:
+                    resposta.append("Connection: close")
+                escritor.write(("\r\n".join(resposta) + "\r\n\r\n").encode("latin-1") + dados)
+                await escritor.drain()
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host, porta, pronto=None):
+        servidor = await asyncio.start_server(self.atender, host, porta)
+        if pronto is not None:
+            pronto(servidor)
+        async with servidor:
+            await servidor.serve_forever()
+
+    def fechar(self):
+        self.leituras.shutdown()
+        self.escrita.shutdown()
+
+
+def configurar(url=banco.URL_PADRAO, leitores=LEITORES, perfil=None):
+    # Pool do tamanho das threads (leitoras mais a de escrita): nenhuma espera por conexão.
+    # As leituras só rodam junto com a escrita no perfil "wal" (banco num disco local).
+    engine = banco.configurar_banco(url, perfil, pool_size=leitores + 1, max_overflow=0)
+    banco.inicializar_banco(engine)
+    return Servidor(engine, leitores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON da clínica para várias estações.")
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 para aceitar outras máquinas da rede")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--leitores", type=int, default=LEITORES, help=f"leituras em paralelo (padrão {LEITORES})")
+    parser.add_argument("--banco", default=banco.URL_PADRAO)
+    parser.add_argument("--perfil", choices=sorted(banco.PERFIS), help="perfil de armazenamento (padrão: CLINICA_PERFIL ou legado); wal para o banco num disco local")
+    args = parser.parse_args()
+
+    servidor = configurar(args.banco, args.leitores, args.perfil)
+    print(f"Servindo {args.banco} em http://{args.host}:{args.porta} ({args.leitores} leitores, 1 escritor)")
+    try:
+        asyncio.run(servidor.servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.fechar()
+        servidor.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
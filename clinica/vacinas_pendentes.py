@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import aliased
+
+from clinica.modelos import Dono, Telefone, Animal, Vacina
+
+
+# Vacinas a vencer e vencidas da clínica inteira, agrupadas por dono com os
+# telefones para contato, numa única consulta. A faixa de datas percorre o
+# índice (prox_aplicacao, status), então o custo acompanha o tamanho da janela e
+# não o da tabela; uma vacina deixa de aparecer quando o animal recebe uma dose
+# posterior da mesma vacina.
+
+DIAS_EM_ATRASO = 30
+DIAS_A_VENCER = 30
+
+
+def _consulta(desde, ate, status, ignorar_reaplicadas):
+    dose_posterior = aliased(Vacina)
+    telefones = (select(func.group_concat(Telefone.numero, ","))
+                 .where(Telefone.dono_id == Dono.id)
+                 .scalar_subquery())
+    consulta = (select(
+                    Vacina.id.label("vacina_id"),
+                    Vacina.nome.label("vacina"),
+                    Vacina.status,
+                    Vacina.prox_aplicacao,
+                    Animal.id.label("animal_id"),
+                    Animal.nome.label("animal"),
+                    Dono.id.label("dono_id"),
+                    Dono.nome.label("dono"),
+                    telefones.label("telefones"),
+                )
+                .join(Animal, Animal.id == Vacina.animal_id)
+                .join(Dono, Dono.id == Animal.dono_id)
+                .where(Vacina.prox_aplicacao >= desde, Vacina.prox_aplicacao <= ate)
+                .order_by(Dono.nome, Dono.id, Vacina.prox_aplicacao))
+    if status is not None:
+        consulta = consulta.where(Vacina.status == status)
+    if ignorar_reaplicadas:
+        consulta = consulta.where(~exists().where(and_(
+            dose_posterior.animal_id == Vacina.animal_id,
+            dose_posterior.nome == Vacina.nome,
+            dose_posterior.data_aplicacao > Vacina.data_aplicacao,
+        )))
+    return consulta
+
+
+def vacinas_pendentes(session, desde=None, ate=None, status=None, ignorar_reaplicadas=True, hoje=None):
+    # Sem datas: de DIAS_EM_ATRASO dias atrás até DIAS_A_VENCER dias à frente.
+    hoje = hoje or date.today()
+    desde = desde or hoje - timedelta(days=DIAS_EM_ATRASO)
+    ate = ate or hoje + timedelta(days=DIAS_A_VENCER)
+
+    grupos = {}
+    for linha in session.execute(_consulta(desde, ate, status, ignorar_reaplicadas)):
+        grupo = grupos.get(linha.dono_id)
+        if grupo is None:
+            telefones = linha.telefones.split(",") if linha.telefones else []
+            grupo = grupos[linha.dono_id] = {"dono_id": linha.dono_id, "dono": linha.dono, "telefones": telefones, "vacinas": []}
+        grupo["vacinas"].append({
+            "vacina_id": linha.vacina_id,
+            "vacina": linha.vacina,
+            "status": linha.status,
+            "prox_aplicacao": linha.prox_aplicacao,
+            "atrasada": linha.prox_aplicacao < hoje,
+            "animal_id": linha.animal_id,
+            "animal": linha.animal,
+        })
+    return list(grupos.values())
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QLabel
+
+from clinica import busca
+from interface.tarefas import Cancelada, em_segundo_plano
+
+
+class JanelaBusca(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Buscar em Prontuários")
+        self.resize(800, 500)
+
+        layout = QVBoxLayout()
+
+        self.termos_input = QLineEdit()
+        self.termos_input.setPlaceholderText("Termos (ex.: parvovirose, vermífugo, cinomose*)")
+        self.desde_input = QLineEdit()
+        self.desde_input.setPlaceholderText("Consultas desde (YYYY-MM-DD, opcional)")
+        self.ate_input = QLineEdit()
+        self.ate_input.setPlaceholderText("Consultas até (YYYY-MM-DD, opcional)")
+
+        periodo = QHBoxLayout()
+        periodo.addWidget(self.desde_input)
+        periodo.addWidget(self.ate_input)
+
+        btn_buscar = QPushButton("Buscar")
+        self.resumo = QLabel("")
+
+        self.resultados = QTableWidget(0, 4)
+        self.resultados.setHorizontalHeaderLabels(["Origem", "Animal", "Data", "Trecho"])
+        self.resultados.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.resultados.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+
+        layout.addWidget(self.termos_input)
+        layout.addLayout(periodo)
+        layout.addWidget(btn_buscar)
+        layout.addWidget(self.resumo)
+        layout.addWidget(self.resultados)
+        self.setLayout(layout)
+
+        btn_buscar.clicked.connect(self.buscar)
+        self.termos_input.returnPressed.connect(self.buscar)
+
+    def _data(self, campo, descricao):
+        valor = campo.text().strip()
+        if not valor:
+            return None
+        try:
+            return datetime.strptime(valor, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError(f"Formato de data inválido para {descricao}. Use YYYY-MM-DD.")
+
+    def buscar(self):
+        try:
+            desde = self._data(self.desde_input, "o início do período")
+            ate = self._data(self.ate_input, "o fim do período")
+        except ValueError as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            return
+
+        try:
+            linhas = em_segundo_plano(self, busca.buscar_texto, self.termos_input.text(), limite=200, desde=desde, ate=ate)
+        except Cancelada:
+            return
+        except Exception as erro:
+            # banco travado ou servidor fora do ar: uma exceção escapando do slot encerraria o programa
+            QMessageBox.warning(self, "Erro", f"Não foi possível fazer a busca: {erro}")
+            return
+
+        self.resultados.setRowCount(len(linhas))
+        for i, linha in enumerate(linhas):
+            if linha["tipo"] == busca.TIPO_CONSULTA:
+                origem = f"Consulta {linha['registro_id']}"
+                data = datetime.strptime(linha["data_consulta"], "%Y-%m-%d").strftime("%d/%m/%Y") if linha["data_consulta"] else ""
+            else:
+                origem = "Tratamentos / Histórico"
+                data = ""
+            valores = [origem, linha["animal_nome"] or "", data, linha["trecho"].replace("\n", " ")]
+            for coluna, valor in enumerate(valores):
+                self.resultados.setItem(i, coluna, QTableWidgetItem(valor))
+        self.resumo.setText(f"{len(linhas)} resultado(s), do mais relevante ao menos relevante.")
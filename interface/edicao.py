@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+
+
+class GradeDeEdicao(QDialog):
+    # Edita qualquer número de colunas de um ou de vários registros numa tela só
+    # (ex.: todas as vacinas de um animal), em vez de um atributo por diálogo.
+    # Nada vai ao banco daqui: ao salvar, as células mudadas são conferidas e
+    # aplicadas nos objetos, que ficam em self.alterados para quem abriu a grade
+    # gravar numa transação só (repositorio.gravar_varios, um UPDATE em lote).
+    #
+    # colunas: lista de (título, atributo, tipo, obrigatório); tipo "texto",
+    #   "data" (AAAA-MM-DD) ou "inteiro"
+    # rotulo: função que dá o título de cada linha (padrão: o id do registro)
+
+    def __init__(self, titulo, objetos, colunas, parent=None, rotulo=None):
+        super().__init__(parent)
+        self.setWindowTitle(titulo)
+        self.resize(700, 400)
+        self.objetos = objetos
+        self.colunas = colunas
+        self.alterados = []
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Altere as células desejadas e clique em Salvar (datas no formato AAAA-MM-DD)."))
+
+        self.tabela = QTableWidget(len(objetos), len(colunas))
+        self.tabela.setHorizontalHeaderLabels([coluna[0] for coluna in colunas])
+        self.tabela.setVerticalHeaderLabels([rotulo(objeto) if rotulo else f"#{objeto.id}" for objeto in objetos])
+        self.tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.tabela.horizontalHeader().setStretchLastSection(True)
+        for linha, objeto in enumerate(objetos):
+            for coluna, (_, atributo, _, _) in enumerate(colunas):
+                self.tabela.setItem(linha, coluna, QTableWidgetItem(self._formatar(getattr(objeto, atributo))))
+        layout.addWidget(self.tabela)
+
+        botoes = QHBoxLayout()
+        btn_salvar = QPushButton("Salvar")
+        btn_cancelar = QPushButton("Cancelar")
+        btn_salvar.clicked.connect(self.salvar)
+        btn_cancelar.clicked.connect(self.reject)
+        botoes.addWidget(btn_salvar)
+        botoes.addWidget(btn_cancelar)
+        layout.addLayout(botoes)
+        self.setLayout(layout)
+
+    @staticmethod
+    def _formatar(valor):
+        if valor is None:
+            return ""
+        if hasattr(valor, "isoformat"):
+            return valor.isoformat()
+        return str(valor)
+
+    def _ler(self, linha, coluna):
+        titulo, _, tipo, obrigatorio = self.colunas[coluna]
+        texto = self.tabela.item(linha, coluna).text().strip()
+        if not texto:
+            if obrigatorio:
+                raise ValueError(f"{titulo} é obrigatório.")
+            return None
+        if tipo == "data":
+            try:
+                return datetime.strptime(texto, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"{titulo}: use o formato AAAA-MM-DD.") from None
+        if tipo == "inteiro":
+            try:
+                return int(texto)
+            except ValueError:
+                raise ValueError(f"{titulo} deve ser um número inteiro.") from None
+        return texto
+
+    def salvar(self):
+        # Confere a grade inteira antes de mexer nos objetos: com algum erro, nada muda e a grade continua aberta.
+        mudancas, erros = [], []
+        for linha, objeto in enumerate(self.objetos):
+            novos = {}
+            for coluna, (_, atributo, _, _) in enumerate(self.colunas):
+                try:
+                    valor = self._ler(linha, coluna)
+                except ValueError as erro:
+                    erros.append(f"{self.tabela.verticalHeaderItem(linha).text()}: {erro}")
+                    continue
+                atual = getattr(objeto, atributo)
+                if valor != (None if atual == "" else atual):  # célula vazia é None; 0 continua 0
+                    novos[atributo] = valor
+            if novos:
+                mudancas.append((objeto, novos))
+        if erros:
+            QMessageBox.warning(self, "Erro", "\n".join(erros))
+            return
+        for objeto, novos in mudancas:
+            for atributo, valor in novos.items():
+                setattr(objeto, atributo, valor)
+        self.alterados = [objeto for objeto, _ in mudancas]
+        self.accept()
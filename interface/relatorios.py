@@ -0,0 +1,89 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QMessageBox
+
+from clinica.instrumentacao import medir_acao
+from clinica.relatorios import consultas_por_veterinario_mes, novos_pacientes_por_especie, visitas_por_dono, normalizar_mes
+from interface.tarefas import Cancelada, em_segundo_plano
+
+
+# título -> (função, colunas (chave, cabeçalho))
+RELATORIOS = {
+    "Consultas por veterinário e mês": (consultas_por_veterinario_mes, [
+        ("mes", "Mês"), ("veterinario", "Veterinário"), ("consultas", "Consultas"),
+        ("posicao", "Posição no mês"), ("variacao", "Variação"), ("acumulado", "Acumulado"),
+    ]),
+    "Novos pacientes por espécie": (novos_pacientes_por_especie, [
+        ("mes", "Mês"), ("especie", "Espécie"), ("animais", "Animais"), ("percentual", "% do mês"), ("acumulado", "Acumulado"),
+    ]),
+    "Visitas por dono": (visitas_por_dono, [
+        ("posicao", "Posição"), ("dono", "Dono"), ("consultas", "Consultas"), ("meses_com_visita", "Meses com visita"), ("ultimo_mes", "Último mês"),
+    ]),
+}
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        return f"{valor:.1f}"
+    return str(valor)
+
+
+class JanelaRelatorios(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Relatórios")
+        self.resize(800, 500)
+
+        layout = QVBoxLayout()
+
+        self.relatorio_input = QComboBox()
+        self.relatorio_input.addItems(list(RELATORIOS))
+        self.desde_input = QLineEdit()
+        self.desde_input.setPlaceholderText("Mês inicial (YYYY-MM, opcional)")
+        self.ate_input = QLineEdit()
+        self.ate_input.setPlaceholderText("Mês final (YYYY-MM, opcional)")
+
+        filtros = QHBoxLayout()
+        filtros.addWidget(self.relatorio_input)
+        filtros.addWidget(self.desde_input)
+        filtros.addWidget(self.ate_input)
+
+        btn_gerar = QPushButton("Gerar")
+
+        self.resultados = QTableWidget(0, 0)
+        self.resultados.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        layout.addLayout(filtros)
+        layout.addWidget(btn_gerar)
+        layout.addWidget(self.resultados)
+        self.setLayout(layout)
+
+        btn_gerar.clicked.connect(self.gerar)
+        self.relatorio_input.currentIndexChanged.connect(self.gerar)
+        self.gerar()
+
+    def gerar(self):
+        funcao, colunas = RELATORIOS[self.relatorio_input.currentText()]
+        try:
+            desde, ate = normalizar_mes(self.desde_input.text()), normalizar_mes(self.ate_input.text())
+        except ValueError as erro:
+            QMessageBox.warning(self, "Erro", str(erro))
+            return
+        try:
+            with medir_acao("relatorio"):
+                linhas = em_segundo_plano(self, funcao, desde, ate)
+        except Cancelada:
+            return
+        except Exception as erro:
+            # banco travado, servidor fora do ar ou recusando o pedido: uma exceção escapando do slot encerraria o programa
+            QMessageBox.warning(self, "Erro", f"Não foi possível gerar o relatório: {erro}")
+            return
+
+        self.resultados.clear()
+        self.resultados.setColumnCount(len(colunas))
+        self.resultados.setHorizontalHeaderLabels([cabecalho for _, cabecalho in colunas])
+        self.resultados.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.resultados.setRowCount(len(linhas))
+        for i, linha in enumerate(linhas):
+            for coluna, (chave, _) in enumerate(colunas):
+                self.resultados.setItem(i, coluna, QTableWidgetItem(_texto(linha[chave])))
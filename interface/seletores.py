@@ -0,0 +1,99 @@
+from PyQt5.QtCore import Qt, QTimer, QStringListModel
+from PyQt5.QtWidgets import QLineEdit, QCompleter, QDialog, QVBoxLayout, QLabel, QPushButton, QMessageBox
+
+from clinica.instrumentacao import medir_acao
+from interface.tarefas import Tarefa, em_segundo_plano, iniciar
+
+
+class SeletorIncremental(QLineEdit):
+    # Campo com autocompletar que consulta o banco conforme o usuário digita,
+    # trazendo só as primeiras opções que começam com o texto digitado. A busca
+    # roda em segundo plano; uma resposta que chega depois de o texto mudar é
+    # descartada.
+    #
+    # buscar: função (session, prefixo, limite) -> objetos com .id
+    # rotulo: função que transforma o objeto no texto mostrado na lista
+
+    def __init__(self, buscar, rotulo, placeholder="", limite=20, parent=None):
+        super().__init__(parent)
+        self.buscar = buscar
+        self.rotulo = rotulo
+        self.limite = limite
+        self.opcoes = {}
+        self.tarefa = None
+        self.setPlaceholderText(placeholder)
+
+        self.modelo = QStringListModel(self)
+        completer = QCompleter(self.modelo, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setCompleter(completer)
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(150)
+        self.temporizador.timeout.connect(self.atualizar_opcoes)
+        self.textEdited.connect(self.temporizador.start)
+
+    def _buscar_opcoes(self, session, prefixo):
+        with medir_acao("seletor_incremental"):
+            return prefixo, {self.rotulo(objeto): objeto.id for objeto in self.buscar(session, prefixo, self.limite)}
+
+    def atualizar_opcoes(self):
+        prefixo = self.text().strip()
+        if self.tarefa is not None:
+            self.tarefa.cancelar()
+            self.tarefa = None
+        if not prefixo:
+            self.opcoes = {}
+            self.modelo.setStringList([])
+            return
+        self.tarefa = iniciar(Tarefa(self._buscar_opcoes, prefixo), self._receber_opcoes)
+
+    def _receber_opcoes(self, resposta):
+        prefixo, opcoes = resposta
+        if prefixo != self.text().strip():
+            return
+        self.tarefa = None
+        self.opcoes = opcoes
+        self.modelo.setStringList(list(self.opcoes))
+        self.completer().complete()
+
+    def id_selecionado(self):
+        texto = self.text()
+        if texto not in self.opcoes:
+            _, self.opcoes = em_segundo_plano(self, self._buscar_opcoes, texto.strip())
+        return self.opcoes.get(texto)
+
+
+def escolher(parent, titulo, rotulo_campo, buscar, rotulo):
+    # Substitui o QInputDialog.getItem com a tabela inteira: devolve o id escolhido ou None.
+    janela = QDialog(parent)
+    janela.setWindowTitle(titulo)
+    layout = QVBoxLayout()
+
+    seletor = SeletorIncremental(buscar, rotulo, placeholder="Digite para buscar")
+    btn_confirmar = QPushButton("Confirmar")
+    btn_cancelar = QPushButton("Cancelar")
+
+    layout.addWidget(QLabel(rotulo_campo))
+    layout.addWidget(seletor)
+    layout.addWidget(btn_confirmar)
+    layout.addWidget(btn_cancelar)
+    janela.setLayout(layout)
+
+    escolhido = []
+
+    def confirmar():
+        id_escolhido = seletor.id_selecionado()
+        if id_escolhido is None:
+            QMessageBox.warning(janela, "Erro", "Selecione uma opção da lista.")
+            return
+        escolhido.append(id_escolhido)
+        janela.accept()
+
+    btn_confirmar.clicked.connect(confirmar)
+    btn_cancelar.clicked.connect(janela.reject)
+    janela.exec_()
+
+    return escolhido[0] if escolhido else None
@@ -0,0 +1,152 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, pyqtSignal
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableView, QHeaderView, QPushButton, QLabel
+
+from clinica.instrumentacao import medir_acao
+from interface.tarefas import Tarefa, em_segundo_plano, iniciar
+
+
+class TabelaPaginada(QAbstractTableModel):
+    # Busca as linhas aos poucos, por chave (id > último id lido, ou o cursor
+    # dado por chave), conforme a tabela é rolada. Abrir a listagem custa uma página, não a tabela inteira.
+    # A primeira página é esperada (com opção de cancelar); as seguintes chegam
+    # em segundo plano enquanto a tabela continua rolando.
+    #
+    # colunas: lista de (título, função que recebe o objeto e devolve o valor)
+    # buscar_pagina: função (session, apos_id, limite) -> objetos com .id em ordem crescente
+    # chave: função que dá o cursor de um objeto, para outras ordens (ex.: a linha
+    #   do tempo); buscar_pagina recebe então o cursor do último objeto, ou None
+    #
+    # Se uma página seguinte falhar, a última linha mostra o erro e a leitura
+    # para ali; clicar duas vezes nela (criar_tabela) tenta de novo.
+
+    falha_ao_carregar = pyqtSignal(int)  # linha de aviso
+
+    def __init__(self, colunas, buscar_pagina, tamanho_pagina=100, parent=None, chave=None):
+        super().__init__(parent)
+        self.colunas = colunas
+        self.buscar_pagina = buscar_pagina
+        self.tamanho_pagina = tamanho_pagina
+        self.chave = chave or (lambda objeto: objeto.id)
+        self.linhas = []
+        self.ultimo = None if chave else 0
+        self.fim = False
+        self.carregando = None
+        self.erro = None
+        self._receber_pagina(em_segundo_plano(parent, self._ler_pagina, self.ultimo))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas) + (self.erro is not None)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.colunas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        if index.row() == len(self.linhas):
+            return f"Não foi possível carregar mais linhas ({self.erro}). Clique duas vezes aqui para tentar de novo." if index.column() == 0 else ""
+        return self.linhas[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self.colunas[section][0]
+        return section + 1 if section < len(self.linhas) else ""
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # com erro pendente, só tenta de novo quando o usuário pedir: a view chamaria fetchMore em seguida, sem parar
+        return not parent.isValid() and not self.fim and self.carregando is None and self.erro is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.carregando = iniciar(Tarefa(self._ler_pagina, self.ultimo), self._receber_pagina, self._falhou)
+
+    def _ler_pagina(self, session, apos):
+        # Roda na thread da tarefa: formata ainda com a sessão aberta.
+        with medir_acao("tabela_paginada"):
+            objetos = self.buscar_pagina(session, apos, self.tamanho_pagina)
+            return [(self.chave(objeto), tuple(self._formatar(valor(objeto)) for _, valor in self.colunas)) for objeto in objetos]
+
+    def _receber_pagina(self, pagina):
+        self.carregando = None
+        if len(pagina) < self.tamanho_pagina:
+            self.fim = True
+        if not pagina:
+            return
+        self.ultimo = pagina[-1][0]
+        self.beginInsertRows(QModelIndex(), len(self.linhas), len(self.linhas) + len(pagina) - 1)
+        self.linhas.extend(linha for _, linha in pagina)
+        self.endInsertRows()
+
+    def _falhou(self, erro):
+        self.carregando = None
+        self.beginInsertRows(QModelIndex(), len(self.linhas), len(self.linhas))
+        self.erro = erro
+        self.endInsertRows()
+        self.falha_ao_carregar.emit(len(self.linhas))
+
+    def tentar_de_novo(self):
+        if self.erro is None:
+            return
+        self.beginRemoveRows(QModelIndex(), len(self.linhas), len(self.linhas))
+        self.erro = None
+        self.endRemoveRows()
+        self.fetchMore()
+
+    @staticmethod
+    def _formatar(valor):
+        if valor is None:
+            return ""
+        if hasattr(valor, "strftime"):
+            return valor.strftime("%d/%m/%Y")
+        return str(valor)
+
+
+def criar_tabela(modelo):
+    tabela = QTableView()
+    tabela.setModel(modelo)
+    tabela.setEditTriggers(QTableView.NoEditTriggers)
+    tabela.setSelectionBehavior(QTableView.SelectRows)
+    tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+    tabela.horizontalHeader().setStretchLastSection(True)
+    if isinstance(modelo, TabelaPaginada):
+        # a linha de aviso de falha ocupa a largura toda; clicar duas vezes nela tenta carregar de novo
+        def avisar(linha):
+            if modelo.columnCount() > 1:
+                tabela.setSpan(linha, 0, 1, modelo.columnCount())
+
+        def tentar_de_novo(index):
+            if modelo.erro is not None and index.row() == len(modelo.linhas):
+                tabela.clearSpans()
+                modelo.tentar_de_novo()
+
+        modelo.falha_ao_carregar.connect(avisar)
+        tabela.doubleClicked.connect(tentar_de_novo)
+    return tabela
+
+
+def mostrar_tabela(parent_window, titulo, modelo, mensagem_vazia=None, historico=None):
+    # historico: função que monta o modelo com os registros arquivados (clinica/arquivo.py)
+    janela = QDialog(parent_window)
+    janela.setWindowTitle(titulo)
+    janela.resize(600, 400)
+    layout = QVBoxLayout()
+
+    if mensagem_vazia and modelo.rowCount() == 0:
+        layout.addWidget(QLabel(mensagem_vazia))
+
+    layout.addWidget(criar_tabela(modelo))
+
+    if historico is not None:
+        btn_historico = QPushButton("Histórico completo (inclui arquivados)")
+        btn_historico.clicked.connect(lambda: mostrar_tabela(janela, f"{titulo} - histórico completo", historico(janela), mensagem_vazia))
+        layout.addWidget(btn_historico)
+
+    btn_fechar = QPushButton("Fechar")
+    btn_fechar.clicked.connect(janela.close)
+    layout.addWidget(btn_fechar)
+
+    janela.setLayout(layout)
+    janela.exec_()
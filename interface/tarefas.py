@@ -0,0 +1,156 @@
+import contextvars
+import time
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QEventLoop, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+from clinica.banco import em_transacao
+
+
+# Trabalho de banco fora da thread da interface. Cada Tarefa roda
+# funcao(session, *args, **kwargs) numa thread do QThreadPool, com a sua própria
+# unidade de trabalho (commit no fim, rollback em erro ou cancelamento; repetida
+# se o banco estiver travado por outra estação), e devolve o resultado à thread
+# da interface pelos sinais concluida/falhou.
+# Os objetos devolvidos chegam desanexados: a função precisa carregar tudo o
+# que a tela vai mostrar.
+# No modo cliente (usar_servidor) não há sessão local: a função roda com
+# session=None e as do repositório viram pedidos ao servidor (clinica/cliente.py).
+
+ESPERA_PROGRESSO_MS = 300
+
+_em_andamento = set()
+_servidor = None
+
+
+def usar_servidor(cliente):
+    global _servidor
+    _servidor = cliente
+
+
+class Cancelada(Exception):
+    pass
+
+
+class _Sinais(QObject):
+    concluida = pyqtSignal(object)
+    falhou = pyqtSignal(object)
+
+
+class Tarefa(QRunnable):
+    def __init__(self, funcao, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.sinais = _Sinais()
+        self.cancelada = False
+        self._conexao = None
+        # medir_acao() aberto na interface continua contando o SQL feito aqui
+        self._contexto = contextvars.copy_context()
+
+    def run(self):
+        try:
+            resultado = self._contexto.run(self._executar)
+        except Exception as erro:
+            self.sinais.falhou.emit(Cancelada() if self.cancelada else erro)
+        else:
+            self.sinais.concluida.emit(resultado)
+
+    def _executar(self):
+        if _servidor is not None:
+            return self._pedir_ao_servidor()
+        return em_transacao(self._tentar)
+
+    def _pedir_ao_servidor(self):
+        # Cancelar não desfaz o que o servidor já gravou; só descarta a resposta.
+        if self.cancelada:
+            raise Cancelada()
+        resultado = _servidor.equivalente(self.funcao)(None, *self.args, **self.kwargs)
+        if self.cancelada:
+            raise Cancelada()
+        return resultado
+
+    def _tentar(self, session):
+        if self.cancelada:
+            raise Cancelada()
+        self._conexao = session.connection().connection.dbapi_connection
+        try:
+            resultado = self.funcao(session, *self.args, **self.kwargs)
+        finally:
+            self._conexao = None
+        if self.cancelada:
+            raise Cancelada()  # desfaz: o commit não chega a acontecer
+        return resultado
+
+    def cancelar(self):
+        self.cancelada = True
+        conexao = self._conexao
+        if conexao is not None and hasattr(conexao, "interrupt"):
+            conexao.interrupt()  # sqlite3: interrompe o comando em andamento
+
+
+def iniciar(tarefa, ao_concluir, ao_falhar=None):
+    # Não bloqueia: os callbacks rodam na thread da interface quando a tarefa termina.
+    def concluida(resultado):
+        _em_andamento.discard(tarefa)
+        ao_concluir(resultado)
+
+    def falhou(erro):
+        _em_andamento.discard(tarefa)
+        if ao_falhar is not None:
+            ao_falhar(erro)
+
+    _em_andamento.add(tarefa)
+    tarefa.sinais.concluida.connect(concluida)
+    tarefa.sinais.falhou.connect(falhou)
+    QThreadPool.globalInstance().start(tarefa)
+    return tarefa
+
+
+def em_segundo_plano(parent, funcao, *args, **kwargs):
+    # Para o código sequencial dos diálogos: espera a tarefa girando um
+    # QEventLoop, então as janelas continuam sendo redesenhadas. Se demorar,
+    # aparece um diálogo de progresso com o botão Cancelar. Devolve o resultado
+    # ou levanta a exceção da tarefa (Cancelada se o usuário cancelou).
+    laco = QEventLoop()
+    saida = {}
+
+    progresso = QProgressDialog("Aguardando o banco de dados...", "Cancelar", 0, 0, parent)
+    progresso.setWindowTitle("Aguarde")
+    progresso.setWindowModality(Qt.WindowModal)
+    progresso.hide()
+    mostrar = QTimer()
+    mostrar.setSingleShot(True)
+    mostrar.timeout.connect(progresso.show)
+    inicio = time.monotonic()
+    relogio = QTimer()
+    relogio.setInterval(1000)
+    relogio.timeout.connect(lambda: progresso.setLabelText(f"Aguardando o banco de dados... {time.monotonic() - inicio:.0f} s"))
+
+    def terminou(chave, valor):
+        saida.setdefault(chave, valor)
+        laco.quit()
+
+    tarefa = Tarefa(funcao, *args, **kwargs)
+
+    def cancelar():
+        tarefa.cancelar()
+        terminou("erro", Cancelada())
+
+    progresso.canceled.connect(cancelar)
+    iniciar(tarefa, lambda resultado: terminou("resultado", resultado), lambda erro: terminou("erro", erro))
+    mostrar.start(ESPERA_PROGRESSO_MS)
+    relogio.start()
+    if not saida:
+        laco.exec_()
+    mostrar.stop()
+    relogio.stop()
+    fim = dict(saida)  # fechar o diálogo emite canceled
+    progresso.close()
+    progresso.deleteLater()
+
+    if "erro" in fim:
+        raise fim["erro"]
+    return fim["resultado"]
@@ -0,0 +1,55 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QMessageBox
+
+from clinica import repositorio
+from clinica.instrumentacao import medir_acao
+from interface.tarefas import Cancelada, em_segundo_plano
+
+
+class JanelaBuscaTelefone(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Buscar Dono por Telefone")
+        self.resize(700, 400)
+
+        layout = QVBoxLayout()
+
+        self.telefone_input = QLineEdit()
+        self.telefone_input.setPlaceholderText("Telefone (completo, sem DDD ou só os últimos dígitos)")
+
+        btn_buscar = QPushButton("Buscar")
+        self.resumo = QLabel("")
+
+        self.resultados = QTableWidget(0, 4)
+        self.resultados.setHorizontalHeaderLabels(["Dono", "Tipo", "CPF/CNPJ", "Telefones"])
+        self.resultados.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.resultados.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+
+        layout.addWidget(self.telefone_input)
+        layout.addWidget(btn_buscar)
+        layout.addWidget(self.resumo)
+        layout.addWidget(self.resultados)
+        self.setLayout(layout)
+
+        btn_buscar.clicked.connect(self.buscar)
+        self.telefone_input.returnPressed.connect(self.buscar)
+
+    def buscar(self):
+        try:
+            with medir_acao("buscar_por_telefone"):
+                donos = em_segundo_plano(self, repositorio.buscar_donos_por_telefone, self.telefone_input.text())
+        except Cancelada:
+            return
+        except Exception as erro:
+            # banco travado ou servidor fora do ar: uma exceção escapando do slot encerraria o programa
+            QMessageBox.warning(self, "Erro", f"Não foi possível buscar o telefone: {erro}")
+            return
+
+        self.resultados.setRowCount(len(donos))
+        for i, dono in enumerate(donos):
+            valores = [dono["nome"], "ONG" if dono["tipo"] == "ong" else "Pessoa Física", dono["documento"], ", ".join(dono["telefones"])]
+            for coluna, valor in enumerate(valores):
+                self.resultados.setItem(i, coluna, QTableWidgetItem(valor))
+        if donos:
+            self.resumo.setText(f"{len(donos)} dono(s) encontrado(s).")
+        else:
+            self.resumo.setText(f"Nenhum dono encontrado (digite ao menos {repositorio.MIN_DIGITOS_TELEFONE} dígitos).")
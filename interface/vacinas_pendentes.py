@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QLabel
+
+from clinica.instrumentacao import medir_acao
+from clinica.vacinas_pendentes import DIAS_EM_ATRASO, DIAS_A_VENCER, vacinas_pendentes
+from interface.tarefas import Cancelada, em_segundo_plano
+
+
+class JanelaVacinasPendentes(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Vacinas a Vencer e Vencidas")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout()
+
+        hoje = date.today()
+        self.desde_input = QLineEdit((hoje - timedelta(days=DIAS_EM_ATRASO)).isoformat())
+        self.desde_input.setPlaceholderText("Próxima aplicação desde (YYYY-MM-DD)")
+        self.ate_input = QLineEdit((hoje + timedelta(days=DIAS_A_VENCER)).isoformat())
+        self.ate_input.setPlaceholderText("Próxima aplicação até (YYYY-MM-DD)")
+        self.status_input = QLineEdit()
+        self.status_input.setPlaceholderText("Status (opcional)")
+
+        periodo = QHBoxLayout()
+        periodo.addWidget(self.desde_input)
+        periodo.addWidget(self.ate_input)
+        periodo.addWidget(self.status_input)
+
+        btn_buscar = QPushButton("Buscar")
+        self.resumo = QLabel("")
+
+        self.resultados = QTableWidget(0, 6)
+        self.resultados.setHorizontalHeaderLabels(["Dono", "Telefones", "Animal", "Vacina", "Próxima Aplicação", "Situação"])
+        self.resultados.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.resultados.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+
+        layout.addLayout(periodo)
+        layout.addWidget(btn_buscar)
+        layout.addWidget(self.resumo)
+        layout.addWidget(self.resultados)
+        self.setLayout(layout)
+
+        btn_buscar.clicked.connect(self.buscar)
+        self.buscar()
+
+    def buscar(self):
+        try:
+            desde = datetime.strptime(self.desde_input.text().strip(), "%Y-%m-%d").date()
+            ate = datetime.strptime(self.ate_input.text().strip(), "%Y-%m-%d").date()
+        except ValueError:
+            QMessageBox.warning(self, "Erro", "Formato de data inválido. Use YYYY-MM-DD.")
+            return
+
+        try:
+            with medir_acao("vacinas_pendentes"):
+                grupos = em_segundo_plano(self, vacinas_pendentes, desde, ate, status=self.status_input.text().strip() or None)
+        except Cancelada:
+            return
+        except Exception as erro:
+            # roda também ao abrir a janela: com o banco travado ou o servidor fora do ar, a tabela fica vazia
+            self.resultados.setRowCount(0)
+            self.resumo.setText("")
+            QMessageBox.warning(self, "Erro", f"Não foi possível listar as vacinas: {erro}")
+            return
+
+        linhas =[(grupo, vacina) for grupo in grupos for vacina in grupo["vacinas"]]
+        self.resultados.setRowCount(len(linhas))
+        for i, (grupo, vacina) in enumerate(linhas):
+            primeira = vacina is grupo["vacinas"][0]
+            valores = [
+                grupo["dono"] if primeira else "",
+                ", ".join(grupo["telefones"]) if primeira else "",
+                vacina["animal"],
+                vacina["vacina"],
+                vacina["prox_aplicacao"].strftime("%d/%m/%Y"),
+                "Vencida" if vacina["atrasada"] else "A vencer",
+            ]
+            for coluna, valor in enumerate(valores):
+                self.resultados.setItem(i, coluna, QTableWidgetItem(valor))
+        self.resumo.setText(f"{len(linhas)} vacina(s) de {len(grupos)} dono(s).")
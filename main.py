@@ -1,140 +1,91 @@
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QDialog, QLineEdit, QMessageBox, QInputDialog, QComboBox, QDateEdit
 from PyQt5.QtCore import QDate
-from sqlalchemy import Column, String, Integer, Date, Text, ForeignKey, create_engine, Table
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+import argparse
 from datetime import datetime
+from functools import wraps
+
+
+def carregar_modulos(servidor=None):
+    # Partida rápida: antes do menu aparecer só o PyQt5 é importado. SQLAlchemy,
+    # o repositório e as janelas de busca, relatórios etc. (a maior parte do
+    # tempo de partida) vêm daqui, chamada com o menu já na tela.
+    global repositorio, StaleDataError, medir_acao, normalizar_documento, JanelaBusca, JanelaRelatorios
+    global SeletorIncremental, escolher, TabelaPaginada, criar_tabela, mostrar_tabela, Cancelada, em_segundo_plano
+    global JanelaBuscaTelefone, JanelaVacinasPendentes, GradeDeEdicao
+    from sqlalchemy.orm.exc import StaleDataError
+
+    from clinica import repositorio
+    from clinica.banco import inicializar_banco
+    from clinica.cache import cache
+    from clinica.cliente import ClienteRemoto
+    from clinica.instrumentacao import ativar_log_lento, exportar_resumo, medir_acao
+    from clinica.modelos import normalizar_documento
+    from interface.busca import JanelaBusca
+    from interface.edicao import GradeDeEdicao
+    from interface.relatorios import JanelaRelatorios
+    from interface.seletores import SeletorIncremental, escolher
+    from interface.tabelas import TabelaPaginada, criar_tabela, mostrar_tabela
+    from interface.tarefas import Cancelada, em_segundo_plano, usar_servidor
+    from interface.telefones import JanelaBuscaTelefone
+    from interface.vacinas_pendentes import JanelaVacinasPendentes
+
+    if servidor:
+        # Modo cliente: as telas chamam o servidor em vez de abrir o clinica_vet.db.
+        repositorio = ClienteRemoto(servidor)
+        usar_servidor(repositorio)
+    else:
+        inicializar_banco()  # com o esquema em dia, só confere a versão gravada no banco
+    ativar_log_lento()
+    QApplication.instance().aboutToQuit.connect(lambda: exportar_resumo("metricas_clinica.json", cache=cache.estatisticas()))
+
+
+def volta_ao_formulario(metodo):
+    # Slots de botão: cancelar a espera pelo banco, ou uma falha nela (banco
+    # travado, servidor fora do ar), deixa o formulário aberto em vez de a
+    # exceção escapar para o Qt, o que encerraria o programa.
+    @wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        try:
+            return metodo(self, *args, **kwargs)
+        except Cancelada:
+            pass
+        except Exception as erro:
+            QMessageBox.critical(self, "Erro", str(erro))
+    return envoltorio
+
+
+def gravar_alteracoes(parent, objeto):
+    # Concorrência otimista: se outra estação gravou o registro enquanto os
+    # diálogos estavam abertos, mostra o que mudou e pergunta se as alterações
+    # daqui vão por cima da versão atual (o resto fica como a outra estação
+    # deixou). Devolve False se o usuário preferir descartar as suas.
+    # Uma lista (as linhas de uma grade de edição) vai numa transação só.
+    gravar = repositorio.gravar_varios if isinstance(objeto, list) else repositorio.gravar
+    sobrepor = False
+    while True:
+        try:
+            em_segundo_plano(parent, gravar, objeto, sobrepor=sobrepor)
+            return True
+        except StaleDataError as conflito:
+            texto = "Outra estação alterou " + ("um destes registros" if isinstance(objeto, list) else "este registro") + " enquanto você o editava."
+            outros, meus = getattr(conflito, "outros", {}), getattr(conflito, "meus", {})
+            if outros:
+                texto += "\n\nAlterado lá:\n" + "\n".join(f"  {nome}: {valor}" for nome, valor in outros.items())
+            if meus:
+                texto += "\n\nSuas alterações:\n" + "\n".join(f"  {nome}: {valor}" for nome, valor in meus.items())
+            texto += "\n\nGravar as suas alterações sobre a versão atual? \"Não\" descarta as suas alterações."
+            if QMessageBox.question(parent, "Conflito de edição", texto, QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+                return False
+            sobrepor = True
+
+
+def editar_em_grade(parent, titulo, objetos, colunas, sucesso, rotulo=None):
+    # Todas as colunas (e todos os registros) numa grade e uma gravação só.
+    grade = GradeDeEdicao(titulo, objetos, colunas, parent, rotulo)
+    if grade.exec_() == QDialog.Accepted and grade.alterados and gravar_alteracoes(parent, grade.alterados):
+        QMessageBox.information(parent, "Sucesso", sucesso)
 
 
-engine = create_engine('sqlite:///clinica_vet.db', echo=False)
-Base = declarative_base()
-Session = sessionmaker(bind=engine)
-session = Session()
-
-veterinario_Animais = Table("veterinario_Animais", Base.metadata,
-    Column("veterinario_id", Integer, ForeignKey("Veterinario.id")),
-    Column("animal_id", Integer, ForeignKey("Animal.id"))
-)
-
-class Dono(Base):
-    __tablename__ = "Dono"
-    id = Column(Integer, primary_key=True)
-    nome = Column(String, nullable=False)
-    endereco_cep = Column(String, nullable=False)
-    endereco_rua = Column(String)
-    endereco_cidade = Column(String)
-    endereco_complemento = Column(String)
-
-    animais = relationship("Animal", back_populates="dono")
-
-    telefones = relationship("Telefone", back_populates="dono", cascade="all, delete-orphan")
-
-    tipo = Column(String(50))  
-
-    __mapper_args__ = {
-        'polymorphic_identity': 'dono',
-        'polymorphic_on': tipo
-    }
-
-class PessoaFisica(Dono):
-    __tablename__ = "Pessoa_Fisica"
-    id = Column(Integer, ForeignKey('Dono.id'), primary_key=True)
-    cpf = Column(String, nullable=False)  
-
-    __mapper_args__ = {
-        'polymorphic_identity': 'pessoa_fisica',
-    }
-
-class ONG(Dono):
-    __tablename__ = "ONG"
-    id = Column(Integer, ForeignKey("Dono.id"), primary_key=True)
-    cnpj = Column(String, nullable=False) 
-
-    __mapper_args__ = {
-        'polymorphic_identity': 'ong',
-    }
-
-class Telefone(Base):
-    __tablename__ = "Telefone"
-    id = Column(Integer, primary_key=True)
-    numero = Column(String)
-    dono_id = Column(Integer, ForeignKey("Dono.id"), nullable=False)
-    dono = relationship("Dono", back_populates="telefones")
-
-class Animal(Base):
-    __tablename__ = "Animal"
-    id = Column(Integer, primary_key=True)
-    nome = Column(String, nullable=False)
-    tratamentos_realizados = Column(String)
-    historico_consultas = Column(String)
-    data_nasc = Column(Date, nullable=True)
-
-
-    dono_id = Column(Integer, ForeignKey("Dono.id"))
-    dono = relationship('Dono', back_populates='animais')
-
-    especie_id = Column(Integer, ForeignKey('Especie.id'))
-    especie = relationship('Especie', back_populates='animais')
-
-    consultas = relationship("Consulta", back_populates="animal", cascade="all, delete-orphan")
-
-    veterinarios = relationship('Veterinario', secondary=veterinario_Animais, back_populates='animais')
-
-    vacinas = relationship("Vacina", back_populates="animal", cascade="all, delete-orphan")
-
-class Vacina(Base):
-    __tablename__ = "Vacinas"
-    
-    
-    id = Column(Integer, primary_key=True)
-    status = Column(String, nullable=False)  
-    nome = Column(String, nullable=False)  
-    data_aplicacao = Column(Date, nullable=False)  
-    prox_aplicacao = Column(Date, nullable=True)  
-
-    
-    animal_id = Column(Integer, ForeignKey("Animal.id"), nullable=False)
-    animal = relationship("Animal", back_populates="vacinas")
-
-class Consulta(Base):
-    __tablename__ = "Consulta"
-
-    id = Column(Integer, primary_key=True)
-    data_consulta = Column(Date, nullable=False)
-    descricao = Column(Text, nullable=True)  
-
-    animal_id = Column(Integer, ForeignKey("Animal.id"), nullable=False)
-    animal = relationship("Animal", back_populates="consultas")
-
-    
-    veterinario_id = Column(Integer, ForeignKey("Veterinario.id"), nullable=False)
-    veterinario = relationship("Veterinario", back_populates="consultas")
-
-
-class Veterinario(Base):
-    __tablename__ = "Veterinario"
-
-    id = Column(Integer, primary_key=True)
-    nome = Column(String, nullable=False) 
-    especializacao = Column(String)
-    numero_reg_prof = Column(Integer, nullable=False)
-
-    animais = relationship('Animal', secondary=veterinario_Animais, back_populates='veterinarios')
-    consultas = relationship("Consulta", back_populates="veterinario", cascade="all, delete-orphan")
-
-
-
-class Especie(Base):
-    __tablename__ = "Especie"
-    id = Column(Integer, primary_key=True)
-    nome = Column(String, nullable=False)
-    descricao = Column(Text, nullable=True)
-    subespecie = Column(String, nullable=False)
-
-    animais = relationship('Animal', back_populates='especie')
-
-
-Base.metadata.create_all(engine)
-
 # INTERFACE GRÀFICA
 
 class MenuPrincipal(QWidget):
@@ -152,6 +103,10 @@ class MenuPrincipal(QWidget):
         self.btn_consulta = QPushButton("Consulta")
         self.btn_veterinario = QPushButton("Veterinário")
         self.btn_vacinas = QPushButton("Vacinas")
+        self.btn_vacinas_pendentes = QPushButton("Vacinas a Vencer")
+        self.btn_busca = QPushButton("Buscar em Prontuários")
+        self.btn_busca_telefone = QPushButton("Buscar Dono por Telefone")
+        self.btn_relatorios = QPushButton("Relatórios")
         self.btn_sair = QPushButton("Sair")
 
         layout.addWidget(self.btn_pessoa_fisica)
@@ -161,6 +116,10 @@ class MenuPrincipal(QWidget):
         layout.addWidget(self.btn_consulta)
         layout.addWidget(self.btn_veterinario)
         layout.addWidget(self.btn_vacinas)
+        layout.addWidget(self.btn_vacinas_pendentes)
+        layout.addWidget(self.btn_busca)
+        layout.addWidget(self.btn_busca_telefone)
+        layout.addWidget(self.btn_relatorios)
         layout.addWidget(self.btn_sair)
 
         self.setLayout(layout)
@@ -172,6 +131,10 @@ class MenuPrincipal(QWidget):
         self.btn_consulta.clicked.connect(self.open_menu_consulta)
         self.btn_veterinario.clicked.connect(self.open_menu_veterinario)
         self.btn_vacinas.clicked.connect(self.open_menu_vacinas)
+        self.btn_vacinas_pendentes.clicked.connect(self.open_vacinas_pendentes)
+        self.btn_busca.clicked.connect(self.open_busca)
+        self.btn_busca_telefone.clicked.connect(self.open_busca_telefone)
+        self.btn_relatorios.clicked.connect(self.open_relatorios)
         self.btn_sair.clicked.connect(self.close)
 
     def open_menu_pessoa_fisica(self):
@@ -195,6 +158,18 @@ class MenuPrincipal(QWidget):
     def open_menu_vacinas(self):
         self.open_menu("Vacinas", self.create_vacina, self.read_vacina, self.update_vacina, self.delete_vacina)
 
+    def open_vacinas_pendentes(self):
+        JanelaVacinasPendentes(self).exec_()
+
+    def open_busca(self):
+        JanelaBusca(self).exec_()
+
+    def open_busca_telefone(self):
+        JanelaBuscaTelefone(self).exec_()
+
+    def open_relatorios(self):
+        JanelaRelatorios(self).exec_()
+
 
     def open_menu(self, title, create_func, read_func, update_func, delete_func):
         menu_window = QDialog(self)
@@ -227,31 +202,43 @@ class MenuPrincipal(QWidget):
 
     def handle_create(self, create_func, menu_window):
         try:
-            create_func(menu_window)  
+            with medir_acao(create_func.__name__):
+                create_func(menu_window)  
             QMessageBox.information(menu_window, "Sucesso", f"{create_func.__name__.replace('_', ' ').title()} criado com sucesso!")
             menu_window.close()  
+        except Cancelada:
+            QMessageBox.information(menu_window, "Cancelado", "Operação cancelada.")
         except Exception as e:
             QMessageBox.critical(menu_window, "Erro", f"Ocorreu um erro: {e}")
 
     def handle_read(self, read_func, menu_window):
         try:
-            read_func(menu_window)
+            with medir_acao(read_func.__name__):
+                read_func(menu_window)
+        except Cancelada:
+            QMessageBox.information(menu_window, "Cancelado", "Operação cancelada.")
         except Exception as e:
             QMessageBox.critical(menu_window, "Erro", f"Ocorreu um erro ao buscar: {e}")
 
     def handle_update(self, update_func, menu_window):
         try:
-            update_func()
+            with medir_acao(update_func.__name__):
+                update_func()
             QMessageBox.information(self, "Sucesso", f"{update_func.__name__.replace('_', ' ').title()} atualizado com sucesso!")
             menu_window.close() 
+        except Cancelada:
+            QMessageBox.information(menu_window, "Cancelado", "Operação cancelada.")
         except Exception as e:
             QMessageBox.critical(menu_window, "Erro", f"Ocorreu um erro: {e}")
 
     def handle_delete(self, delete_func, menu_window):
         try:
-            delete_func()
+            with medir_acao(delete_func.__name__):
+                delete_func()
             QMessageBox.information(self, "Sucesso", "Registro deletado com sucesso.")
             menu_window.close() 
+        except Cancelada:
+            QMessageBox.information(menu_window, "Cancelado", "Operação cancelada.")
         except Exception as e:
             QMessageBox.critical(menu_window, "Erro", f"Ocorreu um erro: {e}")
 
@@ -299,6 +286,7 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_pessoa_fisica(self, window):
         nome = self.nome_input.text()
         cpf = self.cpf_input.text()
@@ -308,25 +296,22 @@ class MenuPrincipal(QWidget):
         complemento = self.complemento_input.text()
         telefones = self.telefones_input.text().split(',')  
 
-        
-        nova_pessoa_fisica = PessoaFisica(
-            nome=nome, 
-            cpf=cpf, 
-            endereco_cep=cep, 
-            endereco_rua=rua, 
-            endereco_cidade=cidade, 
-            endereco_complemento=complemento
-        )
-        
-        session.add(nova_pessoa_fisica)
-        session.commit()
-
-        
-        for numero in telefones:
-            novo_telefone = Telefone(numero=numero.strip(), dono=nova_pessoa_fisica)
-            session.add(novo_telefone)
-        
-        session.commit()
+        try:
+            em_segundo_plano(
+                window,
+                repositorio.criar_pessoa_fisica,
+                nome=nome, 
+                cpf=cpf, 
+                endereco_cep=cep, 
+                endereco_rua=rua, 
+                endereco_cidade=cidade, 
+                endereco_complemento=complemento,
+                telefones=telefones
+            )
+        except ValueError as erro:
+            # CPF já cadastrado (repositorio.JaCadastrado, ou a resposta 400 do servidor): corrige no próprio formulário
+            QMessageBox.warning(window, "Erro", str(erro))
+            return
 
         
         QMessageBox.information(window, "Sucesso", "Pessoa Física adicionada com sucesso!")
@@ -336,7 +321,7 @@ class MenuPrincipal(QWidget):
         cpf, ok = QInputDialog.getText(self, "Buscar Pessoa Física", "Digite o CPF da pessoa física:")
         
         if ok and cpf:
-            pessoa = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf).first()
+            pessoa = em_segundo_plano(self, repositorio.buscar_pessoa_fisica, cpf, com_telefones=True)
             read_window = QDialog(parent_window)
             read_window.setWindowTitle("Pessoa Física")
             layout = QVBoxLayout()
@@ -359,7 +344,7 @@ class MenuPrincipal(QWidget):
     def update_pessoa_fisica(self):
         cpf, ok = QInputDialog.getText(self, "Atualizar Pessoa Física", "Digite o CPF da pessoa física a ser atualizada:")
         if ok and cpf:
-            pessoa_fisica = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf).first()
+            pessoa_fisica = em_segundo_plano(self, repositorio.buscar_pessoa_fisica, cpf, com_telefones=True)
 
             if pessoa_fisica:
                 atributos = [
@@ -401,23 +386,19 @@ class MenuPrincipal(QWidget):
                     elif atributo == "Telefones":
                         novos_telefones, ok_telefones = QInputDialog.getText(self, "Atualizar Telefones", "Telefones atuais: {}. Digite os novos telefones (separados por vírgula) (ou deixe em branco para manter):".format(', '.join([t.numero for t in pessoa_fisica.telefones])))
                         if ok_telefones and novos_telefones:
-                            pessoa_fisica.telefones.clear()
-                            for telefone in novos_telefones.split(','):
-                                novo_telefone = Telefone(numero=telefone.strip())
-                                pessoa_fisica.telefones.append(novo_telefone)
-                session.commit()
-                QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
+                            em_segundo_plano(self, repositorio.definir_telefones, pessoa_fisica, novos_telefones)
+                if gravar_alteracoes(self, pessoa_fisica):
+                    QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Pessoa Física não encontrada.")
 
     def delete_pessoa_fisica(self):
         cpf, ok = QInputDialog.getText(self, "Deletar Pessoa Física", "Digite o CPF da pessoa física a ser deletada:")
         if ok and cpf:
-            pessoa_fisica = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf).first()
+            pessoa_fisica = em_segundo_plano(self, repositorio.buscar_pessoa_fisica, cpf)
 
             if pessoa_fisica:
-                session.delete(pessoa_fisica)
-                session.commit()
+                em_segundo_plano(self, repositorio.remover, pessoa_fisica)
                 QMessageBox.information(self, "Sucesso", "Pessoa Física deletada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Pessoa Física não encontrada.")
@@ -465,6 +446,7 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_ong(self, window):
         nome = self.nome_input.text()
         cnpj = self.cnpj_input.text()
@@ -474,23 +456,21 @@ class MenuPrincipal(QWidget):
         complemento = self.complemento_input.text()
         telefones = self.telefones_input.text().split(',')  
 
-        nova_ong = ONG(
-            nome=nome, 
-            cnpj=cnpj, 
-            endereco_cep=cep, 
-            endereco_rua=rua, 
-            endereco_cidade=cidade, 
-            endereco_complemento=complemento
-        )
-        
-        session.add(nova_ong)
-        session.commit()
-
-        for numero in telefones:
-            novo_telefone = Telefone(numero=numero.strip(), dono=nova_ong)
-            session.add(novo_telefone)
-        
-        session.commit()
+        try:
+            em_segundo_plano(
+                window,
+                repositorio.criar_ong,
+                nome=nome, 
+                cnpj=cnpj, 
+                endereco_cep=cep, 
+                endereco_rua=rua, 
+                endereco_cidade=cidade, 
+                endereco_complemento=complemento,
+                telefones=telefones
+            )
+        except ValueError as erro:
+            QMessageBox.warning(window, "Erro", str(erro))
+            return
 
         QMessageBox.information(window, "Sucesso", "ONG adicionada com sucesso!")
         window.close()
@@ -499,7 +479,7 @@ class MenuPrincipal(QWidget):
         cnpj, ok = QInputDialog.getText(self, "Buscar ONG", "Digite o CNPJ da ONG:")
         
         if ok and cnpj:
-            ong = session.query(ONG).filter(ONG.cnpj == cnpj).first()
+            ong = em_segundo_plano(self, repositorio.buscar_ong, cnpj, com_telefones=True)
             read_window = QDialog(parent_window)
             read_window.setWindowTitle("ONG")
             layout = QVBoxLayout()
@@ -522,7 +502,7 @@ class MenuPrincipal(QWidget):
     def update_ong(self):
         cnpj, ok = QInputDialog.getText(self, "Atualizar ONG", "Digite o CNPJ da ONG a ser atualizada:")
         if ok and cnpj:
-            ong = session.query(ONG).filter(ONG.cnpj == cnpj).first()
+            ong = em_segundo_plano(self, repositorio.buscar_ong, cnpj, com_telefones=True)
 
             if ong:
                 atributos = [
@@ -565,25 +545,21 @@ class MenuPrincipal(QWidget):
                         novos_telefones, ok_telefones = QInputDialog.getText(self, "Atualizar Telefones", "Telefones atuais: {}. Digite os novos telefones (separados por vírgula) (ou deixe em branco para manter):".format(', '.join([t.numero for t in ong.telefones])))
 
                         if ok_telefones and novos_telefones:
-                            ong.telefones.clear()
-                            for telefone in novos_telefones.split(','):
-                                novo_telefone = Telefone(numero=telefone.strip())
-                                ong.telefones.append(novo_telefone)
+                            em_segundo_plano(self, repositorio.definir_telefones, ong, novos_telefones)
 
                 
-                session.commit()
-                QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
+                if gravar_alteracoes(self, ong):
+                    QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "ONG não encontrada.")
 
     def delete_ong(self):
         cnpj, ok = QInputDialog.getText(self, "Deletar ONG", "Digite o CNPJ da ONG a ser deletada:")
         if ok and cnpj:
-            ong = session.query(ONG).filter(ONG.cnpj == cnpj).first()
+            ong = em_segundo_plano(self, repositorio.buscar_ong, cnpj)
 
             if ong:
-                session.delete(ong)
-                session.commit()
+                em_segundo_plano(self, repositorio.remover, ong)
                 QMessageBox.information(self, "Sucesso", "ONG deletada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "ONG não encontrada.")
@@ -620,47 +596,34 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_especie(self, window):
         nome = self.nome_input.text()
         descricao = self.descricao_input.text()
         subespecie = self.subespecie_input.text()
 
-        nova_especie = Especie(
-            nome=nome,
-            descricao=descricao,
-            subespecie=subespecie
-        )
-        
-        session.add(nova_especie)
-        session.commit()
+        em_segundo_plano(window, repositorio.criar_especie, nome=nome, descricao=descricao, subespecie=subespecie)
 
         QMessageBox.information(window, "Sucesso", "Espécie adicionada com sucesso!")
         window.close()
 
     def read_especie(self, parent_window):
-        especies = session.query(Especie).all()
-
-        read_window = QDialog(parent_window)
-        read_window.setWindowTitle("Lista de Espécies")
-        layout = QVBoxLayout()
-
-        if especies:
-            for especie in especies:
-                layout.addWidget(QLabel(f"Nome: {especie.nome}"))
-                layout.addWidget(QLabel(f"Descrição: {especie.descricao}"))
-                layout.addWidget(QLabel(f"Subespécie: {especie.subespecie}"))
-                layout.addWidget(QLabel("------------------------"))
-        else:
-            layout.addWidget(QLabel("Nenhuma espécie encontrada."))
-
-        read_window.setLayout(layout)
-        read_window.exec_()
+        modelo = TabelaPaginada(
+            [
+                ("Nome", lambda especie: especie.nome),
+                ("Descrição", lambda especie: especie.descricao),
+                ("Subespécie", lambda especie: especie.subespecie),
+            ],
+            repositorio.pagina_especies,
+            parent=parent_window
+        )
+        mostrar_tabela(parent_window, "Lista de Espécies", modelo, "Nenhuma espécie encontrada.")
 
 
     def update_especie(self):
         nome, ok = QInputDialog.getText(self, "Atualizar Espécie", "Digite o nome da espécie a ser atualizada:")
         if ok and nome:
-            especie = session.query(Especie).filter(Especie.nome == nome).first()
+            especie = em_segundo_plano(self, repositorio.buscar_especie, nome)
 
             if especie:
                 atributos = [
@@ -686,19 +649,18 @@ class MenuPrincipal(QWidget):
                         if ok_subespecie and nova_subespecie:
                             especie.subespecie = nova_subespecie
 
-                session.commit()
-                QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
+                if gravar_alteracoes(self, especie):
+                    QMessageBox.information(self, "Sucesso", "Informação atualizada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Espécie não encontrada.")
 
     def delete_especie(self):
         nome, ok = QInputDialog.getText(self, "Deletar Espécie", "Digite o nome da espécie a ser deletada:")
         if ok and nome:
-            especie = session.query(Especie).filter(Especie.nome == nome).first()
+            especie = em_segundo_plano(self, repositorio.buscar_especie, nome)
 
             if especie:
-                session.delete(especie)
-                session.commit()
+                em_segundo_plano(self, repositorio.remover, especie)
                 QMessageBox.information(self, "Sucesso", "Espécie deletada com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Espécie não encontrada.")
@@ -741,6 +703,7 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_vacina(self, window):
         nome = self.nome_input.text()
         status = self.status_input.text()
@@ -762,22 +725,21 @@ class MenuPrincipal(QWidget):
                 QMessageBox.warning(window, "Erro", "Formato de data inválido para a próxima aplicação. Use YYYY-MM-DD.")
                 return
 
-        animal = session.query(Animal).filter(Animal.nome == animal_nome).first()
+        animal = em_segundo_plano(window, repositorio.buscar_animal_por_nome, animal_nome)
         if not animal:
             QMessageBox.warning(window, "Erro", "Animal não encontrado.")
             return
 
-        nova_vacina = Vacina(
+        em_segundo_plano(
+            window,
+            repositorio.criar_vacina,
             nome=nome,
             status=status,
             data_aplicacao=data_aplicacao,
             prox_aplicacao=prox_aplicacao,
-            animal_id=animal.id
+            animal=animal
         )
 
-        session.add(nova_vacina)
-        session.commit()
-
         QMessageBox.information(window, "Sucesso", "Vacina criada com sucesso!")
         window.close()
 
@@ -786,13 +748,13 @@ class MenuPrincipal(QWidget):
         if not dono_nome_cpf[1]:  
             return
 
-        dono = session.query(PessoaFisica).filter((PessoaFisica.nome == dono_nome_cpf[0]) | (PessoaFisica.cpf == dono_nome_cpf[0])).first()
+        dono = em_segundo_plano(self, repositorio.buscar_pessoa_fisica_por_nome_ou_cpf, dono_nome_cpf[0])
 
         if not dono:
             QMessageBox.warning(parent_window, "Erro", "Dono não encontrado.")
             return
         
-        animais = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+        animais = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
         if not animais:
             QMessageBox.warning(parent_window, "Erro", "Nenhum animal encontrado para este dono.")
@@ -815,30 +777,30 @@ class MenuPrincipal(QWidget):
         animal_selection_window.setLayout(layout)
         animal_selection_window.exec_()
 
+    @volta_ao_formulario
     def confirmar_animal_selection(self, animal_selection_window, dono):
         animal_nome_selecionado = self.animal_combobox.currentText()
-        animal = session.query(Animal).filter(Animal.nome == animal_nome_selecionado, Animal.dono_id == dono.id).first()
+        animal = em_segundo_plano(self, repositorio.buscar_animal_do_dono, dono.id, animal_nome_selecionado)
 
         if animal:
-            vacinas = session.query(Vacina).filter(Vacina.animal_id == animal.id).all()
-
-            read_window = QDialog(animal_selection_window)
-            read_window.setWindowTitle("Lista de Vacinas")
-            layout = QVBoxLayout()
-
-            if vacinas:
-                for vacina in vacinas:
-                    layout.addWidget(QLabel(f"\n==o== Vacina ID: {vacina.id} ==o=="))
-                    layout.addWidget(QLabel(f"Nome: {vacina.nome}"))
-                    layout.addWidget(QLabel(f"Status: {vacina.status}"))
-                    layout.addWidget(QLabel(f"Data de Aplicação: {vacina.data_aplicacao}"))
-                    layout.addWidget(QLabel(f"Próxima Aplicação: {vacina.prox_aplicacao if vacina.prox_aplicacao else 'Não especificada'}"))
-                    layout.addWidget(QLabel("------------------------"))
-            else:
-                layout.addWidget(QLabel("Nenhuma vacina encontrada para este animal."))
-
-            read_window.setLayout(layout)
-            read_window.exec_()
+            colunas = [
+                ("ID", lambda vacina: vacina.id),
+                ("Nome", lambda vacina: vacina.nome),
+                ("Status", lambda vacina: vacina.status),
+                ("Data de Aplicação", lambda vacina: vacina.data_aplicacao),
+                ("Próxima Aplicação", lambda vacina: vacina.prox_aplicacao or "Não especificada"),
+            ]
+            modelo = TabelaPaginada(
+                colunas,
+                lambda session, apos_id, limite: repositorio.pagina_vacinas_do_animal(session, animal.id, apos_id, limite),
+                parent=animal_selection_window
+            )
+            historico = lambda janela: TabelaPaginada(
+                colunas + [("Arquivada", lambda vacina: "Sim" if vacina.arquivada else "Não")],
+                lambda session, apos_id, limite: repositorio.pagina_historico_vacinas_do_animal(session, animal.id, apos_id, limite),
+                parent=janela
+            )
+            mostrar_tabela(animal_selection_window, "Lista de Vacinas", modelo, "Nenhuma vacina encontrada para este animal.", historico)
         else:
             QMessageBox.warning(animal_selection_window, "Erro", "Animal não encontrado.")
 
@@ -847,10 +809,10 @@ class MenuPrincipal(QWidget):
     def update_vacina(self):
         dono_nome_cpf, ok = QInputDialog.getText(self, "Atualizar Vacina", "Digite o nome ou CPF do dono:")
         if ok and dono_nome_cpf:
-            dono = session.query(PessoaFisica).filter((PessoaFisica.nome == dono_nome_cpf) | (PessoaFisica.cpf == dono_nome_cpf)).first()
+            dono = em_segundo_plano(self, repositorio.buscar_pessoa_fisica_por_nome_ou_cpf, dono_nome_cpf)
 
             if dono:
-                animais_dono = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animais_dono = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if not animais_dono:
                     QMessageBox.warning(self, "Erro", "Nenhum animal encontrado para este dono.")
@@ -860,63 +822,17 @@ class MenuPrincipal(QWidget):
 
                 if ok_animal and animal_nome:
                     animal_selecionado = next(animal for animal in animais_dono if animal.nome == animal_nome)
-                    vacinas = session.query(Vacina).filter(Vacina.animal_id == animal_selecionado.id).all()
+                    vacinas = em_segundo_plano(self, repositorio.listar_vacinas_do_animal, animal_selecionado.id)
 
                     if not vacinas:
                         QMessageBox.warning(self, "Erro", "Nenhuma vacina encontrada para este animal.")
                         return
-                    vacina_ids = [str(vacina.id) for vacina in vacinas]
-                    vacina_id, ok_vacina = QInputDialog.getItem(self, "Escolher Vacina", "Escolha a vacina a ser atualizada:", vacina_ids, 0, False)
-
-                    if ok_vacina and vacina_id:
-                        vacina = session.query(Vacina).filter(Vacina.id == vacina_id).first()
-
-                        if vacina:
-                            atributos = [
-                                "Nome",
-                                "Status",
-                                "Data de Aplicação",
-                                "Próxima Aplicação"
-                            ]
-
-                            atributo, ok_atributo = QInputDialog.getItem(self, "Escolher Atributo", "Escolha o atributo a ser atualizado:", atributos, 0, False)
-                            if ok_atributo and atributo:
-                                if atributo == "Nome":
-                                    novo_nome, ok_nome = QInputDialog.getText(self, "Atualizar Nome", f"Nome atual: {vacina.nome}. Digite o novo nome (ou deixe em branco para manter):")
-                                    if ok_nome:
-                                        vacina.nome = novo_nome or vacina.nome
-
-                                elif atributo == "Status":
-                                    novo_status, ok_status = QInputDialog.getText(self, "Atualizar Status", f"Status atual: {vacina.status}. Digite o novo status (ou deixe em branco para manter):")
-                                    if ok_status:
-                                        vacina.status = novo_status or vacina.status
-
-                                elif atributo == "Data de Aplicação":
-                                    nova_data_aplicacao = QDateEdit()
-                                    nova_data_aplicacao.setDisplayFormat("yyyy-MM-dd")
-                                    nova_data_aplicacao.setDate(vacina.data_aplicacao)  
-                                    nova_data_aplicacao_input = QInputDialog.getText(self, "Atualizar Data de Aplicação", f"Data de aplicação atual: {vacina.data_aplicacao}. Escolha uma nova data (ou deixe em branco para manter):", QLineEdit.Normal, nova_data_aplicacao.text())
-                                    if nova_data_aplicacao_input[1]:  
-                                        try:
-                                            vacina.data_aplicacao = nova_data_aplicacao.date().toPyDate()  
-                                        except ValueError:
-                                            QMessageBox.warning(self, "Erro", "Formato de data inválido. Mantendo a data anterior.")
-
-                                elif atributo == "Próxima Aplicação":
-                                    nova_prox_aplicacao = QDateEdit()
-                                    nova_prox_aplicacao.setDisplayFormat("yyyy-MM-dd")
-                                    nova_prox_aplicacao.setDate(vacina.prox_aplicacao) 
-                                    nova_prox_aplicacao_input = QInputDialog.getText(self, "Atualizar Próxima Aplicação", f"Próxima aplicação atual: {vacina.prox_aplicacao}. Escolha uma nova data (ou deixe em branco para manter):", QLineEdit.Normal, nova_prox_aplicacao.text())
-                                    if nova_prox_aplicacao_input[1]:  
-                                        try:
-                                            vacina.prox_aplicacao = nova_prox_aplicacao.date().toPyDate()  
-                                        except ValueError:
-                                            QMessageBox.warning(self, "Erro", "Formato de data inválido. Mantendo a data anterior.")
-
-                            session.commit()
-                            QMessageBox.information(self, "Sucesso", "Vacina atualizada com sucesso!")
-                        else:
-                            QMessageBox.warning(self, "Erro", "Vacina não encontrada.")
+                    editar_em_grade(self, f"Vacinas de {animal_selecionado.nome}", vacinas, [
+                        ("Nome", "nome", "texto", True),
+                        ("Status", "status", "texto", True),
+                        ("Data de Aplicação", "data_aplicacao", "data", True),
+                        ("Próxima Aplicação", "prox_aplicacao", "data", False),
+                    ], "Vacinas atualizadas com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Dono não encontrado.")
 
@@ -925,11 +841,11 @@ class MenuPrincipal(QWidget):
     def delete_vacina(self):
         dono_nome_cpf, ok = QInputDialog.getText(self, "Deletar Vacina", "Digite o nome ou CPF do dono:")
         if ok and dono_nome_cpf:
-            dono = session.query(PessoaFisica).filter((PessoaFisica.nome == dono_nome_cpf) | (PessoaFisica.cpf == dono_nome_cpf)).first()
+            dono = em_segundo_plano(self, repositorio.buscar_pessoa_fisica_por_nome_ou_cpf, dono_nome_cpf)
 
             if dono:
                 
-                animais_dono = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animais_dono = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
                 if not animais_dono:
                     QMessageBox.warning(self, "Erro", "Nenhum animal encontrado para este dono.")
                     return
@@ -938,7 +854,7 @@ class MenuPrincipal(QWidget):
 
                 if ok_animal and animal_nome:
                     animal_selecionado = next(animal for animal in animais_dono if animal.nome == animal_nome)
-                    vacinas = session.query(Vacina).filter(Vacina.animal_id == animal_selecionado.id).all()
+                    vacinas = em_segundo_plano(self, repositorio.listar_vacinas_do_animal, animal_selecionado.id)
 
                     if not vacinas:
                         QMessageBox.warning(self, "Erro", "Nenhuma vacina encontrada para este animal.")
@@ -947,11 +863,10 @@ class MenuPrincipal(QWidget):
                     vacina_id, ok_vacina = QInputDialog.getItem(self, "Escolher Vacina", "Escolha a vacina a ser deletada:", vacina_ids, 0, False)
 
                     if ok_vacina and vacina_id:
-                        vacina = session.query(Vacina).filter(Vacina.id == vacina_id).first()
+                        vacina = em_segundo_plano(self, repositorio.buscar_vacina, vacina_id)
 
                         if vacina:
-                            session.delete(vacina)
-                            session.commit()
+                            em_segundo_plano(self, repositorio.remover, vacina)
                             QMessageBox.information(self, "Sucesso", "Vacina deletada com sucesso!")
                         else:
                             QMessageBox.warning(self, "Erro", "Vacina não encontrada.")
@@ -977,11 +892,9 @@ class MenuPrincipal(QWidget):
         self.tratamentos_input = QLineEdit()
         self.tratamentos_input.setPlaceholderText("Tratamentos Realizados")
         
-        self.especie_combobox = QComboBox()
-        self.especie_combobox.addItems([e.nome for e in session.query(Especie).all()])  
+        self.especie_seletor = SeletorIncremental(repositorio.buscar_especies_por_prefixo, lambda e: e.nome, "Digite o nome da espécie")
         
-        self.dono_combobox = QComboBox()
-        self.dono_combobox.addItems([f"{d.nome} - {d.cpf}" for d in session.query(PessoaFisica).all()])  
+        self.dono_seletor = SeletorIncremental(repositorio.buscar_pessoas_fisicas_por_prefixo, lambda d: f"{d.nome} - {d.cpf}", "Digite o nome ou CPF do dono")
 
         btn_salvar = QPushButton("Salvar")
         btn_cancelar = QPushButton("Cancelar")
@@ -990,9 +903,9 @@ class MenuPrincipal(QWidget):
         layout.addWidget(self.data_nasc_input)
         layout.addWidget(self.tratamentos_input)
         layout.addWidget(QLabel("Espécie:"))
-        layout.addWidget(self.especie_combobox)
+        layout.addWidget(self.especie_seletor)
         layout.addWidget(QLabel("Dono:"))
-        layout.addWidget(self.dono_combobox)
+        layout.addWidget(self.dono_seletor)
         layout.addWidget(btn_salvar)
         layout.addWidget(btn_cancelar)
 
@@ -1003,28 +916,31 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_animal(self, window):
         nome = self.nome_input.text()
         data_nasc_str = self.data_nasc_input.text()
         tratamentos = self.tratamentos_input.text()
         
-        especie_nome = self.especie_combobox.currentText()
-        dono_nome = self.dono_combobox.currentText().split(" - ")[-1]  
+        especie_id = self.especie_seletor.id_selecionado()
+        dono_id = self.dono_seletor.id_selecionado()
+        if especie_id is None or dono_id is None:
+            QMessageBox.warning(window, "Erro", "Selecione a espécie e o dono na lista de sugestões.")
+            return
 
-        especie = session.query(Especie).filter(Especie.nome == especie_nome).first()
-        dono = session.query(PessoaFisica).filter(PessoaFisica.cpf == dono_nome).first()
         data_nasc = datetime.strptime(data_nasc_str, "%Y-%m-%d").date() if data_nasc_str else None
 
-        novo_animal = Animal(
-            nome=nome,
-            data_nasc=data_nasc,
-            tratamentos_realizados=tratamentos,
-            especie=especie,
-            dono=dono
-        )
-        
-        session.add(novo_animal)
-        session.commit()
+        def criar(session):
+            return repositorio.criar_animal(
+                session,
+                nome=nome,
+                data_nasc=data_nasc,
+                tratamentos_realizados=tratamentos,
+                especie=repositorio.buscar_especie_por_id(session, especie_id),
+                dono=repositorio.buscar_dono(session, dono_id)
+            )
+
+        em_segundo_plano(window, criar)
 
         QMessageBox.information(window, "Sucesso", "Animal adicionado com sucesso!")
         window.close()
@@ -1033,23 +949,21 @@ class MenuPrincipal(QWidget):
         cpf_cnpj, ok = QInputDialog.getText(self, "Buscar Animal", "Digite o CPF ou CNPJ do cliente:")
 
         if ok and cpf_cnpj:
-            if len(cpf_cnpj) == 11:  # CPF
-                dono = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            elif len(cpf_cnpj) == 14:  # CNPJ
-                dono = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            else:
+            if len(normalizar_documento(cpf_cnpj) or "") not in (11, 14):
                 QMessageBox.warning(self, "Erro", "Digite um CPF (11 dígitos) ou um CNPJ (14 dígitos) válidos.")
                 return
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animals = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animals = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animals:
                     animal_names = [animal.nome for animal in animals]
                     selected_animal_name, ok_animal = QInputDialog.getItem(parent_window, "Selecione o Animal", "Escolha um animal:", animal_names, 0, False)
 
                     if ok_animal and selected_animal_name:
-                        animal = session.query(Animal).filter(Animal.nome == selected_animal_name, Animal.dono_id == dono.id).first()
+                        selecionado = next(animal for animal in animals if animal.nome == selected_animal_name)
+                        animal = em_segundo_plano(self, repositorio.ficha_animal, selecionado.id)
 
                         read_window = QDialog(parent_window)
                         read_window.setWindowTitle("Animal")
@@ -1058,16 +972,28 @@ class MenuPrincipal(QWidget):
                         layout.addWidget(QLabel(f"Nome: {animal.nome}"))
                         layout.addWidget(QLabel(f"Data de Nascimento: {animal.data_nasc.strftime('%d/%m/%Y') if animal.data_nasc else 'Não informado'}"))
                         layout.addWidget(QLabel(f"Tratamentos Realizados: {animal.tratamentos_realizados or 'Nenhum'}"))
-                        layout.addWidget(QLabel(f"Espécie: {animal.especie.nome}"))
-                        layout.addWidget(QLabel(f"Dono: {dono.nome} - {dono.cpf}"))
-
-                        consultas_str = ', '.join([c.data_consulta.strftime("%d/%m/%Y") for c in animal.consultas]) if animal.consultas else 'Nenhuma consulta'
-                        layout.addWidget(QLabel(f"Histórico de Consultas: {consultas_str}"))
-
-                        vacinas_str = ', '.join([v.nome for v in animal.vacinas]) if animal.vacinas else 'Nenhuma vacina registrada'
-                        layout.addWidget(QLabel(f"Vacinas: {vacinas_str}"))
+                        layout.addWidget(QLabel(f"Espécie: {animal.especie.nome if animal.especie else 'Não informada'}"))
+                        layout.addWidget(QLabel(f"Dono: {dono.nome} - {cpf_cnpj}"))
+
+                        # consultas e vacinas, inclusive arquivadas, da mais recente para a mais antiga
+                        linha_do_tempo = TabelaPaginada(
+                            [
+                                ("Data", lambda evento: evento.data),
+                                ("Tipo", lambda evento: "Consulta" if evento.tipo == repositorio.EVENTO_CONSULTA else "Vacina"),
+                                ("Descrição", lambda evento: evento.descricao),
+                                ("Veterinário / Status", lambda evento: evento.veterinario or evento.status),
+                                ("Próxima Aplicação", lambda evento: evento.prox_aplicacao),
+                                ("Arquivada", lambda evento: "Sim" if evento.arquivada else "Não"),
+                            ],
+                            lambda session, apos, limite: repositorio.pagina_linha_do_tempo(session, animal.id, apos, limite),
+                            parent=read_window,
+                            chave=lambda evento: (evento.data, evento.tipo, evento.id)
+                        )
+                        layout.addWidget(QLabel("Linha do Tempo:" if linha_do_tempo.rowCount() else "Linha do Tempo: nenhuma consulta ou vacina registrada"))
+                        layout.addWidget(criar_tabela(linha_do_tempo))
 
                         read_window.setLayout(layout)
+                        read_window.resize(700, 500)
                         read_window.exec_()
                     else:
                         QMessageBox.warning(self, "Erro", "Nenhum animal selecionado.")
@@ -1080,49 +1006,17 @@ class MenuPrincipal(QWidget):
     def update_animal(self):
         cpf_cnpj, ok = QInputDialog.getText(self, "Atualizar Animal", "Digite o CPF ou CNPJ do dono:")
         if ok and cpf_cnpj:
-            pessoa_fisica = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            ong = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            dono = pessoa_fisica if pessoa_fisica else ong
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animais = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animais = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animais:
-                    nomes_animais = [f"{animal.id}: {animal.nome}" for animal in animais]
-                    animal_selecionado, ok_animal = QInputDialog.getItem(self, "Escolher Animal", "Escolha o animal a ser atualizado:", nomes_animais, 0, False)
-
-                    if ok_animal and animal_selecionado:
-                        id_animal = animal_selecionado.split(":")[0]
-                        animal = session.query(Animal).filter(Animal.id == id_animal).first()
-
-                        if animal:
-                            atributos = [
-                                "Nome",
-                                "Data de Nascimento",
-                                "Tratamentos Realizados"
-                            ]
-    
-                            atributo, ok_atributo = QInputDialog.getItem(self, "Escolher Atributo", "Escolha o atributo a ser atualizado:", atributos, 0, False)
-                            if ok_atributo and atributo:
-                                if atributo == "Nome":
-                                    novo_nome, ok_nome = QInputDialog.getText(self, "Atualizar Nome", "Nome atual: {}. Digite o novo nome (ou deixe em branco para manter):".format(animal.nome))
-                                    if ok_nome and novo_nome:
-                                        animal.nome = novo_nome
-
-                                elif atributo == "Data de Nascimento":
-                                    nova_data_nascimento, ok_data = QInputDialog.getText(self, "Atualizar Data de Nascimento", "Data de Nascimento atual: {}. Digite a nova data de nascimento (ou deixe em branco para manter):".format(animal.data_nascimento))
-                                    if ok_data and nova_data_nascimento:
-                                        animal.data_nascimento = nova_data_nascimento
-
-                                elif atributo == "Tratamentos Realizados":
-                                    novos_tratamentos, ok_tratamentos = QInputDialog.getText(self, "Atualizar Tratamentos Realizados", "Tratamentos atuais: {}. Digite os novos tratamentos (ou deixe em branco para manter):".format(animal.tratamentos_realizados))
-                                    if ok_tratamentos:
-                                        if novos_tratamentos:
-                                            animal.tratamentos_realizados = novos_tratamentos 
-                            session.commit()
-                            QMessageBox.information(self, "Sucesso", "Informação do animal atualizada com sucesso!")
-                        else:
-                            QMessageBox.warning(self, "Erro", "Animal não encontrado.")
+                    editar_em_grade(self, f"Animais de {dono.nome}", animais, [
+                        ("Nome", "nome", "texto", True),
+                        ("Data de Nascimento", "data_nasc", "data", False),
+                        ("Tratamentos Realizados", "tratamentos_realizados", "texto", False),
+                    ], "Informação dos animais atualizada com sucesso!")
                 else:
                     QMessageBox.warning(self, "Erro", "Nenhum animal encontrado para este dono.")
             else:
@@ -1131,12 +1025,10 @@ class MenuPrincipal(QWidget):
     def delete_animal(self):
         cpf_cnpj, ok = QInputDialog.getText(self, "Deletar Animal", "Digite o CPF ou CNPJ do dono:")
         if ok and cpf_cnpj:
-            pessoa_fisica = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            ong = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            dono = pessoa_fisica if pessoa_fisica else ong
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animais = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animais = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animais:
                     nomes_animais = [f"{animal.id}: {animal.nome}" for animal in animais]
@@ -1144,11 +1036,10 @@ class MenuPrincipal(QWidget):
 
                     if ok_animal and animal_selecionado:
                         id_animal = animal_selecionado.split(":")[0]
-                        animal = session.query(Animal).filter(Animal.id == id_animal).first()
+                        animal = em_segundo_plano(self, repositorio.buscar_animal, id_animal)
 
                         if animal:
-                            session.delete(animal)
-                            session.commit()
+                            em_segundo_plano(self, repositorio.remover, animal)
                             QMessageBox.information(self, "Sucesso", "Animal deletado com sucesso!")
                         else:
                             QMessageBox.warning(self, "Erro", "Animal não encontrado.")
@@ -1171,11 +1062,9 @@ class MenuPrincipal(QWidget):
         self.data_consulta_input.setCalendarPopup(True)
         self.data_consulta_input.setDate(QDate.currentDate())
 
-        self.animal_combobox = QComboBox()
-        self.animal_combobox.addItems([f"{a.nome} ({a.id})" for a in session.query(Animal).all()])  
+        self.animal_seletor = SeletorIncremental(repositorio.buscar_animais_por_prefixo, lambda a: f"{a.nome} ({a.id})", "Digite o nome do animal")
 
-        self.veterinario_combobox = QComboBox()
-        self.veterinario_combobox.addItems([f"{v.nome}" for v in session.query(Veterinario).all()])  
+        self.veterinario_seletor = SeletorIncremental(repositorio.buscar_veterinarios_por_prefixo, lambda v: f"{v.nome} - Registro: {v.numero_reg_prof}", "Digite o nome do veterinário")
 
         self.descricao_input = QLineEdit()
         self.descricao_input.setPlaceholderText("Descrição")
@@ -1186,9 +1075,9 @@ class MenuPrincipal(QWidget):
         layout.addWidget(QLabel("Data da Consulta:"))
         layout.addWidget(self.data_consulta_input)
         layout.addWidget(QLabel("Animal:"))
-        layout.addWidget(self.animal_combobox)
+        layout.addWidget(self.animal_seletor)
         layout.addWidget(QLabel("Veterinário:"))
-        layout.addWidget(self.veterinario_combobox)
+        layout.addWidget(self.veterinario_seletor)
         layout.addWidget(QLabel("Descrição:"))
         layout.addWidget(self.descricao_input)
         layout.addWidget(btn_salvar)
@@ -1201,23 +1090,27 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_consulta(self, window):
         data_consulta = self.data_consulta_input.date().toPyDate()
-        animal_id = self.animal_combobox.currentText().split("(")[-1].strip(")")
-        veterinario_nome = self.veterinario_combobox.currentText()
+        animal_id = self.animal_seletor.id_selecionado()
+        veterinario_id = self.veterinario_seletor.id_selecionado()
+        if animal_id is None or veterinario_id is None:
+            QMessageBox.warning(window, "Erro", "Selecione o animal e o veterinário na lista de sugestões.")
+            return
 
-        animal = session.query(Animal).filter(Animal.id == animal_id).first()
-        veterinario = session.query(Veterinario).filter(Veterinario.nome == veterinario_nome).first()
+        descricao = self.descricao_input.text()
 
-        nova_consulta = Consulta(
-            data_consulta=data_consulta,  
-            animal=animal,
-            veterinario=veterinario,
-            descricao=self.descricao_input.text()
-        )
+        def criar(session):
+            return repositorio.criar_consulta(
+                session,
+                data_consulta=data_consulta,
+                animal=repositorio.buscar_animal(session, animal_id),
+                veterinario=repositorio.buscar_veterinario_por_id(session, veterinario_id),
+                descricao=descricao
+            )
 
-        session.add(nova_consulta)
-        session.commit()
+        em_segundo_plano(window, criar)
 
         QMessageBox.information(window, "Sucesso", "Consulta adicionada com sucesso!")
         window.close()
@@ -1226,54 +1119,48 @@ class MenuPrincipal(QWidget):
         cpf_cnpj, ok = QInputDialog.getText(self, "Buscar Consulta", "Digite o CPF ou CNPJ do cliente:")
 
         if ok and cpf_cnpj:
-            if len(cpf_cnpj) == 11:  
-                dono = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            elif len(cpf_cnpj) == 14:  
-                dono = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            else:
+            if len(normalizar_documento(cpf_cnpj) or "") not in (11, 14):
                 QMessageBox.warning(self, "Erro", "Digite um CPF (11 dígitos) ou um CNPJ (14 dígitos) válidos.")
                 return
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animals = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animals = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animals:
                     animal_names = [animal.nome for animal in animals]
                     selected_animal_name, ok_animal = QInputDialog.getItem(parent_window, "Selecione o Animal", "Escolha um animal:", animal_names, 0, False)
 
                     if ok_animal and selected_animal_name:
-                        animal = session.query(Animal).filter(Animal.nome == selected_animal_name, Animal.dono_id == dono.id).first()
-
-                        consultas = session.query(Consulta).filter(Consulta.animal_id == animal.id).all()
-
-                        if consultas:
-                            consultas_str = [f"ID: {consulta.id} - Data: {consulta.data_consulta.strftime('%d/%m/%Y')}" for consulta in consultas]
-                            selected_consulta_str, ok_consulta = QInputDialog.getItem(parent_window, "Selecione a Consulta", "Escolha uma consulta:", consultas_str, 0, False)
-
-                            if ok_consulta and selected_consulta_str:
-                                consulta_id = int(selected_consulta_str.split(" - ")[0].split(": ")[1])
-
-                                consulta = session.query(Consulta).filter(
-                                    Consulta.id == consulta_id
-                                ).first()
-
-                                if consulta:
-                                    read_window = QDialog(parent_window)
-                                    read_window.setWindowTitle("Consulta")
-                                    layout = QVBoxLayout()
-
-                                    layout.addWidget(QLabel(f"Data da Consulta: {consulta.data_consulta.strftime('%d/%m/%Y')}"))
-                                    layout.addWidget(QLabel(f"Descrição: {consulta.descricao}"))
-                                    layout.addWidget(QLabel(f"Veterinário: {consulta.veterinario.especializacao} - Registro: {consulta.veterinario.numero_reg_prof}"))
-
-                                    read_window.setLayout(layout)
-                                    read_window.exec_()
-                                else:
-                                    QMessageBox.warning(self, "Erro", "Consulta não encontrada para o ID selecionado.")
-                            else:
-                                QMessageBox.warning(self, "Erro", "Nenhuma consulta selecionada.")
-                        else:
-                            QMessageBox.warning(self, "Erro", "Nenhuma consulta registrada para esse animal.")
+                        animal = next(animal for animal in animals if animal.nome == selected_animal_name)
+
+                        modelo = TabelaPaginada(
+                            [
+                                ("ID", lambda consulta: consulta.id),
+                                ("Data", lambda consulta: consulta.data_consulta),
+                                ("Veterinário", lambda consulta: consulta.veterinario.nome),
+                                ("Especialização", lambda consulta: consulta.veterinario.especializacao),
+                                ("Registro", lambda consulta: consulta.veterinario.numero_reg_prof),
+                                ("Descrição", lambda consulta: consulta.descricao),
+                            ],
+                            lambda session, apos_id, limite: repositorio.pagina_consultas_do_animal(session, animal.id, apos_id, limite),
+                            parent=parent_window
+                        )
+                        # linhas do histórico: o veterinário vem em colunas, não num relacionamento
+                        historico = lambda janela: TabelaPaginada(
+                            [
+                                ("ID", lambda consulta: consulta.id),
+                                ("Data", lambda consulta: consulta.data_consulta),
+                                ("Veterinário", lambda consulta: consulta.veterinario),
+                                ("Especialização", lambda consulta: consulta.especializacao),
+                                ("Registro", lambda consulta: consulta.numero_reg_prof),
+                                ("Descrição", lambda consulta: consulta.descricao),
+                                ("Arquivada", lambda consulta: "Sim" if consulta.arquivada else "Não"),
+                            ],
+                            lambda session, apos_id, limite: repositorio.pagina_historico_consultas_do_animal(session, animal.id, apos_id, limite),
+                            parent=janela
+                        )
+                        mostrar_tabela(parent_window, "Consultas", modelo, "Nenhuma consulta registrada para esse animal.", historico)
                     else:
                         QMessageBox.warning(self, "Erro", "Nenhum animal selecionado.")
                 else:
@@ -1287,25 +1174,22 @@ class MenuPrincipal(QWidget):
         cpf_cnpj, ok = QInputDialog.getText(self, "Atualizar Consulta", "Digite o CPF ou CNPJ do cliente:")
 
         if ok and cpf_cnpj:
-            if len(cpf_cnpj) == 11:  
-                dono = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            elif len(cpf_cnpj) == 14:  
-                dono = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            else:
+            if len(normalizar_documento(cpf_cnpj) or "") not in (11, 14):
                 QMessageBox.warning(self, "Erro", "Digite um CPF (11 dígitos) ou um CNPJ (14 dígitos) válidos.")
                 return
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animals = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animals = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animals:
                     animal_names = [animal.nome for animal in animals]
                     selected_animal_name, ok_animal = QInputDialog.getItem(self, "Selecione o Animal", "Escolha um animal:", animal_names, 0, False)
 
                     if ok_animal and selected_animal_name:
-                        animal = session.query(Animal).filter(Animal.nome == selected_animal_name, Animal.dono_id == dono.id).first()
+                        animal = em_segundo_plano(self, repositorio.buscar_animal_do_dono, dono.id, selected_animal_name)
 
-                        consultas = session.query(Consulta).filter(Consulta.animal_id == animal.id).all()
+                        consultas = em_segundo_plano(self, repositorio.listar_consultas_do_animal, animal.id)
 
                         if consultas:
                             consultas_str = [f"ID: {consulta.id} - Data: {consulta.data_consulta.strftime('%d/%m/%Y')}" for consulta in consultas]
@@ -1314,7 +1198,7 @@ class MenuPrincipal(QWidget):
                             if ok_consulta and selected_consulta_str:
                                 consulta_id = int(selected_consulta_str.split(" - ")[0].split(": ")[1])
 
-                                consulta = session.query(Consulta).filter(Consulta.id == consulta_id).first()
+                                consulta = em_segundo_plano(self, repositorio.buscar_consulta, consulta_id)
 
                                 if consulta:
                                     atributos = [
@@ -1331,17 +1215,17 @@ class MenuPrincipal(QWidget):
                                                 consulta.data_consulta = datetime.strptime(nova_data, "%Y-%m-%d").date()  
 
                                         elif atributo == "Veterinário":
-                                            novo_veterinario_nome, ok_vet = QInputDialog.getItem(self, "Escolher Veterinário", "Escolha um novo veterinário:", [f"{v.nome}" for v in session.query(Veterinario).all()])
-                                            if ok_vet:
-                                                consulta.veterinario = session.query(Veterinario).filter(Veterinario.nome == novo_veterinario_nome).first()
+                                            novo_veterinario_id = escolher(self, "Escolher Veterinário", "Escolha um novo veterinário:", repositorio.buscar_veterinarios_por_prefixo, lambda v: f"{v.nome} - Registro: {v.numero_reg_prof}")
+                                            if novo_veterinario_id is not None:
+                                                consulta.veterinario_id = novo_veterinario_id
 
                                         elif atributo == "Descrição":
                                             nova_descricao, ok_desc = QInputDialog.getText(self, "Atualizar Descrição", f"Descrição atual: {consulta.descricao}. Digite a nova descrição (ou deixe em branco para manter):")
                                             if ok_desc:
                                                 consulta.descricao = nova_descricao or consulta.descricao
 
-                                    session.commit()
-                                    QMessageBox.information(self, "Sucesso", "Informação da consulta atualizada com sucesso!")
+                                    if gravar_alteracoes(self, consulta):
+                                        QMessageBox.information(self, "Sucesso", "Informação da consulta atualizada com sucesso!")
                                 else:
                                     QMessageBox.warning(self, "Erro", "Consulta não encontrada.")
                             else:
@@ -1360,25 +1244,22 @@ class MenuPrincipal(QWidget):
         cpf_cnpj, ok = QInputDialog.getText(self, "Deletar Consulta", "Digite o CPF ou CNPJ do cliente:")
 
         if ok and cpf_cnpj:
-            if len(cpf_cnpj) == 11:  
-                dono = session.query(PessoaFisica).filter(PessoaFisica.cpf == cpf_cnpj).first()
-            elif len(cpf_cnpj) == 14:  
-                dono = session.query(ONG).filter(ONG.cnpj == cpf_cnpj).first()
-            else:
+            if len(normalizar_documento(cpf_cnpj) or "") not in (11, 14):
                 QMessageBox.warning(self, "Erro", "Digite um CPF (11 dígitos) ou um CNPJ (14 dígitos) válidos.")
                 return
+            dono = em_segundo_plano(self, repositorio.buscar_dono_por_documento, cpf_cnpj)
 
             if dono:
-                animals = session.query(Animal).filter(Animal.dono_id == dono.id).all()
+                animals = em_segundo_plano(self, repositorio.listar_animais_do_dono, dono.id)
 
                 if animals:
                     animal_names = [animal.nome for animal in animals]
                     selected_animal_name, ok_animal = QInputDialog.getItem(self, "Selecione o Animal", "Escolha um animal:", animal_names, 0, False)
 
                     if ok_animal and selected_animal_name:
-                        animal = session.query(Animal).filter(Animal.nome == selected_animal_name, Animal.dono_id == dono.id).first()
+                        animal = em_segundo_plano(self, repositorio.buscar_animal_do_dono, dono.id, selected_animal_name)
 
-                        consultas = session.query(Consulta).filter(Consulta.animal_id == animal.id).all()
+                        consultas = em_segundo_plano(self, repositorio.listar_consultas_do_animal, animal.id)
 
                         if consultas:
                             consultas_str = [f"ID: {consulta.id} - Data: {consulta.data_consulta.strftime('%d/%m/%Y')}" for consulta in consultas]
@@ -1387,11 +1268,10 @@ class MenuPrincipal(QWidget):
                             if ok_consulta and selected_consulta_str:
                                 consulta_id = int(selected_consulta_str.split(" - ")[0].split(": ")[1])
 
-                                consulta = session.query(Consulta).filter(Consulta.id == consulta_id).first()
+                                consulta = em_segundo_plano(self, repositorio.buscar_consulta, consulta_id)
 
                                 if consulta:
-                                    session.delete(consulta)
-                                    session.commit()
+                                    em_segundo_plano(self, repositorio.remover, consulta)
                                     QMessageBox.information(self, "Sucesso", "Consulta deletada com sucesso!")
                                 else:
                                     QMessageBox.warning(self, "Erro", "Consulta não encontrada.")
@@ -1440,19 +1320,23 @@ class MenuPrincipal(QWidget):
 
         create_window.exec_()
 
+    @volta_ao_formulario
     def salvar_veterinario(self, window):
         nome = self.nome_input.text()
         especializacao = self.especializacao_input.text()
         numero_reg_prof = self.numero_reg_prof_input.text()
 
-        novo_veterinario = Veterinario(
-            nome=nome,
-            especializacao=especializacao,
-            numero_reg_prof=numero_reg_prof
-        )
-
-        session.add(novo_veterinario)
-        session.commit()
+        try:
+            novo_veterinario = em_segundo_plano(
+                window,
+                repositorio.criar_veterinario,
+                nome=nome,
+                especializacao=especializacao,
+                numero_reg_prof=numero_reg_prof
+            )
+        except ValueError as erro:
+            QMessageBox.warning(window, "Erro", str(erro))
+            return
 
         QMessageBox.information(window, "Sucesso", f"Veterinário adicionado com sucesso! ID: {novo_veterinario.id}")
         window.close()
@@ -1461,7 +1345,7 @@ class MenuPrincipal(QWidget):
         numero_reg_prof = QInputDialog.getText(self, "Buscar Veterinário", "Digite o número de registro profissional:")
 
         if numero_reg_prof[1]:
-            veterinario = session.query(Veterinario).filter(Veterinario.numero_reg_prof == numero_reg_prof[0]).first()
+            veterinario = em_segundo_plano(self, repositorio.buscar_veterinario, numero_reg_prof[0])
 
             if veterinario:
                 read_window = QDialog(parent_window)
@@ -1483,32 +1367,14 @@ class MenuPrincipal(QWidget):
         numero_reg_prof = QInputDialog.getText(self, "Atualizar Veterinário", "Digite o número de registro profissional:")
 
         if numero_reg_prof[1]:  
-            veterinario = session.query(Veterinario).filter(Veterinario.numero_reg_prof == numero_reg_prof[0]).first()
+            veterinario = em_segundo_plano(self, repositorio.buscar_veterinario, numero_reg_prof[0])
 
             if veterinario:
-                
-                atributos = [
-                    "Nome",
-                    "Especialização",
-                    "Número de Registro Profissional"
-                ]
-
-                atributo, ok_atributo = QInputDialog.getItem(self, "Escolher Atributo", "Escolha o atributo a ser atualizado:", atributos, 0, False)
-                if ok_atributo and atributo:
-                    if atributo == "Nome":
-                        novo_nome = QInputDialog.getText(self, "Atualizar Nome", f"Novo nome (atual: {veterinario.nome}):")[0]
-                        veterinario.nome = novo_nome or veterinario.nome
-
-                    elif atributo == "Especialização":
-                        nova_especializacao = QInputDialog.getText(self, "Atualizar Especialização", f"Nova especialização (atual: {veterinario.especializacao}):")[0]
-                        veterinario.especializacao = nova_especializacao or veterinario.especializacao
-
-                    elif atributo == "Número de Registro Profissional":
-                        novo_numero_reg_prof = QInputDialog.getText(self, "Atualizar Registro Profissional", f"Novo número de registro (atual: {veterinario.numero_reg_prof}):")[0]
-                        veterinario.numero_reg_prof = novo_numero_reg_prof or veterinario.numero_reg_prof
-
-                session.commit()
-                QMessageBox.information(self, "Sucesso", "Veterinário atualizado com sucesso!")
+                editar_em_grade(self, "Atualizar Veterinário", [veterinario], [
+                    ("Nome", "nome", "texto", True),
+                    ("Especialização", "especializacao", "texto", False),
+                    ("Número de Registro Profissional", "numero_reg_prof", "inteiro", True),
+                ], "Veterinário atualizado com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Veterinário não encontrado.")
 
@@ -1517,16 +1383,27 @@ class MenuPrincipal(QWidget):
         numero_reg_prof = QInputDialog.getText(self, "Deletar Veterinário", "Digite o número de registro profissional:")
 
         if numero_reg_prof[1]: 
-            veterinario = session.query(Veterinario).filter(Veterinario.numero_reg_prof == numero_reg_prof[0]).first()
+            veterinario = em_segundo_plano(self, repositorio.buscar_veterinario, numero_reg_prof[0])
 
             if veterinario:
-                session.delete(veterinario)
-                session.commit()
+                em_segundo_plano(self, repositorio.remover, veterinario)
                 QMessageBox.information(self, "Sucesso", "Veterinário removido com sucesso!")
             else:
                 QMessageBox.warning(self, "Erro", "Veterinário não encontrado.")
 
-app = QApplication([])
-window = MenuPrincipal()
-window.show()
-app.exec_()
+
+def iniciar(servidor=None):
+    app = QApplication([])
+    window = MenuPrincipal()
+    window.show()
+    app.processEvents()  # desenha o menu antes das importações pesadas
+    carregar_modulos(servidor)
+    return app, window
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sistema da clínica veterinária.")
+    parser.add_argument("--servidor", help="URL do servidor da clínica (python -m clinica.servidor), ex.: http://127.0.0.1:8765")
+    args = parser.parse_args()
+    app, window = iniciar(args.servidor)
+    app.exec_()
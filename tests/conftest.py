@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+# Antes de qualquer importação de clinica (lido em clinica/modelos.py): nos
+# testes, tela que depender de lazy load falha em vez de emitir comandos a mais.
+os.environ["CLINICA_LAZY_RAISE"] = "1"
+
+from clinica import banco  # noqa: E402
+from clinica.cache import cache  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Banco novo num arquivo temporário. O cache é esvaziado antes e depois:
+    # os ids se repetem de um banco de teste para o outro.
+    cache.invalidar()
+    engine = banco.configurar_banco(f"sqlite:///{tmp_path / 'clinica.db'}")
+    banco.inicializar_banco(engine)
+    yield engine
+    engine.dispose()
+    cache.invalidar()
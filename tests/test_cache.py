@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import delete, update
+
+from clinica import banco, repositorio
+from clinica.cache import cache
+from clinica.modelos import Veterinario
+
+
+def especializacao(numero_reg_prof=10):
+    with banco.unidade_de_trabalho() as session:
+        veterinario = repositorio.buscar_veterinario(session, numero_reg_prof)
+        return veterinario.especializacao if veterinario is not None else None
+
+
+@pytest.fixture
+def veterinario_id(engine):
+    with banco.unidade_de_trabalho() as session:
+        veterinario_id = repositorio.criar_veterinario(session, nome="Vet", especializacao="Clínica", numero_reg_prof=10).id
+    # a segunda busca tem que vir do cache, senão os testes abaixo não provam nada
+    assert especializacao() == especializacao() == "Clínica"
+    assert cache.estatisticas()["acertos"] >= 1
+    return veterinario_id
+
+
+def test_alteracao_pelo_orm_invalida(veterinario_id):
+    with banco.unidade_de_trabalho() as session:
+        session.get(Veterinario, veterinario_id).especializacao = "Cirurgia"
+    assert especializacao() == "Cirurgia"
+
+
+def test_remocao_pelo_orm_invalida(veterinario_id):
+    with banco.unidade_de_trabalho() as session:
+        repositorio.remover(session, session.get(Veterinario, veterinario_id))
+    assert especializacao() is None
+
+
+def test_comando_em_massa_invalida(veterinario_id):
+    with banco.unidade_de_trabalho() as session:
+        session.execute(update(Veterinario).where(Veterinario.id == veterinario_id).values(especializacao="Cirurgia"))
+    assert especializacao() == "Cirurgia"
+
+    with banco.unidade_de_trabalho() as session:
+        session.execute(delete(Veterinario).where(Veterinario.id == veterinario_id))
+    assert especializacao() is None
+
+
+def test_rollback_nao_deixa_valor_nao_gravado_no_cache(veterinario_id):
+    with pytest.raises(RuntimeError):
+        with banco.unidade_de_trabalho() as session:
+            session.get(Veterinario, veterinario_id).especializacao = "Cirurgia"
+            session.flush()
+            # dentro da transação a busca vê (e guarda) o valor ainda não gravado
+            assert repositorio.buscar_veterinario(session, 10).especializacao == "Cirurgia"
+            raise RuntimeError("desistiu")
+    assert especializacao() == "Clínica"
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from clinica import banco, repositorio, servidor
+from clinica.modelos import Dono, Veterinario
+from clinica.protocolo import codificar
+
+
+def contar(modelo):
+    with banco.unidade_de_trabalho() as session:
+        return session.scalar(select(func.count()).select_from(modelo))
+
+
+def test_cpf_repetido_e_recusado(engine):
+    with banco.unidade_de_trabalho() as session:
+        repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="111.111.111-11", endereco_cep="01000000")
+
+    with pytest.raises(repositorio.JaCadastrado, match="já cadastrado"):
+        with banco.unidade_de_trabalho() as session:
+            repositorio.criar_pessoa_fisica(session, nome="Ana de novo", cpf="11111111111", endereco_cep="01000000")
+    assert contar(Dono) == 1
+
+
+def test_documento_de_pessoa_nao_serve_para_ong(engine):
+    with banco.unidade_de_trabalho() as session:
+        repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="11111111111", endereco_cep="01000000")
+
+    with pytest.raises(repositorio.JaCadastrado):
+        with banco.unidade_de_trabalho() as session:
+            repositorio.criar_ong(session, nome="ONG", cnpj="111.111.111-11", endereco_cep="01000000")
+    assert contar(Dono) == 1
+
+
+def test_registro_profissional_repetido_e_recusado(engine):
+    with banco.unidade_de_trabalho() as session:
+        repositorio.criar_veterinario(session, nome="Vet", especializacao="Clínica", numero_reg_prof=10)
+
+    with pytest.raises(repositorio.JaCadastrado, match="Registro profissional 10"):
+        with banco.unidade_de_trabalho() as session:
+            repositorio.criar_veterinario(session, nome="Outro", especializacao="Cirurgia", numero_reg_prof=10)
+    assert contar(Veterinario) == 1
+
+
+def test_servidor_responde_400_para_documento_repetido(engine):
+    # o cliente remoto transforma o 400 em ValueError, que o formulário mostra
+    pessoa = codificar({"nome": "Ana", "cpf": "11111111111", "endereco_cep": "01000000"})
+    atender = servidor.Servidor(engine, 1)
+    assert asyncio.run(atender.tratar("POST", "/pessoas_fisicas", pessoa))[0] == 201
+    situacao, corpo = asyncio.run(atender.tratar("POST", "/pessoas_fisicas", pessoa))
+    assert situacao == 400
+    assert "já cadastrado" in json.loads(corpo)["erro"]
@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from clinica import banco, repositorio
+from clinica.modelos import PessoaFisica, Vacina
+
+
+def ler(modelo, objeto_id):
+    # como as telas: o objeto chega desanexado de uma unidade de trabalho já encerrada
+    with banco.unidade_de_trabalho() as session:
+        return session.get(modelo, objeto_id)
+
+
+@pytest.fixture
+def dono_id(engine):
+    with banco.unidade_de_trabalho() as session:
+        return repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="11111111111", endereco_cep="01000000").id
+
+
+@pytest.fixture
+def vacinas(dono_id):
+    with banco.unidade_de_trabalho() as session:
+        animal = repositorio.criar_animal(session, nome="Rex", data_nasc=None, tratamentos_realizados=None,
+                                          especie=None, dono=session.get(PessoaFisica, dono_id))
+        return [repositorio.criar_vacina(session, nome=nome, status="Agendada", data_aplicacao=date(2024, 1, 10),
+                                         prox_aplicacao=None, animal=animal).id
+                for nome in ("V10", "Raiva")]
+
+
+def test_segunda_estacao_recebe_conflito(dono_id):
+    primeira = ler(PessoaFisica, dono_id)
+    segunda = ler(PessoaFisica, dono_id)
+
+    primeira.endereco_cidade = "Santos"
+    with banco.unidade_de_trabalho() as session:
+        repositorio.gravar(session, primeira)
+
+    segunda.nome = "Ana Maria"
+    with pytest.raises(repositorio.Conflito) as conflito:
+        with banco.unidade_de_trabalho() as session:
+            repositorio.gravar(session, segunda)
+    assert conflito.value.outros == {"endereco_cidade": "Santos"}
+    assert conflito.value.meus == {"nome": "Ana Maria"}
+
+    atual = ler(PessoaFisica, dono_id)
+    assert (atual.nome, atual.endereco_cidade, atual.versao) == ("Ana", "Santos", primeira.versao + 1)
+
+
+def test_sobrepor_grava_por_cima_so_as_colunas_alteradas(dono_id):
+    primeira = ler(PessoaFisica, dono_id)
+    segunda = ler(PessoaFisica, dono_id)
+
+    primeira.endereco_cidade = "Santos"
+    with banco.unidade_de_trabalho() as session:
+        repositorio.gravar(session, primeira)
+
+    segunda.nome = "Ana Maria"
+    with banco.unidade_de_trabalho() as session:
+        repositorio.gravar(session, segunda, sobrepor=True)
+
+    atual = ler(PessoaFisica, dono_id)
+    assert (atual.nome, atual.endereco_cidade) == ("Ana Maria", "Santos")
+
+
+def test_gravar_varios_recusa_o_lote_com_uma_linha_desatualizada(vacinas):
+    grade = [ler(Vacina, vacina_id) for vacina_id in vacinas]
+
+    # outra estação aplica a segunda vacina enquanto a grade está aberta
+    outra = ler(Vacina, vacinas[1])
+    outra.status = "Aplicada"
+    with banco.unidade_de_trabalho() as session:
+        repositorio.gravar(session, outra)
+
+    for vacina in grade:
+        vacina.prox_aplicacao = date(2025, 1, 10)
+    with pytest.raises(repositorio.Conflito) as conflito:
+        with banco.unidade_de_trabalho() as session:
+            repositorio.gravar_varios(session, grade)
+    assert conflito.value.outros == {repositorio.rotulo_em_lote(vacinas[1], "status"): "Aplicada"}
+
+    # nada do lote foi gravado, nem a linha que estava em dia
+    with banco.unidade_de_trabalho() as session:
+        linhas = session.execute(select(Vacina.status, Vacina.prox_aplicacao).order_by(Vacina.id)).all()
+    assert linhas == [("Agendada", None), ("Aplicada", None)]
+
+
+def test_gravar_varios_em_dia_sobe_a_versao_de_cada_linha(vacinas):
+    grade = [ler(Vacina, vacina_id) for vacina_id in vacinas]
+    for vacina in grade:
+        vacina.prox_aplicacao = date(2025, 1, 10)
+    with banco.unidade_de_trabalho() as session:
+        assert repositorio.gravar_varios(session, grade) == 2
+
+    depois = [ler(Vacina, vacina_id) for vacina_id in vacinas]
+    assert [(v.prox_aplicacao, v.versao) for v in depois] == [(date(2025, 1, 10), v.versao + 1) for v in grade]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from clinica import banco, exportacao, repositorio
+from clinica.modelos import Veterinario
+
+
+def ler(pasta, nome):
+    with open(pasta / f"{nome}.jsonl", encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo]
+
+
+def exportar(engine, pasta, desde=None, podar=False):
+    return exportacao.exportar(str(pasta), formato="jsonl", desde=desde, engine=engine, podar=podar)
+
+
+@pytest.fixture
+def veterinarios(engine):
+    with banco.unidade_de_trabalho() as session:
+        repositorio.criar_pessoa_fisica(session, nome="Ana", cpf="11111111111", endereco_cep="01000000")
+        return [repositorio.criar_veterinario(session, nome=nome, especializacao="Clínica", numero_reg_prof=numero).id
+                for nome, numero in (("Vet A", 10), ("Vet B", 20), ("Vet C", 30))]
+
+
+def alterar(veterinarios):
+    # muda o primeiro, remove o segundo e cadastra um quarto; o terceiro fica como estava
+    with banco.unidade_de_trabalho() as session:
+        session.get(Veterinario, veterinarios[0]).especializacao = "Cirurgia"
+        repositorio.remover(session, session.get(Veterinario, veterinarios[1]))
+        return repositorio.criar_veterinario(session, nome="Vet D", especializacao="Clínica", numero_reg_prof=40).id
+
+
+def test_exportacao_incremental_so_traz_o_que_mudou(engine, tmp_path, veterinarios):
+    completa = exportar(engine, tmp_path / "completa")
+    assert [v["nome"] for v in ler(tmp_path / "completa", "veterinarios")] == ["Vet A", "Vet B", "Vet C"]
+    assert len(ler(tmp_path / "completa", "donos")) == 1
+
+    novo = alterar(veterinarios)
+    incremental = exportar(engine, tmp_path / "incremental", desde=completa["marca_dagua"])
+
+    assert [(v["id"], v["especializacao"]) for v in ler(tmp_path / "incremental", "veterinarios")] == [(veterinarios[0], "Cirurgia"), (novo, "Clínica")]
+    assert ler(tmp_path / "incremental", "veterinarios_removidos") == [{"id": veterinarios[1]}]
+    assert ler(tmp_path / "incremental", "donos") == []
+    assert incremental["entidades"]["veterinarios"] == {"linhas": 2, "removidos": 1}
+    assert incremental["marca_dagua"] > completa["marca_dagua"]
+
+    # nada mudou desde a última marca: arquivos vazios
+    vazia = exportar(engine, tmp_path / "vazia", desde=incremental["marca_dagua"])
+    assert all(contagem == {"linhas": 0, "removidos": 0} for nome, contagem in vazia["entidades"].items() if nome != "veterinario_animais")
+
+
+def test_podar_exige_desde(engine, tmp_path):
+    with pytest.raises(ValueError, match="incrementais"):
+        exportar(engine, tmp_path, podar=True)
+
+
+def test_marca_anterior_a_poda_e_recusada(engine, tmp_path, veterinarios):
+    completa = exportar(engine, tmp_path / "completa")
+    alterar(veterinarios)
+    podada = exportar(engine, tmp_path / "podada", desde=completa["marca_dagua"], podar=True)
+    assert podada["podadas"] > 0
+
+    # quem ainda estava numa marca mais antiga perdeu alterações: só a completa serve
+    with pytest.raises(ValueError, match="podado"):
+        exportar(engine, tmp_path / "antiga", desde=completa["marca_dagua"] - 1)
+    # a partir da marca podada as alterações continuam lá
+    assert exportar(engine, tmp_path / "mesma", desde=completa["marca_dagua"])["entidades"]["veterinarios"] == {"linhas": 2, "removidos": 1}
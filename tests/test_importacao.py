@@ -0,0 +1,109 @@
+import json
+
+from sqlalchemy import select
+
+from clinica import banco, importacao, repositorio
+from clinica.modelos import Animal, Consulta, Dono, Vacina
+
+
+def escrever(caminho, registros):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        for registro in registros:
+            arquivo.write((registro if isinstance(registro, str) else json.dumps(registro)) + "\n")
+    return str(caminho)
+
+
+def arquivos_da_clinica(pasta, descricao="Rotina"):
+    return {
+        "especies": escrever(pasta / "especies.jsonl", [{"nome": "Cão", "subespecie": "SRD"}]),
+        "veterinarios": escrever(pasta / "veterinarios.jsonl", [{"nome": "Vet", "numero_reg_prof": 10}]),
+        "pessoas_fisicas": escrever(pasta / "pessoas.jsonl", [
+            {"nome": "Ana", "cpf": "111.111.111-11", "endereco_cep": "01000000", "telefones": "(11) 91234-5678"},
+            {"nome": "Bia", "cpf": "222.222.222-22", "endereco_cep": "02000000"},
+        ]),
+        "animais": escrever(pasta / "animais.jsonl", [
+            {"dono_documento": "11111111111", "nome": "Rex", "especie": "Cão", "data_nasc": "2020-05-01"},
+            {"dono_documento": "22222222222", "nome": "Mel", "especie": "Cão"},
+        ]),
+        "vacinas": escrever(pasta / "vacinas.jsonl", [
+            {"dono_documento": "11111111111", "animal": "Rex", "nome": "V10", "status": "Aplicada", "data_aplicacao": "2024-01-10", "prox_aplicacao": "2025-01-10"},
+        ]),
+        "consultas": escrever(pasta / "consultas.jsonl", [
+            {"dono_documento": "22222222222", "animal": "Mel", "numero_reg_prof": "10", "data_consulta": "2024-02-01", "descricao": descricao},
+        ]),
+    }
+
+
+def versoes(engine):
+    with engine.connect() as conexao:
+        return {modelo.__name__: conexao.execute(select(modelo.id, modelo.versao).order_by(modelo.id)).all()
+                for modelo in (Dono, Animal, Vacina, Consulta)}
+
+
+def test_reimportar_so_regrava_o_que_mudou(engine, tmp_path):
+    arquivos = arquivos_da_clinica(tmp_path)
+    primeira = importacao.importar(arquivos, engine)
+    assert [(r.inseridas, r.rejeitadas) for r in primeira] == [(1, 0), (1, 0), (2, 0), (2, 0), (1, 0), (1, 0)]
+    antes = versoes(engine)
+
+    segunda = importacao.importar(arquivos, engine)
+    assert [(r.inseridas, r.atualizadas, r.rejeitadas) for r in segunda] == [(0, 0, 0)] * 6
+    assert versoes(engine) == antes
+
+    terceira = importacao.importar(arquivos_da_clinica(tmp_path, descricao="Retorno"), engine)
+    assert [r.atualizadas for r in terceira] == [0, 0, 0, 0, 0, 1]
+    depois = versoes(engine)
+    assert depois["Consulta"] == [(id_, versao + 1) for id_, versao in antes["Consulta"]]
+    assert {nome: linhas for nome, linhas in depois.items() if nome != "Consulta"} == {nome: linhas for nome, linhas in antes.items() if nome != "Consulta"}
+
+
+def test_linha_ilegivel_e_rejeitada_com_o_numero(engine, tmp_path):
+    caminho = escrever(tmp_path / "pessoas.jsonl", [
+        {"nome": "Ana", "cpf": "11111111111", "endereco_cep": "01000000"},
+        '{"nome": "Bia", "cpf": ',
+        "",
+        "[1, 2]",
+        {"nome": "Caio", "cpf": "33333333333", "endereco_cep": "03000000"},
+    ])
+    resultado, = importacao.importar({"pessoas_fisicas": caminho}, engine)
+    assert (resultado.lidas, resultado.inseridas, resultado.rejeitadas) == (4, 2, 2)
+    assert resultado.erros[0].startswith("linha 2: JSON inválido")
+    assert resultado.erros[1] == "linha 4: a linha não é um objeto JSON"
+
+
+def importar_com_cadastro_no_meio(engine, caminho, cadastrar):
+    # cadastro feito na recepção depois de o importador carregar os documentos existentes
+    with engine.connect() as conexao:
+        importador = importacao.Importador(conexao)
+        with banco.unidade_de_trabalho() as session:
+            cadastrar(session)
+        return importador.importar("pessoas_fisicas", importacao.ler_registros(caminho))
+
+
+def nomes_dos_donos():
+    with banco.unidade_de_trabalho() as session:
+        return [dono.nome for dono in session.scalars(select(Dono).order_by(Dono.id))]
+
+
+def pessoas(pasta):
+    return escrever(pasta / "pessoas.jsonl", [
+        {"nome": "Ana", "cpf": "11111111111", "endereco_cep": "01000000"},
+        {"nome": "Bia", "cpf": "222.222.222-22", "endereco_cep": "02000000"},
+        {"nome": "Caio", "cpf": "33333333333", "endereco_cep": "03000000"},
+    ])
+
+
+def test_documento_cadastrado_durante_a_importacao_nao_duplica_o_dono(engine, tmp_path):
+    # o lote esbarra no documento único, é refeito linha a linha e a linha vira atualização
+    resultado = importar_com_cadastro_no_meio(engine, pessoas(tmp_path), lambda session: repositorio.criar_pessoa_fisica(
+        session, nome="Bia (recepção)", cpf="22222222222", endereco_cep="02000000"))
+    assert (resultado.inseridas, resultado.atualizadas, resultado.rejeitadas) == (2, 1, 0)
+    assert nomes_dos_donos() == ["Bia", "Ana", "Caio"]
+
+
+def test_documento_duplicado_rejeita_so_a_linha(engine, tmp_path):
+    resultado = importar_com_cadastro_no_meio(engine, pessoas(tmp_path), lambda session: repositorio.criar_ong(
+        session, nome="Bia ONG", cnpj="222.222.222-22", endereco_cep="02000000"))
+    assert (resultado.inseridas, resultado.atualizadas, resultado.rejeitadas) == (2, 0, 1)
+    assert resultado.erros == ["linha 2: CPF 222.222.222-22 já cadastrado como ong"]
+    assert nomes_dos_donos() == ["Bia ONG", "Ana", "Caio"]
@@ -0,0 +1,7 @@
+from benchmarks import limites_de_comandos
+
+
+def test_telas_dentro_dos_limites_de_comandos():
+    acima = [f"{tela.__name__}: {comandos} comandos (limite {limite})"
+             for tela, comandos, limite in limites_de_comandos.medir() if comandos > limite]
+    assert not acima, "; ".join(acima)
@@ -0,0 +1,96 @@
+# Confere com EXPLAIN QUERY PLAN que as buscas do CRUD usam índice: cada função
+# do repositório roda num banco populado, e todo SELECT que ela emite é explicado
+# com os mesmos parâmetros. Um "SCAN tabela" sem índice é uma leitura da tabela
+# inteira.
+
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from clinica import banco, repositorio
+from clinica.cache import cache
+
+
+ANIMAIS = 200
+VETERINARIOS = 20
+
+# SCAN sem USING: tabela lida por inteiro (subconsultas e CONSTANT ROW não são tabelas)
+VARREDURA = re.compile(r"^SCAN (?!CONSTANT ROW)(?!\()(\S+)(?!.*\bUSING\b)")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = banco.configurar_banco(f"sqlite:///{tmp_path / 'planos.db'}")
+    banco.inicializar_banco()
+    popular()
+    yield engine
+    engine.dispose()
+
+
+def popular():
+    with banco.unidade_de_trabalho() as session:
+        especies = [repositorio.criar_especie(session, nome=f"Espécie {i}", descricao="", subespecie="") for i in range(10)]
+        veterinarios = [repositorio.criar_veterinario(session, nome=f"Vet {i}", especializacao="", numero_reg_prof=1000 + i)
+                        for i in range(VETERINARIOS)]
+        for i in range(ANIMAIS // 2):
+            pessoa = repositorio.criar_pessoa_fisica(session, nome=f"Pessoa {i}", cpf=f"{i:011d}", endereco_cep="00000000")
+            ong = repositorio.criar_ong(session, nome=f"ONG {i}", cnpj=f"{i:014d}", endereco_cep="00000000")
+            for dono in (pessoa, ong):
+                animal = repositorio.criar_animal(session, nome=f"Animal {dono.id}", data_nasc=None, tratamentos_realizados="",
+                                                  especie=especies[i % 10], dono=dono)
+                repositorio.criar_consulta(session, data_consulta=date(2024, 1, 1), animal=animal,
+                                           veterinario=veterinarios[i % VETERINARIOS], descricao="Rotina")
+                repositorio.criar_vacina(session, nome="V10", status="Aplicada", data_aplicacao=date(2024, 1, 1), prox_aplicacao=None, animal=animal)
+    with banco.engine.connect() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+
+
+# função do repositório -> chamada como a tela faz
+BUSCAS = {
+    "buscar_pessoa_fisica": lambda session: repositorio.buscar_pessoa_fisica(session, f"{7:011d}"),
+    "buscar_ong": lambda session: repositorio.buscar_ong(session, f"{7:014d}"),
+    "buscar_dono_por_documento": lambda session: repositorio.buscar_dono_por_documento(session, f"{7:011d}"),
+    "listar_animais_do_dono": lambda session: repositorio.listar_animais_do_dono(session, 15),
+    "buscar_animal_do_dono": lambda session: repositorio.buscar_animal_do_dono(session, 15, "Animal 15"),
+    "buscar_animal_por_nome": lambda session: repositorio.buscar_animal_por_nome(session, "Animal 15"),
+    "listar_vacinas_do_animal": lambda session: repositorio.listar_vacinas_do_animal(session, 15),
+    "listar_consultas_do_animal": lambda session: repositorio.listar_consultas_do_animal(session, 15),
+    "buscar_veterinario": lambda session: repositorio.buscar_veterinario(session, 1005),
+    "buscar_veterinario_por_nome": lambda session: repositorio.buscar_veterinario_por_nome(session, "Vet 5"),
+    "buscar_especie": lambda session: repositorio.buscar_especie(session, "Espécie 5"),
+}
+
+
+def explicar(engine, busca):
+    # [(comando, linhas do plano)] de cada SELECT que a busca emite
+    emitidos = []
+
+    def registrar(conexao, cursor, comando, parametros, contexto, executemany):
+        if comando.lstrip().upper().startswith("SELECT"):
+            emitidos.append((comando, parametros))
+
+    cache.invalidar()  # as buscas por chave passariam pelo cache sem ir ao banco
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        with banco.unidade_de_trabalho() as session:
+            busca(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    with engine.connect() as conexao:
+        return [(comando, [linha[3] for linha in conexao.exec_driver_sql("EXPLAIN QUERY PLAN " + comando, parametros)])
+                for comando, parametros in emitidos]
+
+
+def test_buscas_do_crud_usam_indice(engine):
+    sem_select, varreduras = [], []
+    for nome, busca in BUSCAS.items():
+        planos = explicar(engine, busca)
+        if not planos:
+            sem_select.append(nome)
+        encontradas = [detalhe for _, plano in planos for detalhe in plano if VARREDURA.match(detalhe)]
+        if encontradas:
+            varreduras.append(f"{nome}: {'; '.join(encontradas)}")
+    assert not sem_select, sem_select
+    assert not varreduras, "\n".join(varreduras)